@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分布式爬取演示与基准：
+  1. 共享限速：多个进程同时从 SharedHostRateLimiter 领取同一主机的令牌，合计速率不超过设定值；
+  2. 端到端：在回放服务器（benchmarks/replay.py）上，分别用单进程和“协调进程 + N个工作进程”
+     生成所有主题的日报，比较耗时和请求数，并检查两种方式入选的文章是否一致。
+
+用法: python benchmarks/bench_distributed.py [--workers 3] [--rate 20] [--latency 0.2]
+"""
+
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from rate_limit import SharedHostRateLimiter
+
+
+def take_tokens(path, rate, count, start_at):
+    limiter = SharedHostRateLimiter(path, default_rate=rate, default_burst=1)
+    while time.time() < start_at:
+        time.sleep(0.01)
+    for _ in range(count):
+        limiter.acquire("https://weixin.sogou.com/weixin")
+
+
+def bench_shared_limit(processes, rate, count):
+    """processes 个进程各领取 count 个令牌，返回合计速率（次/秒）"""
+    path = os.path.join(tempfile.mkdtemp(), "limit.sqlite3")
+    SharedHostRateLimiter(path, default_rate=rate).close()  # 先建表
+    ctx = multiprocessing.get_context("spawn")
+    start_at = time.time() + 1.5
+    procs = [ctx.Process(target=take_tokens, args=(path, rate, count, start_at)) for _ in range(processes)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    elapsed = time.time() - start_at
+    # 第一个令牌来自满桶，不需要等待
+    return (processes * count - 1) / elapsed
+
+
+def configure(server_url, data_dir, rate, queue_path=None):
+    """在当前进程中配置 news_crawler：回放服务器、日报目录、请求速率"""
+    import news_crawler
+    from replay import install_replay
+
+    news_crawler.DATA_DIR = data_dir
+    news_crawler.WORK_QUEUE_PATH = queue_path
+    news_crawler.SKIP_SEEN = False
+    news_crawler.configure_fetch(rate=rate, sources=["wechat"])
+    install_replay(server_url)
+    return news_crawler
+
+
+def worker_main(server_url, data_dir, rate, queue_path):
+    news_crawler = configure(server_url, data_dir, rate, queue_path)
+    news_crawler.run_worker(idle_exit=3)
+
+
+def report_titles(data_dir):
+    titles = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            titles[os.path.basename(path)] = [row["标题"] for row in csv.DictReader(f)]
+    return titles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分布式爬取演示与基准")
+    parser.add_argument("--workers", type=int, default=3, help="工作进程数")
+    parser.add_argument("--rate", type=float, default=20.0, help="每个主机的请求速率（次/秒），所有进程合计")
+    parser.add_argument("--latency", type=float, default=0.2, help="回放服务器每个请求的延迟（秒）")
+    args = parser.parse_args()
+
+    measured = bench_shared_limit(args.workers, 5.0, 10)
+    print(f"共享限速: {args.workers} 个进程合计 {measured:.2f} 次/秒（设定 5 次/秒）")
+
+    from replay import ReplayServer, build_fixture_recording
+
+    recording = build_fixture_recording()
+    server = ReplayServer(recording, latency=args.latency, seed=0).start()
+
+    news_crawler = configure(server.url, tempfile.mkdtemp(prefix="bench-single-"), args.rate)
+    single_dir = news_crawler.DATA_DIR
+    start = time.perf_counter()
+    news_crawler.run_topic(news_crawler.ALL_TOPICS)
+    single = time.perf_counter() - start
+    requests_single = server.stats["requests"]
+
+    data_dir = tempfile.mkdtemp(prefix="bench-distributed-")
+    queue_path = os.path.join(data_dir, "work_queue.sqlite3")
+    configure(server.url, data_dir, args.rate, queue_path)
+    news_crawler.DISTRIBUTED = True
+    news_crawler.COORDINATOR_WORKS = False
+    news_crawler._work_queue = None
+    news_crawler._report_store = None
+    news_crawler.get_work_queue()
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=worker_main, args=(server.url, data_dir, args.rate, queue_path))
+        for _ in range(args.workers)
+    ]
+    for proc in workers:
+        proc.start()
+    start = time.perf_counter()
+    news_crawler.run_topic(news_crawler.ALL_TOPICS)
+    distributed = time.perf_counter() - start
+    for proc in workers:
+        proc.join()
+    server.stop()
+
+    print(f"\n单进程: {single:.2f} 秒，{requests_single} 个请求")
+    print(f"协调进程 + {args.workers} 个工作进程: {distributed:.2f} 秒，"
+          f"{server.stats['requests'] - requests_single} 个请求")
+    same = report_titles(single_dir) == report_titles(data_dir)
+    print(f"两种方式的日报入选文章{'一致' if same else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
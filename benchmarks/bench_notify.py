@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+推送队列演示与基准：用本地桩服务器模拟Server酱和通用Webhook，检查
+  1. 加入队列立即返回，不受推送接口延迟影响；
+  2. 同一批次的两份日报在Server酱渠道上合并为一条消息；
+  3. 接口返回5xx时按退避重试直至成功；
+  4. 接口不可用时通知保存在磁盘上，重新创建队列（相当于进程重启）后继续发送。
+
+用法: python benchmarks/bench_notify.py [--latency 0.5] [--failures 2]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notify import NotificationDispatcher, ServerChanChannel, WebhookChannel
+
+
+def make_handler(latency, failures, received):
+    """前 failures 次请求返回503，之后按Server酱/Webhook的格式返回成功"""
+    counter = {"requests": 0}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            time.sleep(latency)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+            with lock:
+                counter["requests"] += 1
+                fail = counter["requests"] <= failures
+            if fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if self.path.endswith(".send"):
+                title = parse_qs(body)["title"][0]
+            else:
+                title = json.loads(body)["title"]
+            received.append((self.path, title))
+            payload = json.dumps({"code": 0}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_server(latency, failures, received):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency, failures, received))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def channels(port):
+    base = f"http://127.0.0.1:{port}"
+    return [ServerChanChannel("", url=f"{base}/SCTKEY.send"), WebhookChannel(f"{base}/hook")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="推送队列演示与基准")
+    parser.add_argument("--latency", type=float, default=0.5, help="桩服务器响应延迟（秒）")
+    parser.add_argument("--failures", type=int, default=2, help="桩服务器开始时连续返回503的次数")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    received = []
+    server = start_server(args.latency, args.failures, received)
+    dispatcher = NotificationDispatcher(
+        os.path.join(workdir, "notifications.sqlite3"), channels(server.server_port),
+        batch_window=0.5, backoff_base=0.2, backoff_max=1,
+    )
+
+    start = time.perf_counter()
+    dispatcher.enqueue("大模型日报 (2025-03-03)", "正文1", batch_key="2025-03-03")
+    dispatcher.enqueue("凝血抗凝日报 (2025-03-03)", "正文2", batch_key="2025-03-03")
+    enqueue_ms = (time.perf_counter() - start) * 1000
+    print(f"加入队列耗时 {enqueue_ms:.1f} ms（接口延迟 {args.latency * 1000:.0f} ms）")
+
+    deadline = time.monotonic() + 30
+    while dispatcher.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    serverchan = [title for path, title in received if path.endswith(".send")]
+    webhook = [title for path, title in received if path == "/hook"]
+    print(f"{args.failures} 次失败后全部送达，耗时 {elapsed:.2f} 秒")
+    print(f"Server酱收到 {len(serverchan)} 条消息: {serverchan}")
+    print(f"Webhook收到 {len(webhook)} 条消息: {webhook}")
+    dispatcher.stop()
+
+    # 接口不可用时入队，然后重新创建队列并指向可用的接口
+    path = os.path.join(workdir, "restart.sqlite3")
+    down = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    down_port = down.server_port
+    down.server_close()
+    dispatcher = NotificationDispatcher(path, channels(down_port), batch_window=0, backoff_base=60)
+    dispatcher.enqueue("重启前的日报", "正文", batch_key="restart")
+    time.sleep(0.5)
+    dispatcher.stop()
+    print(f"接口不可用时退出，磁盘上待发送 {dispatcher.pending_count()} 条通知")
+
+    received.clear()
+    up = start_server(0, 0, received)
+    # 渠道名称不含端口的Server酱会继续发送；Webhook渠道地址变了，对应的通知保留在队列中
+    dispatcher = NotificationDispatcher(path, channels(up.server_port), batch_window=0, backoff_base=0.2)
+    # 上次的失败已进入退避等待，这里把等待时间提前以便演示
+    with dispatcher.lock:
+        dispatcher.conn.execute("UPDATE notifications SET next_attempt = 0")
+        dispatcher.conn.commit()
+    dispatcher.wakeup.set()
+    deadline = time.monotonic() + 10
+    while not received and time.monotonic() < deadline:
+        time.sleep(0.05)
+    print(f"重新创建队列后送达: {received}")
+    dispatcher.stop()
+
+
+if __name__ == "__main__":
+    main()
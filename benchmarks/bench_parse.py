@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+页面解析基准：在保存的HTML样例上比较各解析后端的单页解析+摘要提取耗时，
+并检查不同后端提取出的结果是否一致。
+
+用法: python benchmarks/bench_parse.py [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import html_parser
+import news_crawler
+from html_parser import StreamingSummaryParser
+
+FIXTURE_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+
+# 样例文件 -> 对应的解析函数
+CASES = [
+    ("sogou_search.html", lambda html: news_crawler.parse_wechat_search_results(html, "大模型")),
+    ("wechat_article.html", news_crawler.parse_wechat_article_summary),
+    ("baidu_article.html", news_crawler.parse_baidu_article_summary),
+    ("generic_article.html", news_crawler.parse_article_summary),
+]
+
+
+def normalize(result):
+    """把解析结果转换成可比较的形式"""
+    if isinstance(result, list):
+        return [(item.title, item.url, item.source, item.summary, item.heat_score) for item in result]
+    return result
+
+
+def time_case(func, html, repeat):
+    func(html)  # 预热，完成选择器编译
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(html)
+    return (time.perf_counter() - start) / repeat, result
+
+
+# 流式提取样例 -> (内容区选择器, 模式, 页面段落回退数)
+STREAMING_CASES = [
+    ("wechat_article.html", news_crawler.WECHAT_CONTENT_SELECTORS, "paragraphs", 0),
+    ("generic_article.html", news_crawler.ARTICLE_CONTENT_SELECTORS, "text", 5),
+]
+
+
+def stream_case(data, selectors, mode, page_paragraphs):
+    """按块喂给流式解析器，返回 (读取的字节数, 摘要)"""
+    parser = StreamingSummaryParser(selectors, mode=mode, page_paragraphs=page_paragraphs)
+    chunk_size = news_crawler.STREAM_CHUNK_SIZE
+    read = 0
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        read += len(chunk)
+        parser.feed(chunk.decode("utf-8", errors="replace"))
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return read, parser.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="页面解析基准")
+    parser.add_argument("--repeat", type=int, default=20, help="每个样例的重复次数")
+    args = parser.parse_args()
+
+    backends = [b for b in html_parser.BACKENDS if b != "lxml" or html_parser._lxml_available()]
+    # 基准中屏蔽解析函数的打印输出
+    devnull = open(os.devnull, "w")
+
+    print(f"{'样例':<24}{'大小':>10}" + "".join(f"{b + ' (ms)':>14}" for b in backends) + f"{'加速比':>10}  结果一致")
+    for filename, func in CASES:
+        with open(os.path.join(FIXTURE_DIR, filename), encoding="utf-8") as f:
+            html = f.read()
+        timings, results = [], []
+        for backend in backends:
+            html_parser.set_backend(backend)
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                elapsed, result = time_case(func, html, args.repeat)
+            finally:
+                sys.stdout = stdout
+            timings.append(elapsed)
+            results.append(normalize(result))
+        speedup = timings[-1] / timings[0] if len(timings) > 1 else 1.0
+        same = all(r == results[0] for r in results)
+        print(f"{filename:<24}{len(html.encode('utf-8')) // 1024:>8}KB"
+              + "".join(f"{t * 1000:>14.2f}" for t in timings)
+              + f"{speedup:>9.1f}x  {'是' if same else '否'}")
+
+    print()
+    print(f"{'流式提取样例':<20}{'读取/总大小':>16}{'耗时 (ms)':>12}  结果一致")
+    html_parser.set_backend(backends[0])
+    for filename, selectors, mode, page_paragraphs in STREAMING_CASES:
+        with open(os.path.join(FIXTURE_DIR, filename), "rb") as f:
+            data = f.read()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            read, summary = stream_case(data, selectors, mode, page_paragraphs)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        func = dict(CASES)[filename]
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            expected = func(data.decode("utf-8"))
+        finally:
+            sys.stdout = stdout
+        print(f"{filename:<24}{read // 1024:>6}KB/{len(data) // 1024:>4}KB{elapsed * 1000:>12.2f}  "
+              f"{'是' if summary == expected else '否'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+离线日报基准：在回放服务器（benchmarks/replay.py）上运行完整的 generate_daily_report，统计
+  - 端到端耗时（多次运行取最小值和中位数，每次使用全新的缓存目录）；
+  - 各类页面的单页解析耗时；
+  - 一次运行的Python内存峰值（tracemalloc）。
+可以把结果保存为JSON，并与之前保存的基线比较，超出容忍范围时以非零状态退出，用于发现性能回退。
+
+用法:
+  python benchmarks/bench_report.py [--recording DIR] [--repeat 3] [--latency 0.05] [--error-rate 0.1]
+  python benchmarks/bench_report.py --json baseline.json
+  python benchmarks/bench_report.py --baseline baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from replay import Recording, ReplayServer, build_fixture_recording, install_replay
+
+import news_crawler
+
+
+def page_parser(entry):
+    """按录制的URL判断页面类型，返回 (类型, 解析函数)，不是需要解析的页面时返回 None"""
+    if entry["status"] != 200 or "html" not in entry["headers"].get("Content-Type", "html"):
+        return None
+    parts = urlsplit(entry["url"])
+    host = parts.hostname or ""
+    if host.endswith("weixin.sogou.com") and parts.path == "/weixin":
+        return "sogou_search", lambda html: news_crawler.parse_wechat_search_results(html, "")
+    if host.endswith("weixin.sogou.com") or host == "mp.weixin.qq.com":
+        return "wechat_article", news_crawler.parse_wechat_article_summary
+    if host.endswith("baidu.com") and parts.path == "/s":
+        return "baidu_search", news_crawler.parse_baidu_news
+    if host.endswith("baidu.com"):
+        return "baidu_article", news_crawler.parse_baidu_article_summary
+    if host.endswith("sina.com.cn") and parts.path.rstrip("/") == "":
+        return "sina_search", news_crawler.parse_sina_news
+    return "generic_article", news_crawler.parse_article_summary
+
+
+def run_report(topic_id):
+    """在全新的日报目录中生成一次日报，返回 (耗时秒, 运行指标摘要)"""
+    news_crawler.DATA_DIR = tempfile.mkdtemp(prefix="bench-report-")
+    news_crawler._seen_index = None
+    news_crawler._seen_imported_on = None
+    news_crawler._report_store = None
+    start = time.perf_counter()
+    report_path = news_crawler.run_topic(topic_id)
+    elapsed = time.perf_counter() - start
+    if isinstance(report_path, list):
+        report_path = report_path[0]
+    summary = {}
+    if report_path:
+        with open(os.path.splitext(report_path)[0] + ".metrics.json", encoding="utf-8") as f:
+            summary = json.load(f)
+    return elapsed, summary
+
+
+def time_parsers(recording, repeat):
+    """各类页面的平均单页解析耗时（毫秒）"""
+    timings = {}
+    for entry in recording.entries:
+        parser = page_parser(entry)
+        if parser is None:
+            continue
+        kind, func = parser
+        html = recording.body(entry).decode("utf-8", errors="replace")
+        func(html)  # 预热
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func(html)
+        timings.setdefault(kind, []).append((time.perf_counter() - start) / repeat * 1000)
+    return {f"parse_ms.{kind}": round(statistics.mean(values), 3) for kind, values in sorted(timings.items())}
+
+
+def compare(results, baseline, tolerance):
+    """返回超出基线容忍范围的指标列表"""
+    regressions = []
+    for key, value in results.items():
+        base = baseline.get(key)
+        if isinstance(base, (int, float)) and base > 0 and value > base * (1 + tolerance):
+            regressions.append((key, base, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线日报基准")
+    parser.add_argument("--recording", help="录制目录，默认用HTML样例合成")
+    parser.add_argument("--topic", default="1", help="主题编号，all 为所有主题")
+    parser.add_argument("--repeat", type=int, default=3, help="端到端运行次数")
+    parser.add_argument("--parse-repeat", type=int, default=10, help="每个页面的解析次数")
+    parser.add_argument("--latency", type=float, default=0.05, help="回放服务器每个请求的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机附加延迟的上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回503的比例")
+    parser.add_argument("--rate", type=float, default=50.0, help="每个主机的请求速率（次/秒）")
+    parser.add_argument("--sources", default="wechat", help="启用的新闻来源，逗号分隔")
+    parser.add_argument("--json", help="把结果保存为JSON文件")
+    parser.add_argument("--baseline", help="与之前保存的JSON结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许比基线慢的比例")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording) if args.recording else build_fixture_recording()
+    server = ReplayServer(recording, args.latency, args.jitter, args.error_rate, seed=0).start()
+    news_crawler.SKIP_SEEN = False
+    news_crawler.configure_fetch(rate=args.rate, sources=args.sources.split(","))
+    install_replay(server.url)
+    # 与常驻模式一样预先加载分词词典，端到端耗时不含一次性的词典加载
+    if news_crawler.TAGGING:
+        news_crawler.tagging.get_jieba()
+    print(f"回放 {len(recording.entries)} 个响应，延迟 {args.latency * 1000:.0f} ms，错误率 {args.error_rate:.0%}")
+
+    runs = [run_report(args.topic) for _ in range(args.repeat)]
+    times = [elapsed for elapsed, _ in runs]
+    results = {
+        "e2e_seconds.min": round(min(times), 3),
+        "e2e_seconds.median": round(statistics.median(times), 3),
+    }
+
+    tracemalloc.start()
+    run_report(args.topic)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["peak_memory_mb"] = round(peak / 1024 / 1024, 2)
+    results.update(time_parsers(recording, args.parse_repeat))
+
+    print("\n结果:")
+    for key, value in results.items():
+        print(f"  {key:<32} {value}")
+    summary = runs[-1][1]
+    spans = summary.get("spans", {})
+    if spans:
+        print("\n最后一次运行中耗时最多的环节:")
+        for name, stats in sorted(spans.items(), key=lambda s: -s[1]["total_seconds"])[:8]:
+            print(f"  {name:<40} {stats['count']:>5} 次  {stats['total_seconds']:8.3f} s")
+    print(f"\n回放服务器: {server.stats}")
+    server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.json}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for key, base, value in regressions:
+            print(f"性能回退: {key} 基线 {base}，本次 {value}")
+        if regressions:
+            sys.exit(1)
+        print(f"与基线相比没有超过 {args.tolerance:.0%} 的回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+关键词并发搜索基准：用本地桩服务器模拟搜狗微信搜索，
+对比旧的串行+固定休眠方式与新的并发+按主机限速方式。
+
+两种方式使用相同的每主机请求速率，输出总耗时和实际观察到的请求间隔。
+
+用法: python benchmarks/bench_search_concurrency.py [--rate 2] [--latency 0.3]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import news_crawler
+from rate_limit import HostRateLimiter
+
+RESULT_PAGE = """<html><body><ul class="news-list">{items}</ul></body></html>"""
+RESULT_ITEM = """<li><h3><a href="/link?url={kw}{page}-{i}">{kw} 相关文章 {page}-{i}</a></h3>
+<p class="txt-info">关于{kw}的摘要内容 {page}-{i}</p><a class="account">测试公众号</a><span class="s2">{hours}小时前</span></li>"""
+
+
+def make_handler(latency, request_times):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            request_times.append(time.monotonic())
+            time.sleep(latency)
+            query = parse_qs(urlsplit(self.path).query)
+            keyword = query.get("query", [""])[0]
+            page = int(query.get("page", ["1"])[0])
+            # 越靠后的页面文章越旧
+            items = "".join(RESULT_ITEM.format(kw=keyword, page=page, i=i, hours=(page - 1) * 10 + i)
+                            for i in range(10))
+            body = RESULT_PAGE.format(items=items).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def min_interval(request_times):
+    """两次请求之间的最小间隔（秒）"""
+    times = sorted(request_times)
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    return min(gaps) if gaps else 0.0
+
+
+def run_serial(keywords, interval):
+    """旧方式：逐个关键词搜索，每次之后固定休眠"""
+    for keyword in keywords:
+        news_crawler.search_wechat_keyword(keyword)
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词并发搜索基准")
+    parser.add_argument("--rate", type=float, default=2.0, help="每主机请求速率（次/秒）")
+    parser.add_argument("--latency", type=float, default=0.3, help="桩服务器响应延迟（秒）")
+    parser.add_argument("--topic", default="2", help="使用的主题编号")
+    args = parser.parse_args()
+
+    request_times = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency, request_times))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    news_crawler.SOGOU_SEARCH_URL = f"http://127.0.0.1:{server.server_port}/weixin"
+    # 只比较第一页的抓取方式，翻页另行统计
+    news_crawler.MAX_PAGES = 1
+    # 桩服务器不会拦截请求，关闭自适应节流，两种方式都按固定速率请求
+    news_crawler.ADAPTIVE_THROTTLE = False
+    keywords = news_crawler.TOPICS[args.topic].keywords
+
+    # 旧方式使用与速率等价的固定间隔，不经过限速器
+    news_crawler.RATE_LIMITER = HostRateLimiter(default_rate=1e6, default_burst=1e6)
+    start = time.monotonic()
+    run_serial(keywords, 1.0 / args.rate)
+    serial_elapsed = time.monotonic() - start
+    serial_gap = min_interval(request_times)
+
+    request_times.clear()
+    news_crawler.RATE_LIMITER = HostRateLimiter(default_rate=args.rate, default_burst=1)
+    start = time.monotonic()
+    items = news_crawler.fetch_wechat_news(args.topic)
+    concurrent_elapsed = time.monotonic() - start
+    concurrent_gap = min_interval(request_times)
+
+    server.shutdown()
+
+    print()
+    print(f"关键词数: {len(keywords)}, 每主机速率: {args.rate} 次/秒, 响应延迟: {args.latency}s")
+    print(f"串行+固定休眠: {serial_elapsed:.2f}s, 最小请求间隔 {serial_gap:.2f}s")
+    print(f"并发+令牌桶:   {concurrent_elapsed:.2f}s, 最小请求间隔 {concurrent_gap:.2f}s, 文章数 {len(items)}")
+    print(f"加速比: {serial_elapsed / concurrent_elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准：在子进程中用 python -X importtime 运行 --help、--now、--schedule，
+统计进入实际工作之前的启动耗时和导入耗时最高的模块。
+
+--now 在子进程中把爬取替换为空操作；--schedule 完整执行常驻模式的启动（推送队列、分词词典预加载、
+创建调度器），在进入调度循环时退出。只测量启动部分，不访问网络；子进程在临时目录中运行，不写入日报目录。
+
+用法: python benchmarks/bench_startup.py [--repeat 5] [--top 8]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(ROOT)
+
+# 子进程中执行的代码：替换掉实际工作后调用命令行入口
+CHILD = """
+import sys
+sys.path.insert(0, {root!r})
+import news_crawler
+
+def stop(*args, **kwargs):
+    raise SystemExit(0)
+
+# --now 的所有路径（单主题、所有主题、流式流水线、分布式）都经过 run_topic
+news_crawler.run_topic = stop
+# --schedule 的启动工作都在进入调度循环之前
+news_crawler.Scheduler.run_forever = stop
+news_crawler.main({argv!r})
+"""
+
+COMMANDS = {
+    "--help": ["--help"],
+    "--now": ["--now"],
+    "--schedule": ["--schedule"],
+}
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run_child(argv):
+    """运行一次子进程，返回 (墙钟耗时秒, 导入耗时列表[(累计微秒, 模块名)])"""
+    code = CHILD.format(root=ROOT, argv=argv)
+    with tempfile.TemporaryDirectory() as cwd:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, cwd=cwd,
+        )
+        elapsed = time.perf_counter() - start
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        # 只统计顶层导入（缩进最少的行），避免重复计算
+        if match and len(match.group(3)) == 1:
+            imports.append((int(match.group(2)), match.group(4)))
+    return elapsed, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准")
+    parser.add_argument("--repeat", type=int, default=5, help="每个命令的运行次数，取最小值")
+    parser.add_argument("--top", type=int, default=8, help="列出导入耗时最高的模块数")
+    args = parser.parse_args()
+
+    for name, argv in COMMANDS.items():
+        runs = [run_child(argv) for _ in range(args.repeat)]
+        elapsed, imports = min(runs, key=lambda r: r[0])
+        total_import = sum(us for us, _ in imports) / 1000
+        print(f"{name:<12} 启动耗时 {elapsed * 1000:8.1f} ms，其中导入 {total_import:8.1f} ms")
+        for us, module in sorted(imports, reverse=True)[:args.top]:
+            print(f"    {us / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
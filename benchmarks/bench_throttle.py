@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+反爬自适应节流基准：用本地桩服务器模拟搜狗的反爬策略——最近 WINDOW 秒内的请求速率超过阈值时，
+在 PENALTY 秒内把所有搜索请求302跳转到 /antispider/ 验证码页。
+
+分别用固定速率（不节流）和AIMD自适应节流持续搜索同样时长，输出有效结果页数、被拦截次数、
+有效吞吐量以及节流器最终收敛到的速率。两种方式都从 --rate 的速率开始。
+
+用法: python benchmarks/bench_throttle.py [--threshold 3] [--rate 8] [--duration 30]
+"""
+
+import argparse
+import collections
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import news_crawler
+import throttle
+from rate_limit import HostRateLimiter
+
+# 统计请求速率的时间窗口和触发拦截后的封禁时间（秒）
+WINDOW = 2.0
+PENALTY = 3.0
+
+RESULT_PAGE = """<html><body><ul class="news-list">{items}</ul></body></html>"""
+RESULT_ITEM = """<li><h3><a href="/link?url={kw}-{i}">{kw} 相关文章 {i}</a></h3>
+<p class="txt-info">关于{kw}的摘要内容 {i}</p><a class="account">测试公众号</a><span class="s2">{i}小时前</span></li>"""
+CAPTCHA_PAGE = """<html><body><p>用户您好，我们的系统检测到您网络中存在异常访问请求。</p>
+<form id="seccodeForm"><img id="seccodeImage" src="/antispider/util/seccode.php"></form></body></html>"""
+
+
+class AntiSpiderServer:
+    """请求速率超过 threshold 次/秒时封禁一段时间的搜狗桩服务器"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.recent = collections.deque()
+        self.blocked_until = 0.0
+        self.stats = {"served": 0, "blocked": 0}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def _blocked(self):
+        now = time.monotonic()
+        with self.lock:
+            self.recent.append(now)
+            while self.recent and self.recent[0] < now - WINDOW:
+                self.recent.popleft()
+            if len(self.recent) > self.threshold * WINDOW:
+                self.blocked_until = now + PENALTY
+            blocked = now < self.blocked_until
+            self.stats["blocked" if blocked else "served"] += 1
+            return blocked
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path.startswith("/antispider/"):
+                    self._send(CAPTCHA_PAGE)
+                elif stub._blocked():
+                    self.send_response(302)
+                    self.send_header("Location", f"/antispider/?from={parts.path}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                else:
+                    keyword = parse_qs(parts.query).get("query", [""])[0]
+                    self._send(RESULT_PAGE.format(items="".join(
+                        RESULT_ITEM.format(kw=keyword, i=i) for i in range(10))))
+
+            def _send(self, html):
+                body = html.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def run(server, adaptive, rate, duration, workers):
+    """在 duration 秒内用 workers 个线程不断搜索新的关键词，返回 (有结果的页数, 被拦截次数, 最终速率)"""
+    server.recent.clear()
+    server.blocked_until = 0.0
+    server.stats.update(served=0, blocked=0)
+    news_crawler.DATA_DIR = tempfile.mkdtemp(prefix="bench-throttle-")
+    news_crawler.ADAPTIVE_THROTTLE = adaptive
+    news_crawler.RATE_LIMITER = HostRateLimiter(default_rate=rate, default_burst=1)
+    news_crawler._throttle = None
+    counter = iter(range(10 ** 9))
+    pages = []
+    deadline = time.monotonic() + duration
+
+    def loop():
+        while time.monotonic() < deadline:
+            items = news_crawler.search_wechat_keyword(f"关键词{next(counter)}")
+            pages.append(bool(items))
+
+    threads = [threading.Thread(target=loop) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    host = urlsplit(news_crawler.SOGOU_SEARCH_URL).netloc
+    final_rate = news_crawler.get_throttle().host_throttle(host).rate if adaptive else rate
+    news_crawler.save_throttle_state()
+    return sum(pages), server.stats["blocked"], final_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="反爬自适应节流基准")
+    parser.add_argument("--threshold", type=float, default=3.0, help="桩服务器开始拦截的请求速率（次/秒）")
+    parser.add_argument("--rate", type=float, default=8.0, help="初始请求速率（次/秒）")
+    parser.add_argument("--duration", type=float, default=30.0, help="每种方式的运行时间（秒）")
+    parser.add_argument("--workers", type=int, default=4, help="并发搜索线程数")
+    args = parser.parse_args()
+
+    # 按比例缩短拦截后的暂停时间，使基准在几十秒内收敛
+    throttle.BLOCK_COOLDOWN = 1
+    throttle.MAX_COOLDOWN = 8
+    throttle.INCREASE_STEP = 0.2
+    news_crawler.SEARCH_WORKERS = args.workers
+    news_crawler.MAX_BLOCK_RETRIES = 1
+    server = AntiSpiderServer(args.threshold).start()
+    news_crawler.SOGOU_SEARCH_URL = f"{server.url}/weixin"
+
+    print(f"桩服务器拦截阈值 {args.threshold} 次/秒，初始速率 {args.rate} 次/秒，每种方式运行 {args.duration} 秒\n")
+    results = {}
+    for label, adaptive in (("固定速率", False), ("自适应节流", True)):
+        results[label] = run(server, adaptive, args.rate, args.duration, args.workers)
+    server.stop()
+
+    print()
+    for label, (ok, blocked, rate) in results.items():
+        print(f"{label}: 有效结果页 {ok}（{ok / args.duration:.2f} 页/秒，阈值 {args.threshold}），"
+              f"被拦截 {blocked} 次，最终速率 {rate:.2f} 次/秒")
+
+
+if __name__ == "__main__":
+    main()
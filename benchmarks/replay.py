@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+录制/回放工具：把真实请求的响应录制成样例，再由本地HTTP服务器回放，离线运行整个爬取流程。
+
+录制：python benchmarks/replay.py record --out benchmarks/recordings/2025-03-03 [--topic 1]
+      联网运行一次日报生成，把所有响应（含重定向）保存到目录中（index.json + 响应体文件）。
+回放：python benchmarks/replay.py serve --recording DIR [--latency 0.2 --error-rate 0.1]
+      启动本地回放服务器；基准脚本中用 install_replay() 把共享HTTP客户端的所有请求转发到回放服务器。
+
+回放服务器可以注入固定延迟、随机抖动和随机错误（默认返回503），用于评估慢速或不稳定的来源。
+没有录制时，build_fixture_recording() 用 benchmarks/fixtures/ 下的HTML样例合成一份搜狗微信的录制。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURE_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+INDEX_FILE = "index.json"
+# 原始URL通过这个请求头传给回放服务器
+REPLAY_HEADER = "X-Replay-URL"
+# 回放时保留的响应头
+KEPT_HEADERS = ("Content-Type", "Location", "ETag", "Last-Modified")
+
+
+class Recording:
+    """一组录制的响应：按 (方法, 主机, 路径) 索引，查询参数是请求参数子集的条目视为匹配，参数多的优先"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.entries = []
+        self.index = {}
+        path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for entry in json.load(f):
+                    self._index(entry)
+
+    @staticmethod
+    def _route(method, url):
+        parts = urlsplit(url)
+        return (method.upper(), (parts.hostname or "").lower(), parts.path or "/"), dict(parse_qsl(parts.query))
+
+    def _index(self, entry):
+        route, params = self._route(entry["method"], entry["url"])
+        self.entries.append(entry)
+        candidates = self.index.setdefault(route, [])
+        candidates.append((params, entry))
+        candidates.sort(key=lambda c: len(c[0]), reverse=True)
+
+    def add(self, method, url, status, headers, body):
+        """保存一条响应，同一URL重复录制时保留第一次的结果"""
+        route, params = self._route(method, url)
+        if any(p == params for p, _ in self.index.get(route, ())):
+            return
+        name = hashlib.sha1(f"{method} {url}".encode("utf-8")).hexdigest()[:16] + ".body"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(body)
+        self._index({
+            "method": method.upper(),
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k in KEPT_HEADERS},
+            "body": name,
+        })
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+
+    def find(self, method, url):
+        route, params = self._route(method, url)
+        for recorded, entry in self.index.get(route, ()):
+            if all(params.get(k) == v for k, v in recorded.items()):
+                return entry
+        return None
+
+    def body(self, entry):
+        with open(os.path.join(self.directory, entry["body"]), "rb") as f:
+            return f.read()
+
+
+class ReplayServer:
+    """本地回放服务器，支持延迟、抖动和错误注入"""
+
+    def __init__(self, recording, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, seed=None):
+        self.recording = recording
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "misses": 0}
+        self.bodies = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def _handler(self):
+        replay = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            def _serve(self):
+                url = self.headers.get(REPLAY_HEADER) or self.path
+                with replay.lock:
+                    replay.stats["requests"] += 1
+                    delay = replay.latency + replay.random.uniform(0, replay.jitter)
+                    fail = replay.random.random() < replay.error_rate
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    with replay.lock:
+                        replay.stats["errors"] += 1
+                    self.send_response(replay.error_status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                entry = replay.recording.find(self.command, url)
+                if entry is None:
+                    with replay.lock:
+                        replay.stats["misses"] += 1
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = replay.body(entry)
+                self.send_response(entry["status"])
+                for name, value in entry["headers"].items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
+
+    def body(self, entry):
+        body = self.bodies.get(entry["body"])
+        if body is None:
+            body = self.bodies[entry["body"]] = self.recording.body(entry)
+        return body
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="replay", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _replay_adapter_class():
+    from requests.adapters import HTTPAdapter
+
+    class ReplayAdapter(HTTPAdapter):
+        """把请求改发到回放服务器，原始URL放在请求头中，响应的URL仍为原始URL（重定向按原始URL解析）"""
+
+        def __init__(self, server_url, **kwargs):
+            super().__init__(**kwargs)
+            self.server_url = server_url
+
+        def send(self, request, **kwargs):
+            original = request.url
+            request.headers[REPLAY_HEADER] = original
+            request.url = self.server_url + "/replay"
+            try:
+                response = super().send(request, **kwargs)
+            finally:
+                request.url = original
+            response.url = original
+            return response
+
+    return ReplayAdapter
+
+
+def install_replay(server_url, client=None):
+    """让共享HTTP客户端（或指定客户端）的所有请求都发到回放服务器，保留原有的连接池和重试配置"""
+    from http_client import get_client
+
+    client = client or get_client()
+    current = client.session.get_adapter("https://")
+    adapter = _replay_adapter_class()(
+        server_url,
+        pool_connections=current._pool_connections,
+        pool_maxsize=current._pool_maxsize,
+        max_retries=current.max_retries,
+    )
+    client.session.mount("http://", adapter)
+    client.session.mount("https://", adapter)
+    return client
+
+
+def install_recorder(recording, client=None):
+    """录制共享HTTP客户端收到的所有响应（包括重定向中间的响应）"""
+    from http_client import get_client
+
+    client = client or get_client()
+
+    def record(response, *args, **kwargs):
+        # 读取响应体会把流式响应也完整下载下来，之后 iter_content 从内存中读取
+        recording.add(response.request.method, response.url, response.status_code,
+                      response.headers, response.content)
+
+    client.session.hooks["response"].append(record)
+    return client
+
+
+def build_fixture_recording(directory=None, topic_ids=None, pages=None):
+    """
+    用HTML样例合成一份录制：每个主题关键词的每一页搜索结果都用搜狗样例（链接按关键词和页码改写，避免被去重），
+    搜索页摘要被改短，入选日报的文章都会抓取原文；所有文章链接都返回微信文章样例。返回 Recording。
+    """
+    import news_crawler
+
+    directory = directory or tempfile.mkdtemp(prefix="replay-")
+    recording = Recording(directory)
+    with open(os.path.join(FIXTURE_DIR, "sogou_search.html"), encoding="utf-8") as f:
+        search_html = f.read()
+    with open(os.path.join(FIXTURE_DIR, "wechat_article.html"), "rb") as f:
+        article = f.read()
+
+    topic_ids = topic_ids or list(news_crawler.TOPICS)
+    pages = pages or news_crawler.MAX_PAGES
+    keywords = dict.fromkeys(k for t in topic_ids for k in news_crawler.TOPICS[t].keywords)
+    search = urlsplit(news_crawler.SOGOU_SEARCH_URL)
+    links = set()
+    for n, keyword in enumerate(keywords):
+        for page in range(1, pages + 1):
+            marker = f"k{n}p{page}"
+            html = re.sub(r"(/link\?url=[\w-]+)", rf"\1{marker}", search_html)
+            # 标题也改写，避免不同关键词的结果被按标题去重
+            html = re.sub(r"(<h3>\s*<a[^>]*>)", rf"\1[{marker}] ", html)
+            # 搜索页摘要改短，使日报入选的文章都需要抓取原文补全摘要
+            html = re.sub(r'(<p class="txt-info">)[^<]*', r"\1摘要", html)
+            links.update(re.findall(r'href="(/link\?[^"]+)"', html))
+            params = {"query": keyword}
+            if page > 1:
+                params["page"] = str(page)
+            url = f"{search.scheme}://{search.netloc}{search.path}?{urlencode(params)}"
+            recording.add("GET", url, 200, {"Content-Type": "text/html; charset=utf-8"}, html.encode("utf-8"))
+    # 文章链接只按路径匹配（参数子集为空），所有跳转链接都返回同一篇微信文章
+    recording.add("GET", f"{search.scheme}://{search.netloc}/link", 200,
+                  {"Content-Type": "text/html; charset=utf-8"}, article)
+    recording.save()
+    return recording
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制/回放工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="联网运行一次日报生成并录制所有响应")
+    record.add_argument("--out", required=True, help="录制目录")
+    record.add_argument("--topic", default="1", help="主题编号，all 为所有主题")
+
+    serve = sub.add_parser("serve", help="启动回放服务器")
+    serve.add_argument("--recording", help="录制目录，默认用HTML样例合成")
+    serve.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    serve.add_argument("--jitter", type=float, default=0.0, help="随机附加延迟的上限（秒）")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="随机返回错误的比例")
+    serve.add_argument("--error-status", type=int, default=503, help="注入错误时返回的状态码")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        import news_crawler
+
+        recording = Recording(args.out)
+        install_recorder(recording)
+        news_crawler.DATA_DIR = tempfile.mkdtemp(prefix="record-")
+        news_crawler.SKIP_SEEN = False
+        news_crawler.run_topic(args.topic)
+        recording.save()
+        print(f"已录制 {len(recording.entries)} 个响应到 {args.out}")
+        return
+
+    recording = Recording(args.recording) if args.recording else build_fixture_recording()
+    server = ReplayServer(recording, args.latency, args.jitter, args.error_rate, args.error_status).start()
+    print(f"回放服务器: {server.url}（{len(recording.entries)} 个响应，原始URL放在 {REPLAY_HEADER} 请求头中）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""基于SQLite的持久化缓存：按规范化URL缓存文章页面和摘要，支持TTL、LRU淘汰（页面按总大小、摘要按有效期）和ETag/Last-Modified条件请求"""
+
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from metrics import METRICS
+
+# 缓存有效期（秒），过期后使用条件请求重新验证
+DEFAULT_TTL = 3 * 24 * 3600
+# 缓存总大小上限（字节），超出后按最近访问时间淘汰
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# 摘要表每写入这么多条，删除一次过期的摘要（过期摘要不会再被使用）
+SUMMARY_PURGE_EVERY = 100
+
+# 所有主机通用的跟踪参数（另外 utm_ 开头的参数也去掉），规范化时去掉
+TRACKING_PARAMS = {"spm"}
+# 只在特定主机上去掉的跟踪参数：from、version 等在其他网站上可能决定页面内容
+HOST_TRACKING_PARAMS = {
+    "mp.weixin.qq.com": {
+        "scene", "chksm", "srcid", "sharer_sharetime", "sharer_shareid", "from",
+        "isappinstalled", "clicktime", "enterid", "ascene", "devicetype",
+        "version", "pass_ticket", "wx_header", "exportkey",
+    },
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """规范化URL：小写协议和主机、去掉默认端口、片段和（通用的及该主机已知的）跟踪参数、查询参数排序"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    hostname = (parts.hostname or "").lower()
+    host = hostname
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    host_params = HOST_TRACKING_PARAMS.get(hostname, ())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and k not in host_params and not k.startswith("utm_")
+    ]
+    query.sort()
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class CachedResponse:
+    """从缓存构造的响应，接口与 requests.Response 中用到的部分一致"""
+
+    def __init__(self, url, content, status_code=200):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.encoding = "utf-8"
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class HttpCache:
+    """线程安全的SQLite缓存"""
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        import sqlite3
+
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_accessed ON pages(accessed_at);
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS summaries_created ON summaries(created_at);
+        """)
+        self.summary_writes = 0
+        with self.lock:
+            self._purge_summaries()
+            self.conn.commit()
+
+    def get_page(self, url):
+        """返回 (body, etag, last_modified, 是否仍在有效期内)，未缓存时返回 None"""
+        key = normalize_url(url)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+        body, etag, last_modified, fetched_at = row
+        return body, etag, last_modified, now - fetched_at < self.ttl
+
+    def put_page(self, url, body, etag=None, last_modified=None):
+        key = normalize_url(url)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now, now, len(body)),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def refresh_page(self, url):
+        """条件请求返回304后，重置缓存的有效期"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, normalize_url(url)),
+            )
+            self.conn.commit()
+
+    def _evict(self):
+        """超出大小上限时按最近访问时间淘汰，调用方需持有锁"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM pages ORDER BY accessed_at"
+        ).fetchall():
+            self.conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get_summary(self, url):
+        """返回有效期内缓存的摘要，没有时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?", (normalize_url(url),)
+            ).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+        return row[0]
+
+    def put_summary(self, url, summary):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)",
+                (normalize_url(url), summary, time.time()),
+            )
+            self.summary_writes += 1
+            if self.summary_writes % SUMMARY_PURGE_EVERY == 0:
+                self._purge_summaries()
+            self.conn.commit()
+
+    def _purge_summaries(self):
+        """删除超过有效期的摘要（打开缓存时和定期写入时），调用方需持有锁"""
+        self.conn.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - self.ttl,))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def cached_get(cache, client, url, **kwargs):
+    """
+    带缓存的GET：有效期内直接返回缓存，过期时带上ETag/Last-Modified重新验证。
+    stream=True 时不读取响应体，200 响应不自动写入缓存：调用方完整读取后用 cache.put_page 保存
+    （提前断开连接时只下载了部分页面，不能缓存）
+    """
+    entry = cache.get_page(url)
+    if entry is not None:
+        body, etag, last_modified, fresh = entry
+        if fresh:
+            METRICS.incr("cache_pages", result="hit")
+            return CachedResponse(url, body)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        kwargs["headers"] = headers
+
+    response = client.get(url, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        METRICS.incr("cache_pages", result="revalidated")
+        response.close()
+        cache.refresh_page(url)
+        return CachedResponse(url, entry[0])
+    METRICS.incr("cache_pages", result="miss")
+    if response.status_code == 200 and not kwargs.get("stream"):
+        cache.put_page(url, response.content,
+                       response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return response
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path):
+    """获取指定路径的共享缓存实例"""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = HttpCache(path)
+            _caches[path] = cache
+        return cache
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+大规模候选新闻的列式存储与Top-K选择。
+
+候选新闻按列保存（文本字段为列表，热度为 array('d')），避免每条新闻一个对象的开销；
+热度可以整列批量调整（安装了 NumPy 时使用向量化计算），排名使用堆选择前K条而不是全量排序。
+"""
+
+import heapq
+from array import array
+
+# 热度分数上限
+HEAT_MAX = 100
+
+_numpy = None
+
+
+def get_numpy():
+    """NumPy 是可选依赖，且导入较慢，第一次用到时才导入；未安装时返回 None"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _heat_value(value):
+    """整数热度保持为 int，与逐条计算的结果格式一致"""
+    return int(value) if float(value).is_integer() else value
+
+
+def top_k(news_items, k):
+    """按热度取前k条，热度相同时保持原有顺序（与稳定排序后切片的结果一致）"""
+    if isinstance(news_items, CandidateStore):
+        return news_items.top_k(k)
+    return heapq.nlargest(k, news_items, key=lambda item: item.heat_score)
+
+
+class CandidateStore:
+    """列式候选新闻存储"""
+
+    FIELDS = ("title", "url", "source", "date", "summary", "tags")
+
+    def __init__(self, news_items=()):
+        self.columns = {field: [] for field in self.FIELDS}
+        self.heat = array("d")
+        self.item_class = None
+        self.extend(news_items)
+
+    def add(self, item):
+        if self.item_class is None:
+            self.item_class = type(item)
+        for field, column in self.columns.items():
+            column.append(getattr(item, field))
+        self.heat.append(item.heat_score)
+
+    def extend(self, news_items):
+        for item in news_items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.heat)
+
+    def item(self, index):
+        """把第 index 条候选还原为 NewsItem"""
+        fields = {field: column[index] for field, column in self.columns.items()}
+        return self.item_class(heat_score=_heat_value(self.heat[index]), **fields)
+
+    def __iter__(self):
+        return (self.item(i) for i in range(len(self)))
+
+    def heat_view(self):
+        """
+        返回热度列的副本：有 NumPy 时为 ndarray，否则为 array。
+        不返回共享内存的视图：调用方持有视图期间 add() 扩容热度列会抛出 BufferError
+        """
+        np = get_numpy()
+        if np is not None:
+            return np.array(self.heat, dtype=np.float64)
+        return array("d", self.heat)
+
+    def add_heat(self, bonus, cap=HEAT_MAX):
+        """
+        整列调整热度：bonus 为标量或与候选等长的序列，加分后不超过 cap（原本已超过 cap 的保持不变），
+        与逐条计算的 news_crawler.add_heat 结果相同
+        """
+        np = get_numpy()
+        if np is not None and len(self.heat):
+            view = np.frombuffer(self.heat, dtype=np.float64)
+            limit = np.maximum(view, cap)
+            view += np.asarray(bonus, dtype=np.float64)
+            np.minimum(view, limit, out=view)
+            return
+        if isinstance(bonus, (int, float)):
+            bonus = [bonus] * len(self.heat)
+        for i, value in enumerate(bonus):
+            heat = self.heat[i]
+            self.heat[i] = min(heat + value, max(heat, cap))
+
+    def top_indices(self, k):
+        """热度最高的k条候选的下标，热度相同时下标小的在前"""
+        k = min(k, len(self.heat))
+        if k <= 0:
+            return []
+        np = get_numpy()
+        if np is not None and len(self.heat) > 4 * k:
+            view = np.frombuffer(self.heat, dtype=np.float64)
+            # 先用 partition 找出第k大的热度作为门槛，再对门槛以上的候选按 (热度降序, 下标升序) 排序保证与稳定排序一致
+            threshold = np.partition(view, len(view) - k)[len(view) - k]
+            candidates = np.nonzero(view >= threshold)[0]
+            order = np.lexsort((candidates, -view[candidates]))
+            return [int(i) for i in candidates[order][:k]]
+        return heapq.nlargest(k, range(len(self.heat)), key=self.heat.__getitem__)
+
+    def top_k(self, k):
+        return [self.item(i) for i in self.top_indices(k)]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+新闻去重索引：规范化URL和标题哈希做精确去重，SimHash做近似重复检测。
+
+SimHash 的64位指纹被分成若干段建立分桶索引，海明距离不超过阈值的两条新闻
+至少有一段完全相同，因此每条新闻只需比较少量同桶候选，整体去重是线性的。
+"""
+
+import hashlib
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from cache import normalize_url
+
+SIMHASH_BITS = 64
+# 海明距离阈值，不超过该值视为近似重复
+SIMHASH_THRESHOLD = 3
+# 分段数需大于阈值，保证近似重复的指纹至少有一段相同
+SIMHASH_BANDS = 4
+
+# 搜狗跳转链接中与文章无关的参数（随搜索词、会话变化）
+SOGOU_LINK_VOLATILE_PARAMS = {"type", "query", "k", "h"}
+# 微信文章链接中唯一确定一篇文章的参数
+WECHAT_ARTICLE_PARAMS = ("__biz", "mid", "idx", "sn")
+
+_PUNCTUATION = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def canonical_article_url(url):
+    """文章URL的规范形式：搜狗跳转链接去掉搜索相关参数，微信文章只保留标识参数"""
+    if not url:
+        return ""
+    parts = urlsplit(normalize_url(url))
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if parts.netloc.endswith("weixin.sogou.com") and parts.path == "/link":
+        params = [(k, v) for k, v in params if k not in SOGOU_LINK_VOLATILE_PARAMS]
+    elif parts.netloc == "mp.weixin.qq.com" and parts.path == "/s":
+        kept = [(k, v) for k, v in params if k in WECHAT_ARTICLE_PARAMS]
+        if kept:
+            params = kept
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ""))
+
+
+def normalize_title(title):
+    """标题规范化：全角转半角、转小写、去掉空白和标点"""
+    if not title:
+        return ""
+    return _PUNCTUATION.sub("", unicodedata.normalize("NFKC", title).lower())
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# 统计每一位出现1的次数时，每一位占用一个16位的计数槽，所有槽放在一个大整数里一起累加
+_LANE_BITS = 16
+# 每个字节的8位展开到8个计数槽后的值
+_BYTE_LANES = [
+    sum(1 << (j * _LANE_BITS) for j in range(8) if b >> j & 1) for b in range(256)
+]
+# 参与计算的最大字符数，保证计数不会溢出计数槽
+SIMHASH_MAX_CHARS = 4096
+
+
+def simhash(text):
+    """以字符二元组为特征计算64位SimHash指纹"""
+    text = normalize_title(text)[:SIMHASH_MAX_CHARS]
+    if not text:
+        return 0
+    shingles = {text[i:i + 2] for i in range(max(len(text) - 1, 1))}
+    counts = 0
+    for shingle in shingles:
+        h = _hash64(shingle)
+        for byte in range(8):
+            counts += _BYTE_LANES[h >> (byte * 8) & 0xFF] << (byte * 8 * _LANE_BITS)
+    mask = (1 << _LANE_BITS) - 1
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        # 超过半数特征在该位为1时，指纹的该位为1
+        if ((counts >> (bit * _LANE_BITS)) & mask) * 2 > len(shingles):
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class DedupIndex:
+    """新闻去重索引，每条新闻的插入和查询都是常数时间"""
+
+    def __init__(self, threshold=SIMHASH_THRESHOLD, bands=SIMHASH_BANDS):
+        if bands <= threshold:
+            raise ValueError("bands 必须大于 threshold")
+        self.threshold = threshold
+        self.bands = bands
+        self.band_bits = SIMHASH_BITS // bands
+        self.representatives = []
+        self.cluster_sizes = []
+        self.url_index = {}
+        self.title_index = {}
+        self.band_index = [{} for _ in range(bands)]
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (i * self.band_bits)) & mask for i in range(self.bands)]
+
+    @staticmethod
+    def keys(item):
+        """计算新闻的 (规范化URL, 规范化标题, SimHash指纹)"""
+        return (
+            canonical_article_url(item.url),
+            normalize_title(item.title),
+            simhash(f"{item.title or ''}{item.summary or ''}"),
+        )
+
+    def find(self, item, keys=None):
+        """返回与 item 重复的已收录新闻的序号，没有重复时返回 None"""
+        url_key, title_key, fingerprint = keys or self.keys(item)
+        if url_key and url_key in self.url_index:
+            return self.url_index[url_key]
+        if title_key and title_key in self.title_index:
+            return self.title_index[title_key]
+        if not fingerprint:
+            return None
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            for index, candidate in self.band_index[band].get(key, ()):
+                if hamming(fingerprint, candidate) <= self.threshold:
+                    return index
+        return None
+
+    def add(self, item):
+        """
+        加入一条新闻，是新新闻时返回 True。
+        重复时保留热度更高的一条作为代表，返回 False。
+        """
+        keys = self.keys(item)
+        index = self.find(item, keys)
+        if index is not None:
+            self.cluster_sizes[index] += 1
+            if item.heat_score > self.representatives[index].heat_score:
+                self.representatives[index] = item
+                self._index(keys, index)
+            return False
+        index = len(self.representatives)
+        self.representatives.append(item)
+        self.cluster_sizes.append(1)
+        self._index(keys, index)
+        return True
+
+    def _index(self, keys, index):
+        url_key, title_key, fingerprint = keys
+        if url_key:
+            self.url_index.setdefault(url_key, index)
+        if title_key:
+            self.title_index.setdefault(title_key, index)
+        if fingerprint:
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                self.band_index[band].setdefault(key, []).append((index, fingerprint))
+
+    def items(self):
+        """按首次出现的顺序返回各个去重后的代表新闻"""
+        return list(self.representatives)
+
+    def __len__(self):
+        return len(self.representatives)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HTML解析抽象层。
+
+默认使用 lxml（C实现的解析器，CSS选择器预编译为XPath），
+未安装 lxml/cssselect 时回退到 BeautifulSoup 的 html.parser。
+选择器通过 compile_selector 预编译一次，之后在每个页面上重复使用。
+"""
+
+import copy
+import functools
+import re
+import threading
+from html.parser import HTMLParser
+
+# 可用的解析后端，按优先级排列
+BACKENDS = ("lxml", "bs4")
+
+
+def _lxml_available():
+    try:
+        import lxml.html  # noqa: F401
+        import cssselect  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# 默认后端在首次解析时才确定，避免导入本模块时就加载 lxml
+_default_backend = None
+
+
+def get_backend():
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = "lxml" if _lxml_available() else "bs4"
+    return _default_backend
+
+
+def set_backend(name):
+    """切换默认解析后端，lxml 不可用时抛出 ValueError"""
+    global _default_backend
+    if name not in BACKENDS:
+        raise ValueError(f"未知的解析后端: {name}")
+    if name == "lxml" and not _lxml_available():
+        raise ValueError("未安装 lxml 或 cssselect，无法使用 lxml 后端")
+    _default_backend = name
+
+
+class Selector:
+    """预编译的CSS选择器，各后端的编译结果在首次使用时生成并缓存"""
+
+    def __init__(self, css):
+        self.css = css
+        # lxml 的XPath对象不能跨线程共享，按线程分别编译
+        self._local = threading.local()
+        self._soupsieve = None
+
+    def xpath(self):
+        compiled = getattr(self._local, "xpath", None)
+        if compiled is None:
+            from lxml.cssselect import CSSSelector
+            compiled = self._local.xpath = CSSSelector(self.css, translator="html")
+        return compiled
+
+    def soupsieve(self):
+        if self._soupsieve is None:
+            import soupsieve
+            self._soupsieve = soupsieve.compile(self.css)
+        return self._soupsieve
+
+    def __repr__(self):
+        return f"Selector({self.css!r})"
+
+
+@functools.lru_cache(maxsize=None)
+def _compile(css):
+    return Selector(css)
+
+
+def compile_selector(css):
+    """预编译单个CSS选择器，相同的选择器字符串只编译一次"""
+    return css if isinstance(css, Selector) else _compile(css)
+
+
+def compile_selectors(css_list):
+    """按顺序预编译一组备选选择器"""
+    return tuple(compile_selector(css) for css in css_list)
+
+
+class LxmlNode:
+    """lxml 元素的包装"""
+
+    def __init__(self, element):
+        self.element = element
+
+    def select(self, selector):
+        return [LxmlNode(e) for e in compile_selector(selector).xpath()(self.element)]
+
+    def select_one(self, selector):
+        matches = compile_selector(selector).xpath()(self.element)
+        return LxmlNode(matches[0]) if matches else None
+
+    def get_text(self, strip=False):
+        # 使用 text() 节点而不是 itertext，与 BeautifulSoup 一样不包含注释内容
+        texts = _text_xpath()(self.element)
+        if strip:
+            return "".join(t.strip() for t in texts)
+        return "".join(texts)
+
+    def get(self, attr, default=None):
+        return self.element.get(attr, default)
+
+    def remove(self, selector):
+        """删除匹配的所有子元素，保留其后的文本"""
+        for e in compile_selector(selector).xpath()(self.element):
+            if e is not self.element and e.getparent() is not None:
+                e.drop_tree()
+
+    def copy(self):
+        return LxmlNode(copy.deepcopy(self.element))
+
+
+_xpaths = threading.local()
+
+
+def _text_xpath():
+    compiled = getattr(_xpaths, "text", None)
+    if compiled is None:
+        from lxml import etree
+        compiled = _xpaths.text = etree.XPath(".//text()")
+    return compiled
+
+
+class SoupNode:
+    """BeautifulSoup 元素的包装"""
+
+    def __init__(self, tag):
+        self.element = tag
+
+    def select(self, selector):
+        return [SoupNode(t) for t in compile_selector(selector).soupsieve().select(self.element)]
+
+    def select_one(self, selector):
+        tag = compile_selector(selector).soupsieve().select_one(self.element)
+        return SoupNode(tag) if tag is not None else None
+
+    def get_text(self, strip=False):
+        return self.element.get_text(strip=strip)
+
+    def get(self, attr, default=None):
+        return self.element.get(attr, default)
+
+    def remove(self, selector):
+        for t in compile_selector(selector).soupsieve().select(self.element):
+            t.decompose()
+
+    def copy(self):
+        return SoupNode(copy.copy(self.element))
+
+
+def select_first(node, selectors):
+    """按优先级依次尝试备选选择器，返回第一个匹配的元素"""
+    for selector in selectors:
+        found = node.select_one(selector)
+        if found is not None:
+            return found
+    return None
+
+
+def parse_html(html, backend=None):
+    """解析HTML文本，返回文档根节点的包装对象"""
+    backend = backend or get_backend()
+    if backend == "lxml":
+        import lxml.html
+        if not html or not html.strip():
+            html = "<html></html>"
+        # 带编码声明的字符串 lxml 无法直接解析，转成字节交给解析器
+        return LxmlNode(lxml.html.document_fromstring(html.encode("utf-8"),
+                                                      parser=_utf8_parser()))
+    from bs4 import BeautifulSoup
+    return SoupNode(BeautifulSoup(html, "html.parser"))
+
+
+_parsers = threading.local()
+
+
+def _utf8_parser():
+    """每个线程使用独立的 lxml 解析器实例"""
+    parser = getattr(_parsers, "parser", None)
+    if parser is None:
+        import lxml.html
+        parser = _parsers.parser = lxml.html.HTMLParser(encoding="utf-8")
+    return parser
+
+
+# 没有结束标签的空元素
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+# 内容会被忽略的元素
+SKIPPED_ELEMENTS = {"script", "style"}
+
+
+def parse_simple_selector(css):
+    """把 tag、#id、.class、tag.class 形式的简单选择器解析为 (tag, id, classes)"""
+    css = css.css if isinstance(css, Selector) else css
+    match = re.fullmatch(r"([a-zA-Z][a-zA-Z0-9]*)?(#[\w-]+)?((?:\.[\w-]+)*)", css.strip())
+    if not match or not any(match.groups()):
+        raise ValueError(f"流式解析只支持简单选择器: {css}")
+    tag, id_, classes = match.groups()
+    return (
+        tag.lower() if tag else None,
+        id_[1:] if id_ else None,
+        frozenset(c for c in classes.split(".") if c),
+    )
+
+
+class StreamingSummaryParser(HTMLParser):
+    """
+    增量解析HTML并提取摘要，收集到足够的内容后 done 变为 True，调用方即可停止下载。
+
+    containers 为按优先级排列的内容区选择器（只支持简单选择器），mode 决定摘要来源：
+    "paragraphs" 取内容区内前几个足够长的段落，没有段落时取内容区文本；
+    "text" 取内容区的全部文本。两种模式都在内容区为空时使用整个页面的前几个段落。
+    """
+
+    def __init__(self, containers, mode="paragraphs", max_paragraphs=3,
+                 min_paragraph_len=10, max_chars=200, page_paragraphs=5):
+        super().__init__(convert_charrefs=True)
+        self.specs = [parse_simple_selector(c) for c in containers]
+        self.mode = mode
+        self.max_paragraphs = max_paragraphs
+        self.min_paragraph_len = min_paragraph_len
+        self.max_chars = max_chars
+        self.page_paragraphs = page_paragraphs
+
+        self.stack = []
+        # 每个选择器首次匹配的内容区在栈中的深度，未进入时为 None，结束后为 -1
+        self.container_depth = [None] * len(self.specs)
+        self.paragraphs = [[] for _ in self.specs]
+        self.texts = [[] for _ in self.specs]
+        self.text_lengths = [0] * len(self.specs)
+        self.page_paragraph_texts = []
+        self.paragraph_depth = None
+        self.paragraph_parts = []
+        self.skip_depth = None
+        self.done = False
+
+    def _matches(self, spec, tag, attrs):
+        spec_tag, spec_id, spec_classes = spec
+        if spec_tag and spec_tag != tag:
+            return False
+        attrs = dict(attrs)
+        if spec_id and attrs.get("id") != spec_id:
+            return False
+        if spec_classes and not spec_classes <= set((attrs.get("class") or "").split()):
+            return False
+        return True
+
+    def _open_containers(self):
+        return [i for i, depth in enumerate(self.container_depth) if depth is not None and depth >= 0]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        depth = len(self.stack)
+        if tag in SKIPPED_ELEMENTS and self.skip_depth is None:
+            self.skip_depth = depth
+        for i, spec in enumerate(self.specs):
+            if self.container_depth[i] is None and self._matches(spec, tag, attrs):
+                self.container_depth[i] = depth
+        if tag == "p" and self.paragraph_depth is None:
+            self.paragraph_depth = depth
+            self.paragraph_parts = []
+
+    def handle_startendtag(self, tag, attrs):
+        # <p/> 之类的自闭合写法不产生内容
+        pass
+
+    def handle_endtag(self, tag):
+        if tag not in self.stack:
+            return
+        # 容错处理：弹出到匹配的开始标签为止
+        while self.stack:
+            depth = len(self.stack)
+            if self.paragraph_depth == depth:
+                self._finish_paragraph()
+            if self.skip_depth == depth:
+                self.skip_depth = None
+            for i, container in enumerate(self.container_depth):
+                if container == depth:
+                    self.container_depth[i] = -1
+            if self.stack.pop() == tag:
+                break
+        self._check_done()
+
+    def handle_data(self, data):
+        if self.skip_depth is not None:
+            return
+        text = data.strip()
+        if not text:
+            return
+        if self.paragraph_depth is not None:
+            self.paragraph_parts.append(text)
+        for i in self._open_containers():
+            # 内容区文本只需要保留到能判断是否超过上限的长度
+            if self.text_lengths[i] <= self.max_chars:
+                self.texts[i].append(text)
+                self.text_lengths[i] += len(text)
+
+    def _finish_paragraph(self):
+        text = "".join(self.paragraph_parts)
+        self.paragraph_depth = None
+        self.paragraph_parts = []
+        if len(self.page_paragraph_texts) < self.page_paragraphs:
+            self.page_paragraph_texts.append(text)
+        if len(text) <= self.min_paragraph_len:
+            return
+        for i in self._open_containers():
+            if len(self.paragraphs[i]) < self.max_paragraphs:
+                self.paragraphs[i].append(text)
+
+    def _check_done(self):
+        # 只有最高优先级的内容区内容足够时才能提前结束，否则低优先级的结果可能被后文覆盖
+        if self.done or self.container_depth[0] is None:
+            return
+        if self.mode == "paragraphs":
+            paragraphs = self.paragraphs[0]
+            self.done = (len(paragraphs) >= self.max_paragraphs
+                         or len(" ".join(paragraphs)) > self.max_chars)
+        else:
+            self.done = self.text_lengths[0] > self.max_chars
+
+    def _truncate(self, text):
+        if len(text) > self.max_chars:
+            return text[:self.max_chars] + "..."
+        return text
+
+    def summary(self):
+        """按优先级返回摘要，提取不到时返回 None"""
+        for i, depth in enumerate(self.container_depth):
+            if depth is None:
+                continue
+            if self.mode == "paragraphs" and self.paragraphs[i]:
+                return self._truncate(" ".join(self.paragraphs[i]))
+            text = "".join(self.texts[i])
+            if text:
+                return self._truncate(text)
+        text = " ".join(self.page_paragraph_texts)
+        if text:
+            return self._truncate(text)
+        return None
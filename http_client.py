@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""共享的HTTP客户端：按主机复用长连接、失败重试、压缩解码以及请求耗时回调"""
+
+import threading
+import time
+
+# 连接池配置：缓存的主机连接池数量以及每个主机的最大连接数
+POOL_CONNECTIONS = 20
+POOL_SIZE = 10
+
+# 重试配置：对5xx按指数退避重试。429是限流拦截，不在传输层重试，
+# 直接交给调用方（自适应节流第一次被拦截就减速，推送队列按自己的退避重试）
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS = (500, 502, 503, 504)
+
+# 默认超时（秒）
+DEFAULT_TIMEOUT = 10
+
+
+def supported_encodings():
+    """返回可以解码的压缩格式，安装了brotli时才声明br"""
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append("br")
+        except ImportError:
+            pass
+    return ", ".join(encodings)
+
+
+class HttpClient:
+    """基于 requests.Session 的客户端，同一主机的请求复用连接"""
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_size=POOL_SIZE,
+                 retries=RETRIES, backoff_factor=BACKOFF_FACTOR, timeout=DEFAULT_TIMEOUT):
+        # requests 导入较慢，只在真正创建客户端时导入
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.timing_hooks = []
+        self.session = requests.Session()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = supported_encodings()
+
+    def add_timing_hook(self, hook):
+        """
+        注册请求耗时回调，hook(method, url, status_code, elapsed, size, retries)，
+        失败时 status_code 为 None；retries 为自动重试的次数
+        """
+        self.timing_hooks.append(hook)
+
+    def _notify(self, method, url, status_code, elapsed, size, retries=0):
+        for hook in self.timing_hooks:
+            try:
+                hook(method, url, status_code, elapsed, size, retries)
+            except Exception as e:
+                print(f"请求耗时回调出错: {e}")
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            self._notify(method, url, None, time.monotonic() - start, 0)
+            raise
+        # 非流式请求此时响应体已读完，耗时包含下载时间；流式请求的字节数由调用方统计
+        size = 0 if kwargs.get("stream") else len(response.content)
+        retry_state = getattr(response.raw, "retries", None)
+        retries = len(retry_state.history) if retry_state is not None else 0
+        self._notify(method, url, response.status_code, time.monotonic() - start, size, retries)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+# 共享客户端的请求回调，客户端尚未创建时先记下，创建时再注册
+_shared_hooks = []
+
+
+def get_client():
+    """获取进程内共享的HTTP客户端"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                client = HttpClient()
+                client.timing_hooks.extend(_shared_hooks)
+                _client = client
+    return _client
+
+
+def add_shared_timing_hook(hook):
+    """为共享客户端注册请求耗时回调，不会因此提前创建客户端（导入 requests）"""
+    with _client_lock:
+        _shared_hooks.append(hook)
+        if _client is not None:
+            _client.add_timing_hook(hook)
+
+
+def configure_client(**kwargs):
+    """按新参数重建共享客户端，参数同 HttpClient"""
+    global _client
+    with _client_lock:
+        old, _client = _client, HttpClient(**kwargs)
+        _client.timing_hooks = list(old.timing_hooks if old is not None else _shared_hooks)
+    if old is not None:
+        old.close()
+    return _client
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+预编译的关键词匹配与发布时间解析。
+
+关键词列表编译成一个正则，一次扫描即可得到文本中出现的所有关键词，
+与对每个关键词分别做 `keyword in text` 的结果相同，但耗时不随关键词数量线性增长。
+"""
+
+import functools
+import re
+from datetime import datetime
+
+
+class KeywordMatcher:
+    """把一组关键词编译成单个正则的匹配器"""
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+        if self.keywords:
+            # 长的关键词排在前面，同一位置优先匹配最长的关键词
+            alternation = "|".join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+            # 零宽前瞻让每个位置都参与匹配，重叠出现的关键词不会被跳过
+            self.pattern = re.compile(f"(?=({alternation}))")
+        else:
+            self.pattern = None
+        # 同一位置上较短的关键词一定是最长匹配的前缀，预先算好每个关键词包含的前缀关键词
+        keyword_set = set(self.keywords)
+        self.prefixes = {
+            k: frozenset(k[:i] for i in range(1, len(k) + 1) if k[:i] in keyword_set)
+            for k in self.keywords
+        }
+
+    def matches(self, text):
+        """返回 text 中出现的所有关键词"""
+        if not text or self.pattern is None:
+            return set()
+        found = set()
+        for match in self.pattern.finditer(text):
+            found |= self.prefixes[match.group(1)]
+        return found
+
+    def count(self, text):
+        """text 中出现的不同关键词个数"""
+        return len(self.matches(text))
+
+    def search(self, text):
+        """text 中是否出现任意一个关键词"""
+        return bool(text) and self.pattern is not None and self.pattern.search(text) is not None
+
+
+@functools.lru_cache(maxsize=256)
+def get_keyword_matcher(keywords):
+    """按关键词元组缓存编译好的匹配器"""
+    return KeywordMatcher(keywords)
+
+
+# 发布时间格式
+HOURS_AGO = re.compile(r"(\d+)\s*小时前")
+MINUTES_AGO = re.compile(r"(\d+)\s*分钟前")
+DAYS_AGO = re.compile(r"(\d+)\s*天前")
+JUST_NOW = re.compile(r"刚刚")
+MONTH_DAY = re.compile(r"(\d{1,2})月(\d{1,2})日")
+FULL_DATE = re.compile(r"(\d{4})[-年/](\d{1,2})[-月/](\d{1,2})")
+# 搜狗搜索结果中的时间是脚本 timeConvert('1700000000')
+TIMESTAMP = re.compile(r"timeConvert\('(\d{9,11})'\)")
+
+
+def parse_pub_time(pub_time, now=None):
+    """
+    解析发布时间，返回 ("hours", 小时数) 或 ("days", 天数)，无法解析时（包括“2月30日”这样不存在的日期）返回 None。
+    支持“N小时前”“N分钟前”“N天前”“刚刚”“M月D日”“YYYY-MM-DD”和搜狗的时间戳脚本。
+    """
+    if not pub_time:
+        return None
+    now = now or datetime.now()
+    match = HOURS_AGO.search(pub_time)
+    if match:
+        return "hours", int(match.group(1))
+    match = MINUTES_AGO.search(pub_time)
+    if match:
+        return "hours", round(int(match.group(1)) / 60, 1)
+    match = DAYS_AGO.search(pub_time)
+    if match:
+        return "days", int(match.group(1))
+    if JUST_NOW.search(pub_time):
+        return "hours", 0
+    try:
+        return _parse_date(pub_time, now)
+    except (ValueError, OverflowError, OSError):
+        # 不存在的日期（如“2月30日”、去年没有的“2月29日”）或超出范围的时间戳
+        return None
+
+
+def _parse_date(pub_time, now):
+    """解析时间戳和日期，日期不存在时抛出 ValueError"""
+    match = TIMESTAMP.search(pub_time)
+    if match:
+        hours = max((now - datetime.fromtimestamp(int(match.group(1)))).total_seconds() / 3600, 0)
+        return ("hours", int(hours)) if hours < 24 else ("days", int(hours // 24))
+    match = FULL_DATE.search(pub_time)
+    if match:
+        year, month, day = (int(g) for g in match.groups())
+        return "days", max((now - datetime(year, month, day)).days, 0)
+    match = MONTH_DAY.search(pub_time)
+    if match:
+        month, day = (int(g) for g in match.groups())
+        pub_date = datetime(now.year, month, day)
+        if pub_date > now:
+            # 没有年份的日期晚于今天，说明是去年发布的
+            pub_date = pub_date.replace(year=now.year - 1)
+        return "days", (now - pub_date).days
+    return None
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+运行指标：热点路径的耗时（span）、下载字节数、缓存命中和重试次数。
+
+指标在进程内累计，每次生成日报时取开始和结束时的差值写成JSON摘要；
+常驻模式下可以启动一个Prometheus文本格式的 /metrics 接口。
+"""
+
+import contextlib
+import functools
+import threading
+import time
+from urllib.parse import urlsplit
+
+# 指标名前缀（Prometheus）
+PREFIX = "news_crawler_"
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_key(key):
+    """(name, labels) -> name{k=v,...}，用作JSON摘要中的键"""
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+class Metrics:
+    """线程安全的计数器和耗时统计"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        # (name, labels) -> [次数, 总耗时, 最长耗时]
+        self.spans = {}
+
+    def incr(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            stats = self.spans.get(key)
+            if stats is None:
+                self.spans[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    @contextlib.contextmanager
+    def span(self, name, **labels):
+        """统计一段代码的耗时，出错时同样计入"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """统计函数耗时的装饰器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters), {key: list(stats) for key, stats in self.spans.items()}
+
+    def summary(self, since=None):
+        """
+        返回可序列化为JSON的摘要；since 为之前的 snapshot() 时只统计其后的部分。
+        差值中的最长耗时取自进程累计值，仅供参考。
+        """
+        counters, spans = self.snapshot()
+        base_counters, base_spans = since or ({}, {})
+        result = {"counters": {}, "spans": {}}
+        for key, value in sorted(counters.items()):
+            value -= base_counters.get(key, 0)
+            if value:
+                result["counters"][_format_key(key)] = value
+        for key, (count, total, longest) in sorted(spans.items()):
+            base = base_spans.get(key, [0, 0.0, 0.0])
+            count -= base[0]
+            total -= base[1]
+            if count:
+                result["spans"][_format_key(key)] = {
+                    "count": count,
+                    "total_seconds": round(total, 6),
+                    "avg_seconds": round(total / count, 6),
+                    "max_seconds": round(longest, 6),
+                }
+        return result
+
+    def prometheus(self):
+        """Prometheus 文本格式：计数器为 *_total，耗时为 *_seconds_count/_sum/_max"""
+        counters, spans = self.snapshot()
+        lines = []
+
+        def labels_text(labels):
+            if not labels:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in labels)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+        for (name, labels), value in sorted(counters.items()):
+            lines.append(f"{PREFIX}{name}_total{labels_text(labels)} {value}")
+        for (name, labels), (count, total, longest) in sorted(spans.items()):
+            metric = PREFIX + name.replace(".", "_") + "_seconds"
+            lines.append(f"{metric}_count{labels_text(labels)} {count}")
+            lines.append(f"{metric}_sum{labels_text(labels)} {total:.6f}")
+            lines.append(f"{metric}_max{labels_text(labels)} {longest:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+# 进程内共享的指标
+METRICS = Metrics()
+
+
+def record_http(method, url, status_code, elapsed, size, retries=0):
+    """HttpClient 的请求回调：按主机统计请求数、错误数、字节数、重试次数和耗时"""
+    host = urlsplit(url).hostname or ""
+    METRICS.incr("http_requests", host=host)
+    METRICS.observe("http.request", elapsed, host=host)
+    if status_code is None or status_code >= 400:
+        METRICS.incr("http_errors", host=host)
+    if size:
+        METRICS.incr("http_bytes", size, host=host)
+    if retries:
+        METRICS.incr("http_retries", retries, host=host)
+
+
+def start_metrics_server(port, host="127.0.0.1", metrics=METRICS):
+    """在后台线程中启动 /metrics 接口，返回 server"""
+    # 只有常驻模式开启指标接口时才需要，不在启动时导入
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
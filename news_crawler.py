@@ -2,26 +2,45 @@
 # -*- coding: utf-8 -*-
 
 import os
-import csv
 import time
 import datetime
-import requests
 import random
-from bs4 import BeautifulSoup
-import jieba.analyse
-import schedule
-import nltk
 import json
-import re
-from urllib.parse import quote, urljoin
+from urllib.parse import urljoin, urlsplit
 import argparse
+import codecs
+import functools
+import heapq
+import socket
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
 
-# 确保nltk数据包已下载
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+from cache import cached_get, get_cache
+from candidates import HEAT_MAX, CandidateStore, top_k
+from dedup import DedupIndex, canonical_article_url, normalize_title
+import html_parser
+from html_parser import StreamingSummaryParser, compile_selectors, parse_html
+from http_client import add_shared_timing_hook, get_client, configure_client
+from matcher import get_keyword_matcher, parse_pub_time
+from metrics import METRICS, record_http, start_metrics_server
+from notify import NotificationDispatcher, ServerChanChannel, WeComChannel, WebhookChannel
+from rate_limit import HostRateLimiter, SharedHostRateLimiter
+from report_render import RENDERERS, atomic_open, build_records, render_markdown, write_report
+from report_store import ReportStore, import_csv_reports
+from scheduler import Job, Scheduler
+from seen import SeenIndex
+from pipeline import EventStream, RemainingBound, TopKTracker
+from sources import DEFAULT_SOURCE_TIMEOUT, SOURCES, SourceError, enabled_sources, register_source, search_sources, set_enabled_sources
+import tagging
+from tagging import tag_texts
+from throttle import ThrottleController, detect_block
+from topics import TopicRegistry
+from work_queue import TaskQueue
+
+# 注意：jieba、requests、lxml 等较重的依赖只在用到的函数中导入，
+# 保证 --help 等命令启动迅速，且导入模块时不会访问网络或创建目录
 
 # 定义请求头列表，避免被反爬
 USER_AGENTS = [
@@ -33,506 +52,1152 @@ USER_AGENTS = [
 
 # 定义保存日报的目录
 DATA_DIR = "daily_reports"
-os.makedirs(DATA_DIR, exist_ok=True)
 
 # 定义超时设置，避免爬虫卡住
 TIMEOUT = 10
 
-# 定义可用的主题
-TOPICS = {
-    "1": {
-        "name": "大模型",
-        "keywords": ["大模型", "GPT", "人工智能", "AI大模型", "AIGC", "LLM", "生成式AI"],
-        "report_name": "大模型日报"
-    },
-    "2": {
-        "name": "凝血抗凝",
-        "keywords": ["凝血", "抗凝", "血栓", "抗凝药", "华法林", "肝素", "血小板", "凝血因子", "抗血栓"],
-        "report_name": "凝血抗凝日报"
-    }
+# 搜狗微信搜索地址
+SOGOU_SEARCH_URL = "https://weixin.sogou.com/weixin"
+
+# 每个关键词最多抓取的搜索结果页数，以及搜狗每页的结果数
+MAX_PAGES = 3
+SOGOU_PAGE_SIZE = 10
+
+# 百度新闻、新浪新闻搜索地址
+BAIDU_NEWS_URL = "https://www.baidu.com/s"
+SINA_NEWS_URL = "https://search.sina.com.cn/"
+
+# 百度、新浪新闻未指定主题关键词时，标题加分使用的关键词
+DEFAULT_TITLE_KEYWORDS = ["ChatGPT", "GPT", "大模型", "人工智能", "AI", "大语言模型", "LLM"]
+
+# 关键词并发搜索的线程数
+SEARCH_WORKERS = 4
+
+# 每个主机的请求速率（次/秒），替代原来每个关键词之后3-5秒的固定休眠
+HOST_RATE = 0.25
+HOST_BURST = 1
+
+# 反爬自适应节流：识别搜狗的验证码页和 antispider 跳转，按主机用AIMD调整请求速率和并发数，
+# 学到的速率、Cookie、User-Agent和长期无结果的关键词保存在日报目录下的状态文件中（见 throttle.py）
+ADAPTIVE_THROTTLE = True
+THROTTLE_STATE_FILE = "throttle_state.json"
+# 自适应节流的速率上限（次/秒），--rate 设置了更高的速率时以 --rate 为准
+THROTTLE_MAX_RATE = 2.0
+# 同一关键词的一页被拦截后最多重试的次数，仍被拦截时本次运行不再搜索该关键词
+MAX_BLOCK_RETRIES = 2
+# 搜狗微信来源的超时按请求数除以速率估算，再乘以这个余量（被拦截后的暂停、请求本身的耗时）
+WECHAT_TIMEOUT_MARGIN = 1.5
+
+# 摘要补全的并发数与总时限（秒），超时的条目保留搜索页摘要
+ENRICH_WORKERS = 5
+ENRICH_DEADLINE = 20
+
+# 流式流水线：搜索结果边到达边去重、评分，一定会入选日报的文章在其余关键词搜索期间就开始补全摘要；
+# 最终排名仍在全部结果上进行，与关闭时的日报内容相同。整页结果未到达前很少有文章能确定入选，
+# 只补全确定入选的文章时 benchmarks/bench_pipeline.py 上只快4%~6%，默认关闭（--streaming 开启）
+STREAMING_PIPELINE = False
+# 还有整页搜索结果未到达时很难确定哪些文章一定入选。设为正数时，所有关键词都返回第一页后，
+# 每个主题最多再提前补全这么多篇当前排名靠前的文章（同时不超过前K名中尚未确定的名额；未入选的抓取结果仍写入缓存）。
+# 微信文章经搜狗的跳转链接抓取，提前补全会增加对搜狗的请求，默认只补全一定入选的文章
+SPECULATIVE_ENRICH = 0
+
+# 流式提取摘要：边下载边解析，拿到足够的段落后立即停止下载剩余页面
+STREAMING_SUMMARY = True
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# 文章页面和摘要缓存文件，保存在日报目录下
+CACHE_FILE = "cache.sqlite3"
+
+# 关键词标签：对全部候选新闻批量分词提取关键词，并按主题相关度（TF-IDF）加分，
+# 加分上限为主题配置中的 weights.relevance_bonus（默认10分）
+TAGGING = True
+TAG_TOP_N = 5
+
+# 往期日报中已报道文章的索引文件；SKIP_SEEN 为 True 时跳过往期日报已报道过的文章
+SEEN_FILE = "seen.sqlite3"
+SKIP_SEEN = True
+
+# 日报历史库文件，每份日报在写CSV的同时写入该库，便于按日期范围、来源、关键词查询
+REPORT_DB_FILE = "reports.sqlite3"
+
+# 分布式爬取：DISTRIBUTED 为 True 时 --now/--schedule 以协调进程方式运行，
+# 把关键词搜索和文章摘要作为任务放入队列，由工作进程（--worker）领取执行，所有进程共享按主机限速。
+# 队列默认在日报目录下，多台机器时用 --queue 指向共享路径
+DISTRIBUTED = False
+WORK_QUEUE_FILE = "work_queue.sqlite3"
+WORK_QUEUE_PATH = None
+# 协调进程等待搜索任务完成的最长时间（秒），超时后用已完成的结果生成日报
+QUEUE_WAIT_TIMEOUT = 30 * 60
+# 协调进程等待时是否也领取任务执行（没有工作进程时也能完成）
+COORDINATOR_WORKS = True
+# 每个工作进程同时执行的任务数，以及没有任务时的最长轮询间隔（秒）
+WORKER_THREADS = 4
+WORKER_POLL_INTERVAL = 1
+# 队列中任务的保留时间（秒）
+QUEUE_RETENTION = 7 * 24 * 3600
+
+# 表示摘要提取失败的返回值，这些结果不写入缓存
+SUMMARY_FAILURES = {
+    "无法获取文章摘要", "获取摘要时出错",
+    "无法获取百度文章内容", "未能从百度文章中提取到摘要", "提取百度文章摘要时出错",
+    "无法提取微信文章摘要", "提取微信文章摘要时出错",
 }
 
+# 全局按主机限速器，所有线程共享同一份礼貌配额
+RATE_LIMITER = HostRateLimiter(default_rate=HOST_RATE, default_burst=HOST_BURST)
+
+# 所有HTTP请求计入运行指标（请求数、字节数、重试次数、耗时）
+add_shared_timing_hook(record_http)
+
+# 主题配置目录：每个主题一个 JSON/YAML 文件（格式见 topics.py），常驻模式下修改后自动重新加载
+TOPIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topics")
+# 常驻模式检查主题配置变化的间隔（秒）
+TOPIC_RELOAD_INTERVAL = 10
+
+# 主题编号 -> TopicPlan，在新闻来源注册之后由 reload_topics() 加载；重新加载时整体替换
+TOPICS = {}
+
 # 默认主题
 DEFAULT_TOPIC = "1"
 
+# 日报中保留的新闻条数
+TOP_N = 10
+
+# 热度标尺（所有来源相同，最高 HEAT_MAX 分）：基础分，标题含有关键词时的加分，另有时间衰减分数（最多15分）
+BASE_HEAT = 50
+TITLE_HEAT = 15
+
+# 日报输出格式（report_render.RENDERERS 中的格式名），CSV 总会写出，往期已报道索引和历史库导入都读取CSV
+REPORT_FORMATS = ("csv", "jsonl", "md", "html")
+
+# 表示一次爬取所有主题的特殊主题编号
+ALL_TOPICS = "all"
+# 任务配置中表示“每个主题按各自配置的运行时间分别调度”的特殊主题编号
+EACH_TOPIC = "each"
+
+# 定时运行：默认每天的运行时间、同时运行的任务数、单个任务的超时时间（秒）和调度状态文件
+SCHEDULE_TIMES = ["08:00"]
+SCHEDULER_WORKERS = 2
+JOB_TIMEOUT = 60 * 60
+SCHEDULER_STATE_FILE = "scheduler_state.json"
+# 常驻模式下Prometheus指标接口的端口，None 表示不启动
+METRICS_PORT = None
+
 # Server酱配置 (需要自行注册Server酱并设置SCKEY)
 # 获取方式：登录 https://sct.ftqq.com/ 获取
 SERVERCHAN_SEND_KEY = ""  # 在这里填入您的SendKey
 
+# 其他推送渠道：企业微信群机器人和通用Webhook地址
+WECOM_WEBHOOKS = []
+NOTIFY_WEBHOOKS = []
+
+# 推送队列文件；立即运行模式结束前最多等待推送完成的时间（秒），未发送的通知下次运行时继续发送
+NOTIFY_FILE = "notifications.sqlite3"
+NOTIFY_FLUSH_TIMEOUT = 60
+
 class NewsItem:
-    def __init__(self, title, url, source, date, summary=None, heat_score=0):
+    # 使用 __slots__ 省去每个实例的 __dict__，大量候选新闻时显著节省内存
+    __slots__ = ("title", "url", "source", "date", "summary", "heat_score", "tags")
+    
+    def __init__(self, title, url, source, date, summary=None, heat_score=0, tags=None):
         self.title = title
         self.url = url
         self.source = source
         self.date = date
         self.summary = summary
         self.heat_score = heat_score
+        self.tags = tags
     
     def __str__(self):
         return f"{self.title} - {self.source} - {self.date}"
+    
+    def to_dict(self):
+        """转换为可序列化为JSON的字典（分布式爬取时在进程间传递）"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, fields):
+        return cls(**fields)
+
+def get_article_cache():
+    """获取文章页面和摘要的持久化缓存"""
+    return get_cache(os.path.join(DATA_DIR, CACHE_FILE))
+
+_throttle = None
+_throttle_session = None
+
+def get_throttle():
+    """获取反爬自适应节流器，并把上次保存的Cookie加入共享HTTP客户端的会话"""
+    global _throttle, _throttle_session
+    if _throttle is None:
+        _throttle = ThrottleController(
+            os.path.join(DATA_DIR, THROTTLE_STATE_FILE), RATE_LIMITER, USER_AGENTS,
+            max_rate=THROTTLE_MAX_RATE, max_concurrency=SEARCH_WORKERS,
+        )
+    session = get_client().session
+    if session is not _throttle_session:
+        # 第一次使用，或连接池参数变化后客户端被重建
+        _throttle.load_cookies(session)
+        _throttle_session = session
+    return _throttle
+
+def save_throttle_state():
+    """保存节流器学到的速率、Cookie和关键词状态"""
+    if _throttle is not None:
+        _throttle.save(get_client().session)
+
+_seen_index = None
+# 上次导入往期日报时的日期
+_seen_imported_on = None
+
+def get_seen_index(today):
+    """
+    获取往期日报已报道文章的索引。每个进程每天只扫描一次日报目录导入新增的日报：
+    只跳过今天以前的日报中的文章，同一天内生成的日报不影响结果
+    """
+    global _seen_index, _seen_imported_on
+    if _seen_index is None:
+        _seen_index = SeenIndex(os.path.join(DATA_DIR, SEEN_FILE))
+    if _seen_imported_on != today:
+        _seen_index.import_reports(DATA_DIR)
+        _seen_imported_on = today
+    return _seen_index
+
+_report_store = None
+
+def get_report_store():
+    """获取日报历史库"""
+    global _report_store
+    if _report_store is None:
+        _report_store = ReportStore(os.path.join(DATA_DIR, REPORT_DB_FILE))
+    return _report_store
+
+def import_reports():
+    """把日报目录下已有的CSV日报导入历史库"""
+    count = import_csv_reports(get_report_store(), DATA_DIR)
+    print(f"已导入 {count} 份日报到 {os.path.join(DATA_DIR, REPORT_DB_FILE)}")
+    return count
+
+def filter_seen_news(news_items, today, topic):
+    """去掉该主题往期（今天以前）日报中已报道过的文章，今天重复生成日报时结果不变"""
+    index = get_seen_index(today)
+    fresh = []
+    for item in news_items:
+        first_date = index.first_seen(item.url, item.title, topic.report_name)
+        if first_date is None or first_date >= today:
+            fresh.append(item)
+    skipped = len(news_items) - len(fresh)
+    if skipped:
+        print(f"跳过 {skipped} 篇往期日报已报道的文章")
+    return fresh
+
+def cached_summary(func):
+    """摘要缓存装饰器：已摘要过的文章直接返回缓存结果，跳过网络请求和解析"""
+    @functools.wraps(func)
+    def wrapper(url):
+        cache = get_article_cache()
+        summary = cache.get_summary(url)
+        if summary:
+            METRICS.incr("cache_summaries", result="hit")
+            return summary
+        METRICS.incr("cache_summaries", result="miss")
+        summary = func(url)
+        if summary and summary not in SUMMARY_FAILURES:
+            cache.put_summary(url, summary)
+        return summary
+    return wrapper
 
 def get_random_headers():
     """获取随机请求头，避免被反爬"""
     return {"User-Agent": random.choice(USER_AGENTS)}
 
-def fetch_baidu_news():
-    """从百度新闻获取大模型相关新闻"""
-    news_items = []
-    
+def stream_article_summary(url, headers, selectors, mode, page_paragraphs=5):
+    """
+    流式下载并解析文章页面，内容足够时断开连接不再下载剩余部分，返回 (状态码, 摘要)。
+    经过页面缓存：有效期内的页面直接从缓存解析，过期的页面带ETag/Last-Modified条件请求；
+    只有完整读取的页面才写入缓存，提前断开的页面只缓存摘要
+    """
+    cache = get_article_cache()
+    response = cached_get(cache, get_client(), url, headers=headers, timeout=TIMEOUT, stream=True)
+    cached = getattr(response, "from_cache", False)
     try:
-        url = "https://www.baidu.com/s?rtt=1&bsst=1&cl=2&tn=news&word=大模型"
-        response = requests.get(url, headers=get_random_headers(), timeout=TIMEOUT)
-        response.encoding = 'utf-8'
-        
         if response.status_code != 200:
-            print(f"百度新闻请求失败: {response.status_code}")
-            return news_items
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        news_divs = soup.select(".result")  # 修改选择器，适应百度搜索结果的实际CSS类名
+            return response.status_code, None
         
-        if not news_divs:
-            news_divs = soup.select(".result-op")  # 尝试备选选择器
+        parser = StreamingSummaryParser(selectors, mode=mode, page_paragraphs=page_paragraphs)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        host = urlsplit(url).hostname or ""
+        chunks = []
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            if not cached:
+                METRICS.incr("http_bytes", len(chunk), host=host)
+                chunks.append(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                break
+        else:
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+            if not cached:
+                cache.put_page(url, b"".join(chunks),
+                               response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.status_code, parser.summary()
+    finally:
+        response.close()
+
+# 百度新闻搜索结果中摘要的备选选择器（预编译）
+BAIDU_SUMMARY_SELECTORS = compile_selectors([
+    ".c-summary", ".news-summary", ".content-right_8Zs40",
+    ".c-span-last", ".c-color-text", "p", ".c-gap-top-small"
+])
+
+def calculate_news_heat(date_str, title, title_keywords=None):
+    """
+    计算百度、新浪新闻的热度分数，与微信文章（calculate_wechat_heat）使用同一标尺，
+    多个来源合并排名时可以直接比较：基础分 + 标题含有主题关键词时的加分 + 时间衰减分数
+    """
+    matcher = get_keyword_matcher(tuple(title_keywords or DEFAULT_TITLE_KEYWORDS))
+    title_score = TITLE_HEAT if matcher.search(title) else 0
+    # “今天 HH:MM”之类的时间按当天发布计分
+    time_score = pub_time_score(date_str) or (pub_time_score("0天前") if "今天" in (date_str or "") else 0)
+    return min(BASE_HEAT + title_score + time_score, HEAT_MAX)
+
+def parse_baidu_news(html, title_keywords=None):
+    """解析百度新闻搜索结果页，返回新闻列表"""
+    news_items = []
+    soup = parse_html(html)
+    news_divs = soup.select(".result")  # 修改选择器，适应百度搜索结果的实际CSS类名
+    
+    if not news_divs:
+        news_divs = soup.select(".result-op")  # 尝试备选选择器
+    
+    if not news_divs:
+        print("无法找到新闻内容，可能需要更新CSS选择器")
+        return news_items
         
-        if not news_divs:
-            print("无法找到新闻内容，可能需要更新CSS选择器")
-            return news_items
+    for div in news_divs:
+        try:
+            title_elem = div.select_one("h3 a") or div.select_one("a.news-title")
+            if not title_elem:
+                continue
             
-        for div in news_divs:
-            try:
-                title_elem = div.select_one("h3 a") or div.select_one("a.news-title")
-                if not title_elem:
-                    continue
-                
-                title = title_elem.get_text().strip()
-                news_url = title_elem.get("href", "")
-                
-                source_time = ""
-                source_elem = div.select_one(".c-author") or div.select_one(".news-source")
-                if source_elem:
-                    source_time = source_elem.get_text().strip()
-                
-                parts = source_time.split("  ")
-                source = parts[0] if parts else "百度新闻"
-                # 清理来源字段中可能的多余字符
-                source = source.strip().rstrip(',')
-                date_str = parts[1] if len(parts) > 1 else "今天"
-                
-                # 获取摘要 - 尝试多种选择器
-                summary = None
-                summary_selectors = [
-                    ".c-summary", ".news-summary", ".content-right_8Zs40",
-                    ".c-span-last", ".c-color-text", "p", ".c-gap-top-small"
-                ]
-                
-                for selector in summary_selectors:
-                    summary_elem = div.select_one(selector)
-                    if summary_elem:
-                        summary_text = summary_elem.get_text(strip=True)
-                        if summary_text and len(summary_text) > 20:  # 确保摘要有足够的长度
-                            summary = summary_text
-                            break
-                
-                # 如果还是没有找到摘要，尝试获取div内的所有文本
-                if not summary:
-                    # 移除标题和来源元素
-                    content_div = div.copy()
-                    for elem in content_div.select("h3, .c-author, .news-source"):
-                        if elem:
-                            elem.decompose()
-                    
-                    # 获取剩余文本作为摘要
-                    div_text = content_div.get_text(strip=True)
-                    if div_text and len(div_text) > 20:
-                        summary = div_text
-                
-                # 如果还是没有摘要，使用标题作为默认摘要
-                if not summary:
-                    summary = f"关于'{title}'的新闻"
-                
-                # 计算热度分数 (这里使用简单的评估方法，可以根据需要改进)
-                heat_score = 0
-                if "今天" in date_str:
-                    heat_score += 50
-                elif "小时" in date_str:
-                    heat_score += 30
-                elif "分钟" in date_str:
-                    heat_score += 40
-                else:
-                    heat_score += 10
-                    
-                # 添加标题权重
-                keywords = ["ChatGPT", "GPT", "大模型", "人工智能", "AI", "大语言模型", "LLM"]
-                for keyword in keywords:
-                    if keyword in title:
-                        heat_score += 20
+            title = title_elem.get_text().strip()
+            news_url = title_elem.get("href", "")
+            
+            source_time = ""
+            source_elem = div.select_one(".c-author") or div.select_one(".news-source")
+            if source_elem:
+                source_time = source_elem.get_text().strip()
+            
+            parts = source_time.split("  ")
+            source = parts[0] if parts else "百度新闻"
+            # 清理来源字段中可能的多余字符
+            source = source.strip().rstrip(',')
+            date_str = parts[1] if len(parts) > 1 else "今天"
+            
+            # 获取摘要 - 尝试多种选择器
+            summary = None
+            for selector in BAIDU_SUMMARY_SELECTORS:
+                summary_elem = div.select_one(selector)
+                if summary_elem:
+                    summary_text = summary_elem.get_text(strip=True)
+                    if summary_text and len(summary_text) > 20:  # 确保摘要有足够的长度
+                        summary = summary_text
+                        break
+            
+            # 如果还是没有找到摘要，尝试获取div内的所有文本
+            if not summary:
+                # 移除标题和来源元素
+                content_div = div.copy()
+                content_div.remove("h3, .c-author, .news-source")
                 
-                news_items.append(NewsItem(
-                    title=title,
-                    url=news_url,
-                    source=source,
-                    date=date_str,
-                    summary=summary,
-                    heat_score=heat_score
-                ))
-            except Exception as e:
-                print(f"解析新闻项出错: {e}")
+                # 获取剩余文本作为摘要
+                div_text = content_div.get_text(strip=True)
+                if div_text and len(div_text) > 20:
+                    summary = div_text
+            
+            # 如果还是没有摘要，使用标题作为默认摘要
+            if not summary:
+                summary = f"关于'{title}'的新闻"
+            
+            news_items.append(NewsItem(
+                title=title,
+                url=news_url,
+                source=source,
+                date=date_str,
+                summary=summary,
+                heat_score=calculate_news_heat(date_str, title, title_keywords)
+            ))
+        except Exception as e:
+            print(f"解析新闻项出错: {e}")
+    
+    return news_items
+
+def is_cancelled(cancel):
+    """来源的取消事件是否已设置（来源已超时）"""
+    return cancel is not None and cancel.is_set()
+
+def search_baidu_news(keyword, title_keywords=None, cancel=None):
+    """在百度新闻中搜索关键词，请求失败时抛出异常；cancel 已设置时（来源已超时）不再请求，返回空列表"""
+    params = {"rtt": 1, "bsst": 1, "cl": 2, "tn": "news", "word": keyword}
+    RATE_LIMITER.acquire(BAIDU_NEWS_URL)
+    if is_cancelled(cancel):
+        return []
+    response = get_client().get(BAIDU_NEWS_URL, params=params, headers=get_random_headers(), timeout=TIMEOUT)
+    response.encoding = 'utf-8'
+    
+    if response.status_code != 200:
+        raise SourceError(f"百度新闻请求失败: {response.status_code}")
+    
+    return parse_baidu_news(response.text, title_keywords)
+
+def fetch_baidu_news(keyword="大模型", title_keywords=None):
+    """从百度新闻获取关键词相关新闻"""
+    try:
+        return search_baidu_news(keyword, title_keywords)
     except Exception as e:
         print(f"获取百度新闻时发生错误: {e}")
+        return []
+
+def parse_sina_news(html, title_keywords=None):
+    """解析新浪新闻搜索结果页，返回新闻列表"""
+    news_items = []
+    soup = parse_html(html)
+    news_divs = soup.select(".box-result")
+    
+    for div in news_divs:
+        try:
+            title_elem = div.select_one("h2 a")
+            if not title_elem:
+                continue
+            
+            title = title_elem.get_text().strip()
+            news_url = title_elem.get("href", "")
+            
+            source_elem = div.select_one(".fgray_time")
+            source_text = source_elem.get_text().strip() if source_elem else ""
+            source = source_text.split()[0] if source_text and source_text.split() else "新浪"
+            # 清理来源字段中可能的多余字符
+            source = source.strip().rstrip(',')
+            date_str = source_text.split()[1] if source_text and len(source_text.split()) > 1 else "今天"
+            
+            # 获取摘要
+            summary = None
+            summary_elem = div.select_one(".content")
+            if summary_elem:
+                summary = summary_elem.get_text().strip()
+            
+            # 如果没有摘要，使用标题作为默认摘要
+            if not summary or len(summary) < 20:
+                summary = f"关于'{title}'的新闻"
+            
+            news_items.append(NewsItem(
+                title=title,
+                url=news_url,
+                source=source,
+                date=date_str,
+                summary=summary,
+                heat_score=calculate_news_heat(date_str, title, title_keywords)
+            ))
+        except Exception as e:
+            print(f"解析新浪新闻项出错: {e}")
     
     return news_items
 
-def fetch_sina_news():
-    """从新浪新闻获取大模型相关新闻"""
-    news_items = []
+def search_sina_news(keyword, title_keywords=None, cancel=None):
+    """在新浪新闻中搜索关键词，请求失败时抛出异常；cancel 已设置时（来源已超时）不再请求，返回空列表"""
+    params = {"q": keyword, "c": "news"}
+    RATE_LIMITER.acquire(SINA_NEWS_URL)
+    if is_cancelled(cancel):
+        return []
+    response = get_client().get(SINA_NEWS_URL, params=params, headers=get_random_headers(), timeout=TIMEOUT)
+    response.encoding = 'utf-8'
     
+    if response.status_code != 200:
+        raise SourceError(f"新浪新闻请求失败: {response.status_code}")
+    
+    return parse_sina_news(response.text, title_keywords)
+
+def fetch_sina_news(keyword="大模型", title_keywords=None):
+    """从新浪新闻获取关键词相关新闻"""
     try:
-        url = "https://search.sina.com.cn/?q=大模型&c=news"
-        response = requests.get(url, headers=get_random_headers(), timeout=TIMEOUT)
-        response.encoding = 'utf-8'
-        
-        if response.status_code != 200:
-            print(f"新浪新闻请求失败: {response.status_code}")
-            return news_items
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        news_divs = soup.select(".box-result")
-        
-        for div in news_divs:
-            try:
-                title_elem = div.select_one("h2 a")
-                if not title_elem:
-                    continue
-                
-                title = title_elem.get_text().strip()
-                news_url = title_elem.get("href", "")
-                
-                source_elem = div.select_one(".fgray_time")
-                source_text = source_elem.get_text().strip() if source_elem else ""
-                source = source_text.split()[0] if source_text and source_text.split() else "新浪"
-                # 清理来源字段中可能的多余字符
-                source = source.strip().rstrip(',')
-                date_str = source_text.split()[1] if source_text and len(source_text.split()) > 1 else "今天"
-                
-                # 获取摘要
-                summary = None
-                summary_elem = div.select_one(".content")
-                if summary_elem:
-                    summary = summary_elem.get_text().strip()
-                
-                # 如果没有摘要，使用标题作为默认摘要
-                if not summary or len(summary) < 20:
-                    summary = f"关于'{title}'的新闻"
-                
-                # 计算热度分数
-                heat_score = 0
-                if "今天" in date_str:
-                    heat_score += 50
-                elif "小时" in date_str:
-                    heat_score += 30
-                elif "分钟" in date_str:
-                    heat_score += 40
-                else:
-                    heat_score += 10
-                    
-                # 添加标题权重
-                keywords = ["ChatGPT", "GPT", "大模型", "人工智能", "AI", "大语言模型", "LLM"]
-                for keyword in keywords:
-                    if keyword in title:
-                        heat_score += 20
-                
-                news_items.append(NewsItem(
-                    title=title,
-                    url=news_url,
-                    source=source,
-                    date=date_str,
-                    summary=summary,
-                    heat_score=heat_score
-                ))
-            except Exception as e:
-                print(f"解析新浪新闻项出错: {e}")
+        return search_sina_news(keyword, title_keywords)
     except Exception as e:
         print(f"获取新浪新闻时发生错误: {e}")
-    
-    return news_items
+        return []
+
+# 通用文章内容区的备选选择器（预编译）
+ARTICLE_CONTENT_SELECTORS = compile_selectors([
+    "article", ".article-content", ".article_content",
+    ".content", "#content", ".news-content", ".detail-content",
+    ".main-content", ".post-content", ".entry-content"
+])
+
+@METRICS.timed("parse.article", kind="generic")
+def parse_article_summary(html):
+    """从文章页面HTML中提取摘要"""
+    soup = parse_html(html)
+
+    # 尝试多种选择器来获取文章内容
+    for selector in ARTICLE_CONTENT_SELECTORS:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            # 移除脚本和样式
+            content_elem.remove("script, style")
+
+            # 获取文本内容
+            text = content_elem.get_text(strip=True)
+            # 简单处理，取前200个字符作为摘要
+            if text and len(text) > 200:
+                return text[:200] + "..."
+            elif text:
+                return text
+
+    # 如果上述选择器都没有找到内容，尝试获取所有p标签
+    paragraphs = soup.select("p")
+    if paragraphs:
+        text = " ".join([p.get_text(strip=True) for p in paragraphs[:5]])
+        if text and len(text) > 200:
+            return text[:200] + "..."
+        elif text:
+            return text
+
+    return "无法获取文章摘要"
 
+@cached_summary
 def get_article_summary(url):
-    """使用BeautifulSoup直接从文章页面提取内容"""
+    """直接从文章页面提取内容"""
     try:
         # 如果是百度新闻链接，需要特殊处理
         if "baijiahao.baidu.com" in url or "mbd.baidu.com" in url:
             return extract_baidu_article_summary(url)
+        
+        if STREAMING_SUMMARY:
+            status_code, summary = stream_article_summary(
+                url, get_random_headers(), ARTICLE_CONTENT_SELECTORS, "text")
+            if status_code != 200:
+                print(f"获取文章内容失败: {status_code}")
+                return None
+            return summary or "无法获取文章摘要"
             
-        response = requests.get(url, headers=get_random_headers(), timeout=TIMEOUT)
+        response = cached_get(get_article_cache(), get_client(), url, headers=get_random_headers(), timeout=TIMEOUT)
         response.encoding = 'utf-8'
         
         if response.status_code != 200:
             print(f"获取文章内容失败: {response.status_code}")
             return None
             
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 尝试多种选择器来获取文章内容
-        content_selectors = [
-            "article", ".article-content", ".article_content", 
-            ".content", "#content", ".news-content", ".detail-content",
-            ".main-content", ".post-content", ".entry-content"
-        ]
-        
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                # 移除脚本和样式
-                for script in content_elem(["script", "style"]):
-                    script.decompose()
-                
-                # 获取文本内容
-                text = content_elem.get_text(strip=True)
-                # 简单处理，取前200个字符作为摘要
-                if text and len(text) > 200:
-                    return text[:200] + "..."
-                elif text:
-                    return text
-        
-        # 如果上述选择器都没有找到内容，尝试获取所有p标签
-        paragraphs = soup.select("p")
-        if paragraphs:
-            text = " ".join([p.get_text(strip=True) for p in paragraphs[:5]])
-            if text and len(text) > 200:
-                return text[:200] + "..."
-            elif text:
-                return text
-                
-        return "无法获取文章摘要"
+        return parse_article_summary(response.text)
+    
     except Exception as e:
         print(f"获取文章摘要失败: {e}")
         return "获取摘要时出错"
 
+# 百度文章内容选择器（预编译）
+BAIDU_CONTENT_SELECTORS = compile_selectors([
+    ".article-content", "#article_content", ".article",
+    ".mainContent", "#main_content", ".content-wrapper",
+    "[class*=article]", "[class*=content]"
+])
+
+@METRICS.timed("parse.article", kind="baidu")
+def parse_baidu_article_summary(html):
+    """从百度文章页面HTML中提取摘要"""
+    soup = parse_html(html)
+
+    # 尝试所有可能的选择器
+    for selector in BAIDU_CONTENT_SELECTORS:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            # 移除无用元素
+            content_elem.remove(".author-info, .article-source, .article-tag, script, style")
+
+            # 获取所有段落
+            paragraphs = content_elem.select("p")
+            if paragraphs:
+                # 取前3个非空段落组成摘要
+                text_parts = []
+                for p in paragraphs:
+                    p_text = p.get_text(strip=True)
+                    if p_text and len(p_text) > 10:  # 忽略太短的段落
+                        text_parts.append(p_text)
+                        if len(text_parts) >= 3:
+                            break
+
+                if text_parts:
+                    summary = " ".join(text_parts)
+                    if len(summary) > 200:
+                        return summary[:200] + "..."
+                    return summary
+
+            # 如果没有找到段落，获取整个文本
+            text = content_elem.get_text(strip=True)
+            if text:
+                if len(text) > 200:
+                    return text[:200] + "..."
+                return text
+
+    # 尝试直接获取所有段落
+    all_paragraphs = soup.select("p")
+    if all_paragraphs:
+        text_parts = []
+        for p in all_paragraphs:
+            p_text = p.get_text(strip=True)
+            if p_text and len(p_text) > 15:  # 忽略太短的段落
+                text_parts.append(p_text)
+                if len(text_parts) >= 3:
+                    break
+
+        if text_parts:
+            summary = " ".join(text_parts)
+            if len(summary) > 200:
+                return summary[:200] + "..."
+            return summary
+
+    # 如果都没有找到，返回默认值
+    return "未能从百度文章中提取到摘要"
+
+@cached_summary
 def extract_baidu_article_summary(url):
     """专门用于从百度文章提取摘要"""
     try:
-        response = requests.get(url, headers=get_random_headers(), timeout=TIMEOUT)
+        response = cached_get(get_article_cache(), get_client(), url, headers=get_random_headers(), timeout=TIMEOUT)
         response.encoding = 'utf-8'
         
         if response.status_code != 200:
             print(f"获取百度文章内容失败: {response.status_code}")
             return "无法获取百度文章内容"
             
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 百度文章内容选择器
-        baidu_selectors = [
-            ".article-content", "#article_content", ".article",
-            ".mainContent", "#main_content", ".content-wrapper",
-            "[class*=article]", "[class*=content]"
-        ]
-        
-        # 尝试所有可能的选择器
-        for selector in baidu_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                # 移除无用元素
-                for unwanted in content_elem.select(".author-info, .article-source, .article-tag, script, style"):
-                    if unwanted:
-                        unwanted.decompose()
-                
-                # 获取所有段落
-                paragraphs = content_elem.select("p")
-                if paragraphs:
-                    # 取前3个非空段落组成摘要
-                    text_parts = []
-                    for p in paragraphs:
-                        p_text = p.get_text(strip=True)
-                        if p_text and len(p_text) > 10:  # 忽略太短的段落
-                            text_parts.append(p_text)
-                            if len(text_parts) >= 3:
-                                break
-                    
-                    if text_parts:
-                        summary = " ".join(text_parts)
-                        if len(summary) > 200:
-                            return summary[:200] + "..."
-                        return summary
-                
-                # 如果没有找到段落，获取整个文本
-                text = content_elem.get_text(strip=True)
-                if text:
-                    if len(text) > 200:
-                        return text[:200] + "..."
-                    return text
-        
-        # 尝试直接获取所有段落
-        all_paragraphs = soup.select("p")
-        if all_paragraphs:
-            text_parts = []
-            for p in all_paragraphs:
-                p_text = p.get_text(strip=True)
-                if p_text and len(p_text) > 15:  # 忽略太短的段落
-                    text_parts.append(p_text)
-                    if len(text_parts) >= 3:
-                        break
-            
-            if text_parts:
-                summary = " ".join(text_parts)
-                if len(summary) > 200:
-                    return summary[:200] + "..."
-                return summary
-        
-        # 如果都没有找到，返回默认值
-        return "未能从百度文章中提取到摘要"
+        return parse_baidu_article_summary(response.text)
     
     except Exception as e:
         print(f"提取百度文章摘要时出错: {e}")
         return "提取百度文章摘要时出错"
 
-def extract_keywords(text, top_n=5):
-    """从文本中提取关键词"""
-    if not text:
-        return []
-    return jieba.analyse.textrank(text, topK=top_n)
+@METRICS.timed("parse.search", source="wechat")
+def parse_wechat_search_results(html, keyword):
+    """解析搜狗微信搜索结果页，返回新闻列表"""
+    news_items = []
+    soup = parse_html(html)
+    articles = soup.select("ul.news-list li")
 
-def fetch_wechat_news(topic_id=DEFAULT_TOPIC):
-    """从搜狗微信获取特定主题相关新闻"""
-    topic = TOPICS.get(topic_id, TOPICS[DEFAULT_TOPIC])
-    print(f"开始获取{topic['name']}相关新闻...")
+    print(f"找到 {len(articles)} 篇与 '{keyword}' 相关的微信公众号文章")
+
+    for article in articles:
+        try:
+            # 提取标题和链接
+            title_elem = article.select_one("h3 a")
+            if not title_elem:
+                continue
+
+            title = title_elem.get_text(strip=True)
+            article_url = title_elem.get("href")
+            if article_url.startswith('/'):
+                article_url = urljoin(SOGOU_SEARCH_URL, article_url)
+
+            # 提取公众号名称
+            source_elem = article.select_one(".account")
+            source = source_elem.get_text(strip=True) if source_elem else "未知公众号"
+
+            # 提取发布时间
+            time_elem = article.select_one(".s2")
+            pub_time = time_elem.get_text(strip=True) if time_elem else ""
+
+            # 提取摘要
+            summary_elem = article.select_one(".txt-info")
+            summary = summary_elem.get_text(strip=True) if summary_elem else ""
+
+            # 计算热度分数
+            heat_score = calculate_wechat_heat(source, title, pub_time, keyword)
+
+            # 创建新闻条目
+            news_items.append(NewsItem(
+                title=title,
+                url=article_url,
+                source=source,
+                date=datetime.now().strftime("%Y-%m-%d"),
+                summary=summary,
+                heat_score=heat_score
+            ))
+
+        except Exception as e:
+            print(f"处理微信公众号文章时出错: {e}")
+            continue
     
+    return news_items
+
+def search_wechat_keyword(keyword, page=1, cancel=None):
+    """在搜狗微信中搜索单个关键词的第 page 页，返回解析出的新闻列表；cancel 已设置时（来源已超时）不再请求"""
+    if is_cancelled(cancel):
+        return []
+    print(f"搜索关键词: {keyword}" + (f" (第{page}页)" if page > 1 else ""))
     news_items = []
-    keywords = topic["keywords"]
-    
-    # 对每个关键词进行搜索
-    for keyword in keywords:
-        print(f"搜索关键词: {keyword}")
-        url = "https://weixin.sogou.com/weixin"
-        params = {
-            "type": 2,
-            "query": keyword,
-            "ie": "utf8",
-            "s_from": "input",
-            "from": "input",
-            "_sug_": "n",
-            "_sug_type_": "",
-        }
-        
-        headers = get_random_headers()
+    params = {
+        "type": 2,
+        "query": keyword,
+        "ie": "utf8",
+        "s_from": "input",
+        "from": "input",
+        "_sug_": "n",
+        "_sug_type_": "",
+    }
+    if page > 1:
+        params["page"] = page
+    
+    throttle = get_throttle() if ADAPTIVE_THROTTLE else None
+    if throttle is not None and throttle.is_dead(keyword):
+        print(f"跳过关键词 '{keyword}'（长期没有结果或本次运行中多次被拦截）")
+        return news_items
+    
+    for attempt in range(MAX_BLOCK_RETRIES + 1):
+        # 启用节流时同一会话使用固定的User-Agent，与保存的Cookie对应
+        headers = {"User-Agent": throttle.user_agent(SOGOU_SEARCH_URL)} if throttle else get_random_headers()
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=TIMEOUT)
+            # 限制并发、等待拦截后的暂停结束，再按主机限速等待礼貌配额
+            with throttle.slot(SOGOU_SEARCH_URL) if throttle else nullcontext() as host_throttle:
+                METRICS.observe("rate_limit.wait", RATE_LIMITER.acquire(SOGOU_SEARCH_URL), source="wechat")
+                if host_throttle is not None:
+                    host_throttle.wait_paused()
+                if is_cancelled(cancel):
+                    return news_items
+                started = time.monotonic()
+                with METRICS.span("search.request", source="wechat"):
+                    response = get_client().get(SOGOU_SEARCH_URL, params=params, headers=headers, timeout=TIMEOUT)
+            
+            if throttle is not None:
+                reason = detect_block(response)
+                if reason:
+                    METRICS.incr("throttle_blocks", host=urlsplit(SOGOU_SEARCH_URL).netloc, reason=reason)
+                    throttle.on_block(SOGOU_SEARCH_URL, reason, started, get_client().session)
+                    continue
+                throttle.on_success(SOGOU_SEARCH_URL)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                articles = soup.select("ul.news-list li")
-                
-                print(f"找到 {len(articles)} 篇与 '{keyword}' 相关的微信公众号文章")
-                
-                for article in articles:
-                    try:
-                        # 提取标题和链接
-                        title_elem = article.select_one("h3 a")
-                        if not title_elem:
-                            continue
-                        
-                        title = title_elem.get_text(strip=True)
-                        article_url = title_elem.get("href")
-                        if article_url.startswith('/'):
-                            article_url = "https://weixin.sogou.com" + article_url
-                        
-                        # 提取公众号名称
-                        source_elem = article.select_one(".account")
-                        source = source_elem.get_text(strip=True) if source_elem else "未知公众号"
-                        
-                        # 提取发布时间
-                        time_elem = article.select_one(".s2")
-                        pub_time = time_elem.get_text(strip=True) if time_elem else ""
-                        
-                        # 提取摘要
-                        summary_elem = article.select_one(".txt-info")
-                        summary = summary_elem.get_text(strip=True) if summary_elem else ""
-                        
-                        # 计算热度分数
-                        heat_score = calculate_wechat_heat(source, title, pub_time, keyword)
-                        
-                        # 创建新闻条目
-                        news_item = NewsItem(
-                            title=title,
-                            url=article_url,
-                            source=source,
-                            date=datetime.now().strftime("%Y-%m-%d"),
-                            summary=summary,
-                            heat_score=heat_score
-                        )
-                        
-                        # 检查是否已存在相同标题或URL的新闻
-                        if not any(item.title == title or item.url == article_url for item in news_items):
-                            news_items.append(news_item)
-                        
-                    except Exception as e:
-                        print(f"处理微信公众号文章时出错: {e}")
-                        continue
+                news_items = parse_wechat_search_results(response.text, keyword)
+                if throttle is not None and page == 1:
+                    throttle.record_results(keyword, len(news_items))
             else:
                 print(f"请求失败，状态码: {response.status_code}")
                 
         except Exception as e:
             print(f"搜索关键词 '{keyword}' 时出错: {e}")
-        
-        # 每个关键词搜索后休眠，避免频繁请求
-        time.sleep(random.uniform(3, 5))
+        break
+    else:
+        print(f"关键词 '{keyword}' 连续 {MAX_BLOCK_RETRIES + 1} 次被拦截，本次运行不再搜索")
+        throttle.give_up(keyword)
+    
+    return news_items
+
+class PageDepthTracker:
+    """
+    自适应翻页：记录已见过的文章和当前前TOP_N名的热度门槛，
+    某个关键词的新一页没有带来新的、且热度能进入前TOP_N的文章时，不再继续翻页
+    """
+    
+    def __init__(self, top_n=None):
+        self.top_n = top_n or TOP_N
+        self.seen = set()
+        self.top_heats = []  # 小顶堆，保存热度最高的 top_n 个值
+    
+    def observe(self, news_items):
+        """记录一页结果，返回是否值得继续抓取下一页"""
+        if len(news_items) < SOGOU_PAGE_SIZE:
+            # 不满一页说明已经是最后一页
+            productive = False
+        else:
+            productive = False
+            threshold = self.top_heats[0] if len(self.top_heats) >= self.top_n else None
+            for item in news_items:
+                keys = {canonical_article_url(item.url), normalize_title(item.title)} - {""}
+                if keys & self.seen:
+                    continue
+                if threshold is None or item.heat_score > threshold:
+                    productive = True
+        for item in news_items:
+            self.seen.update({canonical_article_url(item.url), normalize_title(item.title)} - {""})
+            if len(self.top_heats) < self.top_n:
+                heapq.heappush(self.top_heats, item.heat_score)
+            elif item.heat_score > self.top_heats[0]:
+                heapq.heapreplace(self.top_heats, item.heat_score)
+        return productive
+
+def search_keywords(keywords, max_pages=None, on_results=None, cancel=None):
+    """
+    并发搜索一组关键词，返回 {关键词: 新闻列表}，请求节奏由 RATE_LIMITER 控制而不是串行休眠。
+    按轮次翻页：每轮并发抓取所有仍需翻页的关键词的下一页，新页面没有新的高热度文章时该关键词停止翻页。
+    on_results 不为 None 时，每轮结束后对每个关键词调用 on_results(关键词, 本页新闻, 剩余页数可能返回的条数上限)。
+    cancel（threading.Event）被设置后不再发出新的请求，返回已得到的结果。
+    """
+    max_pages = max_pages or MAX_PAGES
+    results = {keyword: [] for keyword in keywords}
+    tracker = PageDepthTracker()
+    active = list(keywords)
+    page = 1
+    try:
+        with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+            while active and not is_cancelled(cancel):
+                pages = list(executor.map(lambda keyword: search_wechat_keyword(keyword, page, cancel), active))
+                next_active = []
+                # 按关键词顺序处理，保证结果与请求完成的先后无关
+                for keyword, news_items in zip(active, pages):
+                    results[keyword].extend(news_items)
+                    more = tracker.observe(news_items) and page < max_pages
+                    if more:
+                        next_active.append(keyword)
+                    if on_results is not None:
+                        on_results(keyword, news_items, (max_pages - page) * SOGOU_PAGE_SIZE if more else 0)
+                active = next_active
+                page += 1
+    finally:
+        save_throttle_state()
+    return results
+
+def merge_news(news_lists):
+    """按顺序合并多组结果，相同URL、标题或近似重复的文章只保留热度最高的一篇"""
+    dedup = DedupIndex()
+    for news_list in news_lists:
+        for news_item in news_list:
+            dedup.add(news_item)
+    return dedup.items()
+
+@METRICS.timed("fetch.wechat")
+def fetch_wechat_news(topic_id=DEFAULT_TOPIC):
+    """从搜狗微信获取特定主题相关新闻，多个关键词并发搜索，受按主机限速约束"""
+    topic = get_topic(topic_id)
+    print(f"开始获取{topic.name}相关新闻...")
+    
+    keywords = topic.keywords
+    results = search_keywords(keywords)
+    news_items = merge_news(results[keyword] for keyword in keywords)
     
     print(f"总共获取了 {len(news_items)} 条微信公众号文章")
     return news_items
 
-def calculate_wechat_heat(account_name, title, pub_time, keyword):
-    """计算微信公众号文章的热度分数"""
-    # 基础分数
-    base_score = 50
+def search_each_keyword(search, keywords, label, on_results=None, cancel=None):
+    """
+    并发地对每个关键词调用 search(关键词, cancel)，单个关键词失败只打印错误，全部失败时抛出 SourceError；
+    on_results 不为 None 时每个关键词完成后调用 on_results(关键词, 新闻列表, 0)；
+    cancel 被设置后尚未开始的关键词不再搜索
+    """
+    results = {}
     
-    # 公众号权重分数 (知名公众号加分)
-    account_score = 0
-    important_accounts = [
-        "中国医学论坛报", "医脉通", "丁香医生", "医学界", "中华医学杂志", 
-        "NEJM医学前沿", "柳叶刀", "血栓与止血", "中华血液学杂志", "中国循环杂志"
-    ]
+    def run(keyword):
+        return [] if is_cancelled(cancel) else search(keyword, cancel)
+    
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        futures = {executor.submit(run, keyword): keyword for keyword in keywords}
+        for future in as_completed(futures):
+            keyword = futures[future]
+            try:
+                results[keyword] = future.result()
+            except Exception as e:
+                print(f"{label}搜索关键词 '{keyword}' 时出错: {e}")
+            if on_results is not None:
+                on_results(keyword, results.get(keyword, []), 0)
+    # 按关键词顺序返回，与完成的先后无关
+    results = {keyword: results[keyword] for keyword in keywords if keyword in results}
+    if keywords and not results and not is_cancelled(cancel):
+        raise SourceError(f"{label}所有关键词搜索均失败")
+    return results
+
+def wechat_timeout(keywords):
+    """
+    搜狗微信来源的超时：所有关键词都翻到 MAX_PAGES 页所需的请求数除以当前速率（自适应节流时为
+    节流器的当前速率），再留出 WECHAT_TIMEOUT_MARGIN 倍的余量，不少于来源的默认超时
+    """
+    host = urlsplit(SOGOU_SEARCH_URL).netloc
+    if ADAPTIVE_THROTTLE:
+        rate = get_throttle().host_throttle(host).rate
+    else:
+        rate = RATE_LIMITER.host_rates.get(host, (RATE_LIMITER.default_rate,))[0]
+    return max(DEFAULT_SOURCE_TIMEOUT, len(keywords) * MAX_PAGES / rate * WECHAT_TIMEOUT_MARGIN)
+
+@register_source("wechat", label="搜狗微信", timeout=wechat_timeout, streaming=True, cancellable=True)
+@METRICS.timed("source", source="wechat")
+def wechat_source(keywords, on_results=None, cancel=None):
+    """搜狗微信来源"""
+    return search_keywords(keywords, on_results=on_results, cancel=cancel)
+
+@register_source("baidu", label="百度新闻", streaming=True, cancellable=True)
+@METRICS.timed("source", source="baidu")
+def baidu_source(keywords, on_results=None, cancel=None):
+    """百度新闻来源，标题按主题关键词加分"""
+    return search_each_keyword(lambda keyword, cancel: search_baidu_news(keyword, keywords, cancel),
+                               keywords, "百度新闻", on_results, cancel)
+
+@register_source("sina", label="新浪新闻", streaming=True, cancellable=True)
+@METRICS.timed("source", source="sina")
+def sina_source(keywords, on_results=None, cancel=None):
+    """新浪新闻来源，标题按主题关键词加分"""
+    return search_each_keyword(lambda keyword, cancel: search_sina_news(keyword, keywords, cancel),
+                               keywords, "新浪新闻", on_results, cancel)
+
+_topic_registry = None
+
+def load_topics(directory=None):
+    """从配置目录加载所有主题（替换当前的 TOPICS）"""
+    global _topic_registry, TOPICS
+    # 传入来源注册表，配置中的来源名称在加载时检查
+    _topic_registry = TopicRegistry(directory or TOPIC_DIR, SOURCES)
+    _topic_registry.reload()
+    TOPICS = _topic_registry.plans
+    return TOPICS
+
+def reload_topics():
+    """重新加载修改过的主题配置，返回变化了的主题编号集合"""
+    global TOPICS
+    changed = _topic_registry.reload()
+    TOPICS = _topic_registry.plans
+    return changed
+
+# 新闻来源都已注册，加载主题配置
+load_topics()
+
+def get_topic(topic_id):
+    """按编号获取主题计划"""
+    try:
+        return TOPICS[topic_id]
+    except KeyError:
+        raise ValueError(f"未知的主题: {topic_id}")
+
+def fetch_topic_news(topic_id=DEFAULT_TOPIC):
+    """从所有启用的来源并发获取特定主题的新闻，合并去重"""
+    topic = get_topic(topic_id)
+    print(f"开始获取{topic.name}相关新闻...")
     
-    if account_name in important_accounts:
-        account_score = 20
-    elif "医" in account_name or "健康" in account_name or "血液" in account_name or "心脏" in account_name:
-        account_score = 10
+    keywords = topic.keywords
+    results = search_sources(keywords, topic.sources)
+    news_items = merge_news(results[keyword] for keyword in keywords)
+    
+    print(f"总共获取了 {len(news_items)} 条新闻")
+    return news_items
+
+def source_groups(topic_ids):
+    """按主题配置的新闻来源分组，返回 [(来源名称元组，None 为所有启用的来源, [主题编号])]"""
+    groups = {}
+    for topic_id in topic_ids:
+        groups.setdefault(TOPICS[topic_id].sources, []).append(topic_id)
+    return list(groups.items())
+
+def fetch_multi_topic_news(topic_ids, prefetcher=None):
+    """
+    一次爬取多个主题：合并各主题的关键词，每个关键词只搜索一次（使用相同新闻来源的主题之间），
+    再把结果分配给包含该关键词、或标题命中其关键词的主题，返回 {主题编号: 新闻列表}。
+    prefetcher 为 SummaryPrefetcher 时以流式流水线搜索（stream_search），一定入选的文章提前补全摘要。
+    """
+    topic_news = {}
+    for sources, group in source_groups(topic_ids):
+        keywords = list(dict.fromkeys(k for topic_id in group for k in TOPICS[topic_id].keywords))
+        names = "、".join(TOPICS[topic_id].name for topic_id in group)
+        print(f"开始获取{names}相关新闻，共 {len(keywords)} 个关键词...")
+        
+        if prefetcher is None:
+            results = search_sources(keywords, sources)
+        else:
+            results = stream_search(keywords, sources, group, prefetcher)
+        topic_news.update(assign_topic_news(keywords, results, group))
+    return topic_news
+
+def assign_stage(topic, keyword, news_items):
+    """流水线阶段：把一个关键词的结果分配给主题（规则与 assign_topic_news 相同）"""
+    if keyword in topic.keywords:
+        yield from news_items
+        return
+    for item in news_items:
+        if topic.title_matcher.search(item.title):
+            yield item
+
+def unseen_stage(news_items, seen_index, today, topic):
+    """流水线阶段：去掉该主题往期日报已报道的文章（规则与 filter_seen_news 相同）"""
+    for item in news_items:
+        if seen_index is not None:
+            first_date = seen_index.first_seen(item.url, item.title, topic.report_name)
+            if first_date is not None and first_date < today:
+                continue
+        yield item
+
+def score_stage(news_items, topic):
+    """
+    流水线阶段：产出 (文章键, 文章, 得分下界, 得分上界)。
+    文章键为规范化URL，最终去重时规范化URL相同的文章一定会合并，TopKTracker 按文章键合并得分范围；
+    下界为来源加分后的热度，上界再加上关键词标签相关度加分的上限（标签要在全部候选上计算）
+    """
+    max_bonus = topic.weights["relevance_bonus"] if TAGGING else 0
+    for item in news_items:
+        low = add_heat(item.heat_score, topic.account_score(item.source))
+        yield canonical_article_url(item.url) or item.url, item, low, add_heat(low, max_bonus)
+
+class TopicStream:
+    """流式流水线中的一个主题：分配 → 跳过往期 → 评分 → 按文章去重的临时前TOP_N名"""
+    
+    def __init__(self, topic, seen_index, today):
+        self.topic = topic
+        self.seen_index = seen_index
+        self.today = today
+        self.tracker = TopKTracker(TOP_N)
+        self.articles = {}
+        self.speculated = set()
+    
+    def feed(self, keyword, news_items):
+        stage = assign_stage(self.topic, keyword, news_items)
+        stage = unseen_stage(stage, self.seen_index, self.today, self.topic)
+        for key, item, low, high in score_stage(stage, self.topic):
+            self.articles.setdefault(key, item)
+            self.tracker.update(key, low, high)
+    
+    def settle(self, remaining):
+        """remaining 为尚未到达的候选条数上限，返回新确定一定会入选日报的文章"""
+        return [self.articles[key] for key in self.tracker.settle(remaining)]
+    
+    def speculate(self, limit):
+        """
+        当前排名靠前、尚未提交的文章：累计不超过 limit 篇，且提前提交但尚未确定入选的文章
+        不超过前K名中尚未确定的名额，排名变化时不会反复提交新的文章
+        """
+        certain = self.tracker.certain
+        slots = self.tracker.k - len(certain) - len(self.speculated - certain)
+        articles = []
+        for key in self.tracker.provisional():
+            if len(self.speculated) >= limit or len(articles) >= slots:
+                break
+            if key not in self.speculated and key not in self.tracker.certain:
+                self.speculated.add(key)
+                articles.append(self.articles[key])
+        return articles
+
+def stream_search(keywords, sources, topic_ids, prefetcher):
+    """
+    流式流水线：搜索结果边到达边经过各主题的 分配 → 跳过往期 → 评分 → 临时前TOP_N名 阶段，
+    无论之后还会搜到什么都一定会入选的文章立即交给 prefetcher 补全摘要，与其余关键词的搜索并行。
+    返回与 search_sources 相同的 {关键词: 新闻列表}，日报的去重、打标签和最终排名仍在全部结果上进行，
+    与不使用流水线时完全一致，流水线只决定哪些摘要可以提前抓取。
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    seen_index = get_seen_index(today) if SKIP_SEEN else None
+    streams = [TopicStream(TOPICS[topic_id], seen_index, today) for topic_id in topic_ids]
+    bound = RemainingBound([source.name for source in enabled_sources(sources)], keywords)
+    events = EventStream(lambda emit: search_sources(keywords, sources, on_results=emit))
+    for source, keyword, news_items, remaining in events:
+        if source in bound.finished:
+            # 已超时的来源稍后返回的结果不会进入日报
+            continue
+        bound.update(source, keyword, remaining)
+        total = bound.total()
+        for stream in streams:
+            if news_items:
+                stream.feed(keyword, news_items)
+            for item in stream.settle(total):
+                prefetcher.submit(item, early="certain")
+            # 每个 (来源, 关键词) 都返回过结果后，当前排名靠前的文章按预算提前补全
+            if total is not None and SPECULATIVE_ENRICH:
+                for item in stream.speculate(SPECULATIVE_ENRICH):
+                    prefetcher.submit(item, early="speculative")
+    return events.result
+
+def assign_topic_news(keywords, results, topic_ids):
+    """把 {关键词: 新闻列表} 分配给各主题，返回 {主题编号: 新闻列表}"""
+    topic_news = {}
+    for topic_id in topic_ids:
+        topic = TOPICS[topic_id]
+        topic_keywords = topic.keywords
+        topic_matcher = topic.title_matcher
+        news_lists = [results[keyword] for keyword in topic_keywords]
+        # 其他主题的关键词搜到的文章，标题中含有本主题关键词的也归入本主题
+        news_lists.append([
+            item for keyword in keywords if keyword not in topic_keywords
+            for item in results[keyword]
+            if topic_matcher.search(item.title)
+        ])
+        topic_news[topic_id] = merge_news(news_lists)
+        print(f"{topic.name}: 共 {len(topic_news[topic_id])} 条新闻")
+    
+    return topic_news
+
+def pub_time_score(pub_time):
+    """时间衰减分数 (越新的文章分数越高)"""
+    parsed = parse_pub_time(pub_time)
+    if parsed is None:
+        return 0
+    unit, amount = parsed
+    if unit == "hours":
+        if not amount:
+            return 15  # 刚刚发布
+        return max(15 - amount * 0.5, 0)  # 每小时减少0.5分，最低0分
+    return max(10 - amount * 2, 0)  # 每天减少2分，最低0分
+
+@METRICS.timed("heat.wechat")
+def calculate_wechat_heat(account_name, title, pub_time, keyword):
+    """
+    计算微信公众号文章的热度分数。
+    知名公众号的加分与主题有关（见主题配置的 important_accounts），在生成各主题日报时由 score_topic_news 加上
+    """
+    # 基础分数
+    base_score = BASE_HEAT
     
     # 标题相关性分数
     title_score = 0
     if keyword in title:
-        title_score = 15
+        title_score = TITLE_HEAT
     
-    # 时间衰减因子 (越新的文章分数越高)
+    # 时间衰减因子
     time_score = 0
-    if pub_time:
-        try:
-            # 尝试解析发布时间
-            if "小时前" in pub_time:
-                hours = int(pub_time.replace("小时前", "").strip())
-                time_score = max(15 - hours * 0.5, 0)  # 每小时减少0.5分，最低0分
-            elif "天前" in pub_time:
-                days = int(pub_time.replace("天前", "").strip())
-                time_score = max(10 - days * 2, 0)  # 每天减少2分，最低0分
-            elif "刚刚" in pub_time:
-                time_score = 15
-            elif "月" in pub_time and "日" in pub_time:
-                # 处理"3月1日"格式
-                current_year = datetime.now().year
-                month_day = pub_time.split(" ")[0]  # 取日期部分
-                month = int(month_day.split("月")[0])
-                day = int(month_day.split("月")[1].replace("日", ""))
-                
-                pub_date = datetime(current_year, month, day)
-                days_diff = (datetime.now() - pub_date).days
-                
-                time_score = max(10 - days_diff * 2, 0)
-        except Exception as e:
-            print(f"解析发布时间出错: {e}")
+    try:
+        time_score = pub_time_score(pub_time)
+    except Exception as e:
+        print(f"解析发布时间出错: {e}")
     
     # 计算总分
-    total_score = base_score + account_score + title_score + time_score
+    total_score = base_score + title_score + time_score
     
-    return min(total_score, 100)  # 最高100分
+    return min(total_score, HEAT_MAX)  # 最高100分
+
+# 微信文章内容选择器（预编译）
+WECHAT_CONTENT_SELECTORS = compile_selectors([
+    "#js_content",  # 标准微信文章内容区
+    ".rich_media_content",  # 另一个常见内容区类名
+    "div.rich_media_area_primary",  # 主要内容区
+    "div.rich_media_area_primary_inner",  # 内容区的内部容器
+])
+
+@METRICS.timed("parse.article", kind="wechat")
+def parse_wechat_article_summary(html):
+    """从微信文章页面HTML中提取摘要"""
+    soup = parse_html(html)
+
+    for selector in WECHAT_CONTENT_SELECTORS:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            # 移除所有脚本和样式标签
+            content_elem.remove("script, style")
+
+            # 获取段落
+            paragraphs = content_elem.select("p")
+            if paragraphs:
+                # 提取前3个非空段落作为摘要
+                text_parts = []
+                for p in paragraphs:
+                    p_text = p.get_text(strip=True)
+                    if p_text and len(p_text) > 10:  # 忽略太短的段落
+                        text_parts.append(p_text)
+                        if len(text_parts) >= 3:
+                            break
+
+                if text_parts:
+                    summary = " ".join(text_parts)
+                    if len(summary) > 200:
+                        return summary[:200] + "..."
+                    return summary
+
+            # 如果没有找到段落，获取整个文本
+            text = content_elem.get_text(strip=True)
+            if text:
+                if len(text) > 200:
+                    return text[:200] + "..."
+                return text
 
+    return "无法提取微信文章摘要"
+
+@cached_summary
 def extract_wechat_article_summary(url):
     """从微信文章页面提取摘要"""
     try:
@@ -541,180 +1206,653 @@ def extract_wechat_article_summary(url):
         headers.update({
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
             "Accept-Language": "zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
         })
         
-        response = requests.get(url, headers=headers, timeout=TIMEOUT)
+        if STREAMING_SUMMARY:
+            status_code, summary = stream_article_summary(
+                url, headers, WECHAT_CONTENT_SELECTORS, "paragraphs", page_paragraphs=0)
+            if status_code != 200:
+                print(f"获取微信文章内容失败: {status_code}")
+                return None
+            return summary or "无法提取微信文章摘要"
+        
+        response = cached_get(get_article_cache(), get_client(), url, headers=headers, timeout=TIMEOUT)
         response.encoding = 'utf-8'
         
         if response.status_code != 200:
             print(f"获取微信文章内容失败: {response.status_code}")
             return None
             
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 微信文章内容选择器
-        content_selectors = [
-            "#js_content",  # 标准微信文章内容区
-            ".rich_media_content",  # 另一个常见内容区类名
-            "div.rich_media_area_primary",  # 主要内容区
-            "div.rich_media_area_primary_inner",  # 内容区的内部容器
-        ]
-        
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                # 移除所有脚本和样式标签
-                for script in content_elem(["script", "style"]):
-                    script.decompose()
-                
-                # 获取段落
-                paragraphs = content_elem.select("p")
-                if paragraphs:
-                    # 提取前3个非空段落作为摘要
-                    text_parts = []
-                    for p in paragraphs:
-                        p_text = p.get_text(strip=True)
-                        if p_text and len(p_text) > 10:  # 忽略太短的段落
-                            text_parts.append(p_text)
-                            if len(text_parts) >= 3:
-                                break
-                    
-                    if text_parts:
-                        summary = " ".join(text_parts)
-                        if len(summary) > 200:
-                            return summary[:200] + "..."
-                        return summary
-                
-                # 如果没有找到段落，获取整个文本
-                text = content_elem.get_text(strip=True)
-                if text:
-                    if len(text) > 200:
-                        return text[:200] + "..."
-                    return text
-        
-        return "无法提取微信文章摘要"
+        return parse_wechat_article_summary(response.text)
     
     except Exception as e:
         print(f"提取微信文章摘要时出错: {e}")
         return "提取微信文章摘要时出错"
 
-def generate_daily_report(topic_id=DEFAULT_TOPIC):
-    """生成每日新闻报告，根据指定的主题"""
-    topic = TOPICS.get(topic_id, TOPICS[DEFAULT_TOPIC])
+def summarize_article(url):
+    """按文章来源选择摘要提取方法"""
+    if "weixin" in url:
+        with METRICS.span("summary", kind="wechat"):
+            return extract_wechat_article_summary(url)
+    with METRICS.span("summary", kind="generic"):
+        return get_article_summary(url)
+
+def needs_summary(item):
+    """搜索页摘要缺失或过短，需要抓取原文补全"""
+    return not item.summary or len(item.summary) < 50
+
+class SummaryPrefetcher:
+    """
+    摘要补全的线程池：流式流水线中一定会入选或当前排名靠前的文章在搜索尚未结束时就提交（submit），
+    生成日报时 enrich 只需提交其余的文章并等待。同一篇文章（规范化URL相同）只抓取一次。
+    """
+    
+    def __init__(self, workers=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers or ENRICH_WORKERS)
+        self.futures = {}
+        # 提前提交的文章 -> 提交原因（certain 一定入选、speculative 当前排名靠前），以及最终用到的文章
+        self.early = {}
+        self.used = set()
+        self.lock = threading.Lock()
+    
+    def submit(self, item, early=None):
+        """
+        提交一篇文章的摘要补全（不需要补全时返回 None），返回对应的 Future；
+        early 为提前提交的原因，生成日报前提交时使用
+        """
+        if not needs_summary(item):
+            return None
+        key = canonical_article_url(item.url) or item.url
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None:
+                print(f"获取文章摘要: {item.title}")
+                future = self.futures[key] = self.executor.submit(summarize_article, item.url)
+                if early:
+                    self.early[key] = early
+                    METRICS.incr("pipeline_early_enrich", kind=early)
+            if early is None:
+                self.used.add(key)
+        return future
+    
+    def enrich(self, news_items, deadline=None):
+        """补全过短的摘要，超过总时限仍未完成的条目保留搜索页的摘要"""
+        deadline = deadline or ENRICH_DEADLINE
+        futures = {}
+        for item in news_items:
+            future = self.submit(item)
+            if future is not None:
+                futures.setdefault(future, []).append(item)
+        if not futures:
+            return
+        
+        done, not_done = wait(futures, timeout=deadline)
+        for future in done:
+            summary = future.result()
+            if summary:
+                for item in futures[future]:
+                    item.summary = summary
+        
+        if not_done:
+            print(f"{len(not_done)} 篇文章摘要未在 {deadline} 秒内获取完成，使用搜索页摘要")
+    
+    def close(self):
+        # 不等待超时的请求结束，未开始的任务直接取消
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.early:
+            wasted = sum(1 for key in self.early if key not in self.used)
+            print(f"提前补全了 {len(self.early)} 篇文章摘要，其中 {wasted} 篇最终未入选")
+            METRICS.incr("pipeline_wasted_enrich", wasted)
+
+def enrich_summaries(news_items, workers=None, deadline=None):
+    """并发补全过短的摘要，超过总时限仍未完成的条目保留搜索页的摘要"""
+    prefetcher = SummaryPrefetcher(workers)
+    try:
+        prefetcher.enrich(news_items, deadline)
+    finally:
+        prefetcher.close()
+
+def add_heat(heat, bonus):
+    """加分后不超过100分（原本已超过100分的保持不变）"""
+    return min(heat + bonus, max(heat, HEAT_MAX)) if bonus else heat
+
+def score_topic_news(news_items, topic):
+    """
+    把候选新闻放入列式存储（CandidateStore），按主题配置的知名公众号和提示词整列给来源加分。
+    多主题爬取时同一篇文章可能属于多个主题、得分不同，列式存储保存的是副本，不修改原来的 NewsItem。
+    """
+    candidates = CandidateStore(news_items)
+    candidates.add_heat([topic.account_score(source) for source in candidates.columns["source"]])
+    return candidates
+
+def tag_news(candidates, topic):
+    """对全部候选新闻（CandidateStore）一次性提取关键词标签，并按TF-IDF主题相关度整列加分"""
+    columns = candidates.columns
+    results = tag_texts(
+        (f"{title} {summary or ''}" for title, summary in zip(columns["title"], columns["summary"])),
+        topic.keywords, top_n=TAG_TOP_N,
+    )
+    max_bonus = topic.weights["relevance_bonus"]
+    columns["tags"] = [tags for tags, _ in results]
+    candidates.add_heat([round(max_bonus * relevance, 1) for _, relevance in results])
+
+def write_run_metrics(report_path, summary):
+    """把本次运行的指标摘要写到CSV旁边的 .metrics.json 文件，返回文件路径"""
+    metrics_path = os.path.splitext(report_path)[0] + ".metrics.json"
+    try:
+        with atomic_open(metrics_path) as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"写入运行指标出错: {e}")
+        return None
+    return metrics_path
+
+def generate_daily_report(topic_id=DEFAULT_TOPIC, news_items=None, metrics_since=None, enrich=None):
+    """
+    生成每日新闻报告，根据指定的主题；news_items 为已抓取的新闻时不再重新抓取。
+    metrics_since 为开始抓取前的 METRICS.snapshot()，运行指标从那时算起（多主题共享抓取时使用）。
+    enrich 为补全摘要的函数，默认在本进程中并发抓取（enrich_summaries）。
+    """
+    started = time.perf_counter()
+    metrics_since = metrics_since or METRICS.snapshot()
+    topic = get_topic(topic_id)
     today = datetime.now().strftime("%Y-%m-%d")
-    print(f"开始生成{topic['name']}日报 ({today})...")
+    print(f"开始生成{topic.name}日报 ({today})...")
     
     # 获取新闻数据
-    news_items = fetch_wechat_news(topic_id)
+    if news_items is None:
+        with METRICS.span("report.fetch"):
+            news_items = fetch_topic_news(topic_id)
+    candidates = len(news_items)
     
     if not news_items:
-        print(f"未找到{topic['name']}相关新闻，日报生成失败")
+        print(f"未找到{topic.name}相关新闻，日报生成失败")
         return None
     
-    # 按热度排序，取前10条
-    news_items.sort(key=lambda x: x.heat_score, reverse=True)
-    top_news = news_items[:10]
+    # 在补全摘要之前去掉往期已报道的文章，避免重复抓取摘要、挤掉新文章
+    if SKIP_SEEN:
+        news_items = filter_seen_news(news_items, today, topic)
+        if not news_items:
+            print(f"{topic.name}相关新闻均已在往期日报中报道，日报生成失败")
+            return None
+    
+    # 候选放入列式存储，按主题配置的来源整列加分
+    with METRICS.span("report.score"):
+        store = score_topic_news(news_items, topic)
+    
+    # 批量提取关键词标签，按主题相关度整列调整热度
+    if TAGGING:
+        with METRICS.span("report.tagging"):
+            tag_news(store, topic)
+    
+    # 按热度取前TOP_N条，用部分选择代替全量排序，只把入选的候选还原为 NewsItem
+    with METRICS.span("report.rank"):
+        top_news = top_k(store, TOP_N)
     
     # 确保所有文章都有摘要
-    for item in top_news:
-        if not item.summary or len(item.summary) < 50:
-            print(f"获取文章摘要: {item.title}")
-            item.summary = extract_wechat_article_summary(item.url)
-    
-    # 保存为CSV
-    report_filename = f"{topic['report_name']}_{today}.csv"
-    report_path = os.path.join(DATA_DIR, report_filename)
-    with open(report_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
-        writer.writerow(['日期', '标题', '内容摘要', '信息来源', 'URL', '热度'])
-        
-        for item in top_news:
-            # 清理字段，确保没有换行符和额外的逗号
-            title = item.title.replace('\n', ' ').replace('\r', '')
-            summary = item.summary.replace('\n', ' ').replace('\r', '') if item.summary else ""
-            source = item.source.replace('\n', ' ').replace('\r', '')
-            
-            writer.writerow([
-                today,
-                title,
-                summary,
-                source,
-                item.url,
-                item.heat_score
-            ])
-    
-    print(f"{topic['report_name']}已保存到: {report_path}")
-    
-    # 如果设置了Server酱SendKey，推送到微信
-    if SERVERCHAN_SEND_KEY:
+    with METRICS.span("report.enrich"):
+        (enrich or enrich_summaries)(top_news)
+    
+    # 序列化一次，同时写出CSV和其他格式（先写临时文件再替换，不会留下写了一半的日报）
+    os.makedirs(DATA_DIR, exist_ok=True)
+    base_path = os.path.join(DATA_DIR, f"{topic.report_name}_{today}")
+    title = f"{topic.report_name} ({today})"
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    formats = list(dict.fromkeys(("csv",) + tuple(REPORT_FORMATS)))
+    with METRICS.span("report.write"):
+        records = build_records(top_news, today)
+        paths = write_report(records, base_path, formats, title, generated_at)
+    report_path = paths["csv"]
+    
+    print(f"{topic.report_name}已保存到: {', '.join(paths.values())}")
+    
+    # 同时写入日报历史库，写入失败不影响CSV日报
+    try:
+        with METRICS.span("report.store"):
+            get_report_store().save_report(topic.report_name, today, top_news)
+    except Exception as e:
+        print(f"写入日报历史库出错: {e}")
+    
+    # 如果配置了推送渠道，推送到微信（在后台发送，不阻塞日报生成）
+    if notification_channels():
         print("推送到微信...")
-        push_to_wechat(top_news, today, topic_id)
+        with METRICS.span("report.push"):
+            push_to_wechat(top_news, today, topic_id, records=records, generated_at=generated_at)
     else:
         print("未配置Server酱SendKey，跳过微信推送")
     
+    # 本次运行的指标摘要
+    elapsed = time.perf_counter() - started
+    METRICS.observe("report.total", elapsed, topic=topic_id)
+    metrics_path = write_run_metrics(report_path, {
+        "topic": topic.report_name,
+        "date": today,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "elapsed_seconds": round(elapsed, 3),
+        "candidates": candidates,
+        "items": len(top_news),
+        **METRICS.summary(metrics_since),
+    })
+    if metrics_path:
+        print(f"运行指标已保存到: {metrics_path}")
+    
     return report_path
 
-def push_to_wechat(news_items, date, topic_id=DEFAULT_TOPIC):
-    """将日报推送到微信"""
-    if not SERVERCHAN_SEND_KEY:
-        print("未配置Server酱SendKey，无法推送到微信")
+def notification_channels():
+    """根据配置创建推送渠道"""
+    channels = []
+    if SERVERCHAN_SEND_KEY:
+        channels.append(ServerChanChannel(SERVERCHAN_SEND_KEY, timeout=TIMEOUT))
+    channels.extend(WeComChannel(url, timeout=TIMEOUT) for url in WECOM_WEBHOOKS)
+    channels.extend(WebhookChannel(url, timeout=TIMEOUT) for url in NOTIFY_WEBHOOKS)
+    return channels
+
+_notifier = None
+
+def get_notifier():
+    """获取推送队列，没有配置任何推送渠道时返回 None；创建时会继续发送上次未发送完的通知"""
+    global _notifier
+    if _notifier is None:
+        channels = notification_channels()
+        if not channels:
+            return None
+        _notifier = NotificationDispatcher(os.path.join(DATA_DIR, NOTIFY_FILE), channels)
+    return _notifier
+
+def flush_notifications(timeout=None):
+    """立即发送队列中的通知并等待完成，用于即将退出的进程"""
+    notifier = get_notifier()
+    if notifier is None:
+        return
+    remaining = notifier.flush(timeout or NOTIFY_FLUSH_TIMEOUT)
+    if remaining:
+        print(f"还有 {remaining} 条通知未发送成功，将在下次运行时继续发送")
+
+def hold_notifications():
+    """
+    连续生成多份日报时暂缓推送，全部生成后立即一起发送（同一天的日报合并为一条消息）；
+    每个主题补全摘要就可能超过批次窗口，不暂缓时各主题的日报会分别推送
+    """
+    notifier = get_notifier()
+    return notifier.hold() if notifier is not None else nullcontext()
+
+def format_report_markdown(news_items, title, date=None, records=None, generated_at=None):
+    """生成日报的Markdown正文，与日报的 .md 文件内容相同；records 为已序列化的日报记录时直接使用"""
+    if records is None:
+        records = build_records(news_items, date)
+    generated_at = generated_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return render_markdown(records, title, generated_at)
+
+def push_to_wechat(news_items, date, topic_id=DEFAULT_TOPIC, records=None, generated_at=None):
+    """
+    将日报加入推送队列，立即返回；由后台线程发送到所有配置的渠道（Server酱等），失败时自动重试。
+    同一天的多份日报在短时间内先后加入队列时合并为一条消息。
+    records、generated_at 为生成日报时已序列化的记录和生成时间，推送正文与日报的 .md 文件相同。
+    """
+    notifier = get_notifier()
+    if notifier is None:
+        print("未配置Server酱SendKey或其他推送渠道，无法推送")
         return False
     
-    topic = TOPICS.get(topic_id, TOPICS[DEFAULT_TOPIC])
-    
-    # 构建标题
-    title = f"{topic['report_name']} ({date})"
-    
-    # 构建正文内容（Markdown格式）
-    content = f"# {title}\n\n## 今日热点新闻：\n\n"
+    title = f"{get_topic(topic_id).report_name} ({date})"
+    body = format_report_markdown(news_items, title, date, records, generated_at)
+    notifier.enqueue(title, body, batch_key=date)
+    print("日报已加入推送队列")
+    return True
+
+def configure_fetch(rate=None, workers=None, pool_size=None, max_pages=None, sources=None):
+    """
+    调整按主机的请求速率、并发搜索线程数、每个主机的连接池大小、最大翻页数和启用的新闻来源；
+    为 None 的参数保持不变，小于等于0的数值抛出 ValueError（此时不修改任何设置）
+    """
+    global SEARCH_WORKERS, MAX_PAGES
+    for name, value in (("--rate", rate), ("--workers", workers), ("--pool-size", pool_size), ("--max-pages", max_pages)):
+        if value is not None and value <= 0:
+            raise ValueError(f"{name} 必须大于 0，当前为 {value}")
+    if rate is not None:
+        RATE_LIMITER.set_default_rate(rate)
+        print(f"每个主机的请求速率已设置为 {rate} 次/秒")
+    if workers is not None:
+        SEARCH_WORKERS = workers
+    if pool_size is not None:
+        configure_client(pool_size=pool_size, timeout=TIMEOUT)
+    if max_pages is not None:
+        MAX_PAGES = max_pages
+    if sources:
+        set_enabled_sources(sources)
+
+def generate_all_reports(topic_ids=None):
+    """一次爬取所有（或指定的）主题，共享搜索结果、连接池和缓存，为每个主题各生成一份日报"""
+    topic_ids = list(topic_ids or TOPICS)
+    # 各主题共享同一次抓取，每份日报的运行指标都包含这次抓取
+    metrics_since = METRICS.snapshot()
+    # 流式流水线：搜索期间提前补全一定入选的文章摘要，各主题共用同一个补全线程池
+    prefetcher = SummaryPrefetcher() if STREAMING_PIPELINE else None
+    try:
+        with METRICS.span("report.fetch"):
+            topic_news = fetch_multi_topic_news(topic_ids, prefetcher)
+        enrich = prefetcher.enrich if prefetcher else None
+        with hold_notifications():
+            return [generate_daily_report(topic_id, topic_news[topic_id], metrics_since, enrich=enrich)
+                    for topic_id in topic_ids]
+    finally:
+        if prefetcher:
+            prefetcher.close()
+
+_work_queue = None
+
+def get_work_queue():
+    """获取分布式爬取的任务队列"""
+    global _work_queue
+    if _work_queue is None:
+        _work_queue = TaskQueue(WORK_QUEUE_PATH or os.path.join(DATA_DIR, WORK_QUEUE_FILE))
+    return _work_queue
+
+def use_shared_rate_limit():
+    """把按主机限速换成保存在任务队列数据库中的共享令牌桶，所有协调和工作进程合计限速"""
+    global RATE_LIMITER, _throttle
+    if not isinstance(RATE_LIMITER, SharedHostRateLimiter):
+        RATE_LIMITER = SharedHostRateLimiter(
+            get_work_queue().path, RATE_LIMITER.default_rate, RATE_LIMITER.default_burst, RATE_LIMITER.host_rates
+        )
+        # 节流器需要调整新的限速器，下次使用时从状态文件重新创建
+        save_throttle_state()
+        _throttle = None
+
+def search_task(payload):
+    """搜索任务：在指定的（未指定时为所有启用的）来源中搜索一个关键词，返回新闻字典列表"""
+    keyword = payload["keyword"]
+    return [item.to_dict() for item in search_sources([keyword], payload.get("sources"))[keyword]]
+
+def wechat_page_task(payload):
+    """翻页任务：抓取一个关键词的一页搜狗微信搜索结果，是否继续翻页由协调进程决定"""
+    try:
+        return [item.to_dict() for item in search_wechat_keyword(payload["keyword"], payload["page"])]
+    finally:
+        save_throttle_state()
+
+def summary_task(payload):
+    """摘要任务：抓取一篇文章的摘要"""
+    return summarize_article(payload["url"])
+
+# 任务类型 -> 处理函数，参数和返回值都需可序列化为JSON
+TASK_HANDLERS = {
+    "search": search_task,
+    "wechat_page": wechat_page_task,
+    "summary": summary_task,
+}
+
+def process_task(queue, worker):
+    """领取并执行一个任务，没有可领取的任务时返回 False"""
+    task = queue.claim(worker, list(TASK_HANDLERS))
+    if task is None:
+        return False
+    kind = task["kind"]
+    try:
+        with METRICS.span("queue.task", kind=kind):
+            result = TASK_HANDLERS[kind](task["payload"])
+    except Exception as e:
+        print(f"执行任务 {kind}:{task['key']} 出错（第{task['attempts']}次）: {e}")
+        METRICS.incr("queue_tasks", kind=kind, result="failed")
+        queue.fail(task["id"], e)
+    else:
+        METRICS.incr("queue_tasks", kind=kind, result="done")
+        queue.complete(task["id"], result)
+    return True
+
+def run_worker(name=None, threads=None, idle_exit=None):
+    """
+    工作进程：从任务队列领取任务执行，直到被中断；
+    idle_exit 不为空时，连续这么多秒没有任务后退出（用于测试和批处理）
+    """
+    queue = get_work_queue()
+    use_shared_rate_limit()
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    threads = threads or WORKER_THREADS
+    print(f"工作进程 {name} 已启动（{threads} 个线程），任务队列: {queue.path}")
+    stop = threading.Event()
     
-    # 添加每条新闻
-    for i, item in enumerate(news_items, 1):
-        summary = item.summary[:100] + "..." if item.summary and len(item.summary) > 100 else (item.summary or "无摘要")
-        content += f"{i}. [{item.title}]({item.url}) | 来源: {item.source} | 热度: {item.heat_score}\n"
-        content += f"   > {summary}\n\n"
+    def loop(index):
+        idle_since = time.monotonic()
+        delay = 0.05
+        while not stop.is_set():
+            if process_task(queue, f"{name}#{index}"):
+                idle_since = time.monotonic()
+                delay = 0.05
+            elif idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                return
+            else:
+                # 刚空闲时频繁查看（协调进程很快会加入摘要任务），之后逐渐放慢到 WORKER_POLL_INTERVAL
+                stop.wait(delay)
+                delay = min(delay * 2, WORKER_POLL_INTERVAL)
     
-    # 添加日报生成时间
-    content += f"\n\n---\n*日报生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*"
+    workers = [threading.Thread(target=loop, args=(i,), name=f"worker-{i}", daemon=True) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    try:
+        for thread in workers:
+            while thread.is_alive():
+                thread.join(1)
+    except KeyboardInterrupt:
+        print("工作进程已停止")
+        stop.set()
+
+def wait_for_tasks(queue, run_id, kind, timeout):
+    """
+    等待本次运行中某类任务全部结束，返回是否在时限内完成；等待期间协调进程也领取任务执行。
+    超时后剩余的任务标记为已取消，工作进程不再为已经放弃的运行执行它们
+    """
+    deadline = time.monotonic() + timeout
+    while queue.unfinished(run_id, kind):
+        if time.monotonic() >= deadline:
+            cancelled = queue.cancel(run_id, kind)
+            print(f"{cancelled} 个{kind}任务未在 {timeout:g} 秒内完成，已取消，使用已完成的结果")
+            return False
+        if not (COORDINATOR_WORKS and process_task(queue, f"coordinator:{os.getpid()}")):
+            time.sleep(min(WORKER_POLL_INTERVAL, 0.05))
+    return True
+
+def page_wechat_via_queue(queue, run_id, groups, deadline):
+    """
+    按轮次把搜狗微信的翻页作为任务放入队列：每轮加入各分组仍需翻页的关键词的下一页，全部完成后
+    与单进程的 search_keywords 一样用分组共享的 PageDepthTracker 决定哪些关键词继续翻页。
+    返回 {分组前缀: {关键词: 新闻列表}}；同一关键词的同一页在不同分组间只抓取一次
+    """
+    results = {prefix: {keyword: [] for keyword in keywords} for prefix, keywords in groups}
+    trackers = {prefix: PageDepthTracker() for prefix, _ in groups}
+    active = dict(groups)
+    page = 1
+    while any(active.values()):
+        for keywords in active.values():
+            for keyword in keywords:
+                queue.put(run_id, "wechat_page", f"{page}|{keyword}", {"keyword": keyword, "page": page})
+        if not wait_for_tasks(queue, run_id, "wechat_page", max(deadline - time.monotonic(), 0)):
+            break
+        done = queue.results(run_id, "wechat_page")
+        for prefix, keywords in active.items():
+            next_active = []
+            for keyword in keywords:
+                news_items = [NewsItem.from_dict(fields) for fields in done.get(f"{page}|{keyword}", [])]
+                results[prefix][keyword].extend(news_items)
+                if trackers[prefix].observe(news_items) and page < MAX_PAGES:
+                    next_active.append(keyword)
+            active[prefix] = next_active
+        page += 1
+    # 超时放弃时，已完成的页面仍然使用
+    done = queue.results(run_id, "wechat_page")
+    for prefix, keywords in active.items():
+        for keyword in keywords:
+            results[prefix][keyword].extend(
+                NewsItem.from_dict(fields) for fields in done.get(f"{page}|{keyword}", [])
+            )
+    return results
+
+def fetch_distributed_news(queue, run_id, topic_ids):
+    """
+    把各主题的关键词放入队列：搜狗微信按轮次翻页（page_wechat_via_queue），其他来源每个关键词一个搜索任务；
+    等待完成后合并结果并分配给各主题
+    """
+    deadline = time.monotonic() + QUEUE_WAIT_TIMEOUT
+    groups = []
+    for sources, group in source_groups(topic_ids):
+        keywords = list(dict.fromkeys(k for topic_id in group for k in TOPICS[topic_id].keywords))
+        names = [source.name for source in enabled_sources(sources)]
+        # 使用不同新闻来源的主题各自搜索同一个关键词
+        prefix = ",".join(sources) + "|" if sources else ""
+        others = [name for name in names if name != "wechat"]
+        if others:
+            for keyword in keywords:
+                queue.put(run_id, "search", prefix + keyword, {"keyword": keyword, "sources": others})
+        groups.append((prefix, keywords, group, "wechat" in names))
+    total = sum(len(keywords) for _, keywords, _, _ in groups)
+    print(f"已加入 {total} 个关键词的搜索任务（运行 {run_id}），等待工作进程完成...")
+    # 其他来源的搜索任务与翻页并行执行
+    paged = page_wechat_via_queue(
+        queue, run_id, [(prefix, keywords) for prefix, keywords, _, wechat in groups if wechat], deadline
+    )
+    wait_for_tasks(queue, run_id, "search", max(deadline - time.monotonic(), 0))
     
-    # 发送到Server酱
-    server_url = f"https://sctapi.ftqq.com/{SERVERCHAN_SEND_KEY}.send"
-    payload = {
-        "title": title,
-        "desp": content
-    }
+    done = queue.results(run_id, "search")
+    topic_news = {}
+    for prefix, keywords, group, _ in groups:
+        results = {
+            keyword: paged.get(prefix, {}).get(keyword, [])
+            + [NewsItem.from_dict(fields) for fields in done.get(prefix + keyword, [])]
+            for keyword in keywords
+        }
+        topic_news.update(assign_topic_news(keywords, results, group))
+    return topic_news
+
+def enrich_via_queue(queue, run_id, news_items, deadline=None):
+    """把需要补全摘要的文章作为任务放入队列，超过时限仍未完成的条目保留搜索页的摘要"""
+    pending = [item for item in news_items if needs_summary(item)]
+    if not pending:
+        return
+    for item in pending:
+        queue.put(run_id, "summary", item.url, {"url": item.url})
+    wait_for_tasks(queue, run_id, "summary", deadline or ENRICH_DEADLINE)
+    summaries = queue.results(run_id, "summary")
+    for item in pending:
+        if summaries.get(item.url):
+            item.summary = summaries[item.url]
+
+def run_distributed(topic_id):
+    """协调进程：通过任务队列完成搜索和摘要抓取，排名、CSV和推送仍按 generate_daily_report 进行"""
+    topic_ids = list(TOPICS) if topic_id == ALL_TOPICS else [topic_id]
+    queue = get_work_queue()
+    use_shared_rate_limit()
+    queue.purge(time.time() - QUEUE_RETENTION)
+    run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
     
+    metrics_since = METRICS.snapshot()
     try:
-        response = requests.post(server_url, data=payload)
-        result = json.loads(response.text)
-        
-        if result.get("code") == 0:
-            print("微信推送成功！")
-            return True
-        else:
-            print(f"微信推送失败: {result.get('message')}")
-            return False
-            
-    except Exception as e:
-        print(f"微信推送出错: {e}")
-        return False
+        with METRICS.span("report.fetch"):
+            topic_news = fetch_distributed_news(queue, run_id, topic_ids)
+        enrich = functools.partial(enrich_via_queue, queue, run_id)
+        with hold_notifications():
+            reports = [generate_daily_report(t, topic_news[t], metrics_since, enrich=enrich) for t in topic_ids]
+    except BaseException:
+        # 协调进程出错或被中断，本次运行剩余的任务不再执行
+        queue.cancel(run_id)
+        raise
+    return reports if topic_id == ALL_TOPICS else reports[0]
+
+def run_topic(topic_id):
+    """生成指定主题的日报，topic_id 为 ALL_TOPICS 时一次生成所有主题的日报"""
+    if DISTRIBUTED:
+        return run_distributed(topic_id)
+    if topic_id == ALL_TOPICS:
+        return generate_all_reports()
+    if STREAMING_PIPELINE:
+        return generate_all_reports([topic_id])[0]
+    return generate_daily_report(topic_id)
+
+def parse_job_spec(spec):
+    """
+    解析任务配置 主题[@HH:MM,HH:MM]，返回 (主题编号, 运行时间列表)；
+    未指定时间时运行时间列表为 None，使用主题配置中的 schedule（没有配置时为 SCHEDULE_TIMES）
+    """
+    topic_id, _, times = spec.partition("@")
+    if topic_id not in TOPICS and topic_id not in (ALL_TOPICS, EACH_TOPIC):
+        raise ValueError(f"未知的主题: {topic_id}")
+    return topic_id, times.split(",") if times else None
+
+def build_jobs(job_specs):
+    """
+    根据 [(主题编号, 运行时间列表)] 创建调度任务，主题编号为 EACH_TOPIC 时为每个主题各创建一个任务。
+    主题配置重新加载后再次调用以更新运行时间；已被删除的主题不再创建任务
+    """
+    jobs = []
+    for topic_id, times in job_specs:
+        if topic_id == ALL_TOPICS:
+            jobs.append(Job("所有主题", run_topic, times or SCHEDULE_TIMES, args=(topic_id,), timeout=JOB_TIMEOUT))
+            continue
+        topic_ids = list(TOPICS) if topic_id == EACH_TOPIC else [topic_id]
+        for topic_id in topic_ids:
+            topic = TOPICS.get(topic_id)
+            if topic is None:
+                print(f"主题 {topic_id} 不在主题配置中，不再调度")
+                continue
+            jobs.append(Job(topic.name, run_topic, times or topic.schedule or SCHEDULE_TIMES,
+                            args=(topic_id,), timeout=JOB_TIMEOUT))
+    names = [job.name for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"任务 {', '.join(duplicates)} 重复（同一主题只能用 --job 指定一次，each 已包含所有主题）")
+    return jobs
+
+def watch_topics(scheduler, job_specs, stop):
+    """定期检查主题配置目录，有变化时重新编译变化的主题，并按新的运行时间更新定时任务"""
+    while not stop.wait(TOPIC_RELOAD_INTERVAL):
+        try:
+            changed = reload_topics()
+            if not changed:
+                continue
+            print(f"主题配置已更新: {', '.join(sorted(changed))}")
+            scheduler.set_jobs(build_jobs(job_specs))
+        except Exception as e:
+            print(f"重新加载主题配置出错，保留原来的定时任务: {e}")
 
-def run_daily(topic_id=DEFAULT_TOPIC, send_key=None):
-    """设置每天定时运行"""
+def run_daily(topic_id=DEFAULT_TOPIC, send_key=None, times=None, job_specs=None):
+    """
+    常驻运行，每天定时生成日报。
+    job_specs 为 [(主题编号, 运行时间列表)]，可同时调度多个主题；未指定时按 topic_id 和 times 调度一个主题。
+    """
     if send_key:
         global SERVERCHAN_SEND_KEY
         SERVERCHAN_SEND_KEY = send_key
         print(f"Server酱SendKey已设置")
     
-    print(f"已设置每天早上8:00自动生成{TOPICS[topic_id]['name']}日报...")
-    schedule.every().day.at("08:00").do(generate_daily_report, topic_id)
+    # 启动推送队列，继续发送上次退出前未发送完的通知
+    get_notifier()
+    
+    # 常驻进程预先加载分词词典，之后每次生成日报不再有加载开销
+    if TAGGING:
+        tagging.get_jieba()
+    
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+        print(f"运行指标接口: http://127.0.0.1:{METRICS_PORT}/metrics")
     
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    job_specs = job_specs or [(topic_id, times)]
+    scheduler = Scheduler(
+        build_jobs(job_specs),
+        os.path.join(DATA_DIR, SCHEDULER_STATE_FILE),
+        workers=SCHEDULER_WORKERS,
+    )
+    # 主题配置修改后自动生效，不需要重启
+    stop_watching = threading.Event()
+    threading.Thread(
+        target=watch_topics, args=(scheduler, job_specs, stop_watching), name="topic-watcher", daemon=True
+    ).start()
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("定时任务已停止")
+        scheduler.stop()
+    finally:
+        stop_watching.set()
 
 def run_now(topic_id=DEFAULT_TOPIC, send_key=None):
     """立即运行一次"""
@@ -723,39 +1861,131 @@ def run_now(topic_id=DEFAULT_TOPIC, send_key=None):
         SERVERCHAN_SEND_KEY = send_key
         print(f"Server酱SendKey已设置")
     
-    generate_daily_report(topic_id)
+    try:
+        run_topic(topic_id)
+    finally:
+        # 进程即将退出，等待队列中的通知发送完成
+        flush_notifications()
 
-if __name__ == "__main__":
+def main(argv=None):
+    """命令行入口"""
+    global SKIP_SEEN, JOB_TIMEOUT, WECOM_WEBHOOKS, NOTIFY_WEBHOOKS, METRICS_PORT, TAGGING, ADAPTIVE_THROTTLE
+    global STREAMING_PIPELINE, REPORT_FORMATS
+    global DISTRIBUTED, WORK_QUEUE_PATH
     parser = argparse.ArgumentParser(description="自动生成特定主题的日报并推送到微信")
     
     # 创建互斥组，确保--now和--schedule不能同时使用
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--now", action="store_true", help="立即运行一次")
     group.add_argument("--schedule", action="store_true", help="设置每天自动运行")
+    group.add_argument("--worker", action="store_true", help="作为分布式爬取的工作进程运行，从任务队列领取任务")
     
     # 添加主题选择参数
-    parser.add_argument("--topic", choices=["1", "2"], default=DEFAULT_TOPIC, 
-                      help="选择主题: 1=大模型, 2=凝血抗凝")
+    parser.add_argument("--topic", default=DEFAULT_TOPIC,
+                      help="选择主题编号（见主题配置目录，默认 1=大模型, 2=凝血抗凝），all=一次爬取所有主题")
+    parser.add_argument("--topic-dir", metavar="DIR", help="主题配置目录，默认为程序目录下的 topics/")
     
     # 添加Server酱SendKey参数
     parser.add_argument("--sendkey", type=str, help="Server酱SendKey，用于推送到微信")
+    parser.add_argument("--wecom-webhook", action="append", metavar="URL", help="企业微信群机器人Webhook地址，可重复指定")
+    parser.add_argument("--webhook", action="append", metavar="URL",
+                        help="通用Webhook地址（POST JSON {title, content}），可重复指定")
     
-    args = parser.parse_args()
+    # 添加抓取速率参数
+    parser.add_argument("--rate", type=float, help=f"每个主机的请求速率（次/秒），默认{HOST_RATE}")
+    parser.add_argument("--workers", type=int, help=f"并发搜索线程数，默认{SEARCH_WORKERS}")
+    parser.add_argument("--pool-size", type=int, help="每个主机的HTTP连接池大小")
+    parser.add_argument("--sources", type=lambda value: value.split(","),
+                        help="启用的新闻来源，逗号分隔，可选 wechat,baidu,sina，默认全部启用")
+    parser.add_argument("--max-pages", type=int, help=f"每个关键词最多抓取的搜索结果页数，默认{MAX_PAGES}")
+    parser.add_argument("--parser", choices=html_parser.BACKENDS, help="HTML解析后端，默认优先使用lxml")
+    parser.add_argument("--include-seen", action="store_true", help="不跳过往期日报中已报道过的文章")
+    parser.add_argument("--no-tagging", action="store_true", help="不提取关键词标签，热度不按主题相关度加分")
+    parser.add_argument("--no-throttle", action="store_true",
+                        help="不使用反爬自适应节流，按固定速率请求搜狗并每次随机选择User-Agent")
+    parser.add_argument("--streaming", action="store_true",
+                        help="使用流式流水线，搜索期间提前补全一定入选的文章摘要（默认所有关键词搜索完成后再补全）")
+    parser.add_argument("--formats", type=lambda value: value.split(","),
+                        help=f"日报输出格式，逗号分隔，可选 {','.join(RENDERERS)}，默认全部（CSV总会写出）")
+    parser.add_argument("--import-reports", action="store_true", help="把日报目录下已有的CSV日报导入历史库后退出")
+    parser.add_argument("--at", action="append", metavar="HH:MM",
+                        help="与--schedule一起使用：每天的运行时间，可重复指定，默认08:00")
+    parser.add_argument("--job", action="append", metavar="TOPIC[@HH:MM,...]",
+                        help="与--schedule一起使用：调度一个主题（可重复指定），如 1@08:00 或 2@08:00,20:00；"
+                             "不写时间时使用主题配置中的 schedule；each 为每个主题按各自的 schedule 分别调度")
+    parser.add_argument("--job-timeout", type=int, help=f"定时任务的超时时间（秒），默认{JOB_TIMEOUT}")
+    parser.add_argument("--distributed", action="store_true",
+                        help="与--now或--schedule一起使用：作为协调进程，把搜索和摘要任务放入队列由工作进程执行")
+    parser.add_argument("--queue", metavar="PATH",
+                        help=f"分布式爬取的任务队列文件，默认 {os.path.join(DATA_DIR, WORK_QUEUE_FILE)}")
+    parser.add_argument("--worker-threads", type=int, help=f"每个工作进程同时执行的任务数，默认{WORKER_THREADS}")
+    parser.add_argument("--metrics-port", type=int, help="与--schedule一起使用：在该端口提供Prometheus格式的 /metrics 接口")
     
-    if args.now:
+    args = parser.parse_args(argv)
+    if args.topic_dir:
+        load_topics(args.topic_dir)
+    if args.topic not in TOPICS and args.topic != ALL_TOPICS:
+        parser.error(f"未知的主题: {args.topic}，可选 {', '.join(list(TOPICS) + [ALL_TOPICS])}")
+    try:
+        configure_fetch(args.rate, args.workers, args.pool_size, args.max_pages, args.sources)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.parser:
+        html_parser.set_backend(args.parser)
+    if args.include_seen:
+        SKIP_SEEN = False
+    if args.no_tagging:
+        TAGGING = False
+    if args.no_throttle:
+        ADAPTIVE_THROTTLE = False
+    if args.streaming:
+        STREAMING_PIPELINE = True
+    if args.formats:
+        unknown = [name for name in args.formats if name not in RENDERERS]
+        if unknown:
+            parser.error(f"未知的日报格式: {', '.join(unknown)}（可用: {', '.join(RENDERERS)}）")
+        REPORT_FORMATS = tuple(args.formats)
+    if args.job_timeout:
+        JOB_TIMEOUT = args.job_timeout
+    if args.metrics_port:
+        METRICS_PORT = args.metrics_port
+    if args.distributed:
+        DISTRIBUTED = True
+    if args.queue:
+        WORK_QUEUE_PATH = args.queue
+    if args.wecom_webhook:
+        WECOM_WEBHOOKS = WECOM_WEBHOOKS + args.wecom_webhook
+    if args.webhook:
+        NOTIFY_WEBHOOKS = NOTIFY_WEBHOOKS + args.webhook
+    try:
+        job_specs = [parse_job_spec(spec) for spec in args.job or []]
+        build_jobs(job_specs or [(args.topic, args.at)])  # 检查运行时间格式
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.import_reports:
+        import_reports()
+    elif args.worker:
+        run_worker(threads=args.worker_threads)
+    elif args.now:
         run_now(args.topic, args.sendkey)
     elif args.schedule:
-        run_daily(args.topic, args.sendkey)
+        run_daily(args.topic, args.sendkey, times=args.at, job_specs=job_specs)
     else:
         print("自动新闻日报生成工具")
         print("\n用法:")
-        print("  立即生成一次: python news_crawler.py --now [--topic {1,2}] [--sendkey YOUR_SENDKEY]")
-        print("  设置每天自动运行: python news_crawler.py --schedule [--topic {1,2}] [--sendkey YOUR_SENDKEY]")
+        print("  立即生成一次: python news_crawler.py --now [--topic 主题编号] [--sendkey YOUR_SENDKEY]")
+        print("  设置每天自动运行: python news_crawler.py --schedule [--topic 主题编号] [--sendkey YOUR_SENDKEY]")
+        print("  一次生成所有主题: python news_crawler.py --now --topic all")
+        print("  分布式爬取: python news_crawler.py --worker（多个进程） + python news_crawler.py --now --distributed")
         print("\n主题选项:")
         for key, value in TOPICS.items():
-            print(f"  {key} = {value['name']}")
+            print(f"  {key} = {value.name}")
         print("\n示例:")
         print("  python news_crawler.py --now --topic 1 --sendkey YOUR_SENDKEY")
         
         # 默认行为：立即运行一次
-        run_now(DEFAULT_TOPIC) 
\ No newline at end of file
+        run_now(DEFAULT_TOPIC)
+
+if __name__ == "__main__":
+    main()
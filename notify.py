@@ -0,0 +1,411 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+异步通知队列：日报推送不再阻塞日报生成。
+
+通知先写入SQLite队列再由后台线程发送，进程重启后未发送的通知会继续发送；
+发送失败按指数退避重试；同一批次（例如同一天的多个主题日报）的通知在支持合并的渠道上合并为一条消息；
+每条通知会发送到所有配置的渠道（Server酱、企业微信群机器人、通用Webhook），各渠道独立重试。
+连续生成多份日报时用 hold() 暂缓发送，全部加入队列后再一起合并发送。
+渠道名称中不包含Webhook地址（地址中带有密钥），日志和队列数据库中只出现地址的哈希。
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from http_client import get_client
+
+# 新通知等待同批次其他通知的时间（秒），之后合并发送
+DEFAULT_BATCH_WINDOW = 5.0
+# 最多发送次数，超过后标记为失败不再重试
+DEFAULT_MAX_ATTEMPTS = 6
+# 重试退避：第n次失败后等待 min(BACKOFF_BASE * 2^(n-1), BACKOFF_MAX) 秒，再加上随机抖动
+BACKOFF_BASE = 30
+BACKOFF_MAX = 30 * 60
+# 发送请求的超时（秒）
+SEND_TIMEOUT = 10
+# hold() 期间加入的通知最长暂缓时间（秒）：进程在释放前退出时，重启后仍会发送
+HOLD_MAX = 2 * 3600
+
+
+def url_label(prefix, url):
+    """渠道名称：前缀加上地址的哈希，不暴露地址中的密钥"""
+    return f"{prefix}:{hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]}"
+
+
+def split_text(text, limit):
+    """把正文拆成不超过 limit 个字符的若干段，尽量在空行或换行处拆分"""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip("\n")
+    parts.append(text)
+    return parts
+
+
+class NotifyError(Exception):
+    """渠道发送失败"""
+
+
+class Channel:
+    """
+    推送渠道，子类实现 send(title, body)，失败时抛出 NotifyError；
+    单条消息有长度限制的渠道实现 split(title, body)，把一条通知拆成多条消息依次发送
+    """
+
+    # 是否可以把同一批次的多条通知合并为一条消息
+    batchable = True
+    # 标题和正文的最大长度（字符），合并后超出时拆成多条消息
+    max_title = 100
+    max_body = 30000
+
+    def __init__(self, name, timeout=SEND_TIMEOUT, aliases=()):
+        self.name = name
+        self.timeout = timeout
+        # 旧版本使用的渠道名称，队列中这些名称下的通知改归本渠道
+        self.aliases = tuple(aliases)
+
+    def merge(self, messages):
+        """把 [(标题, 正文)] 合并为一条消息"""
+        if len(messages) == 1:
+            return messages[0]
+        title = " / ".join(title for title, _ in messages)
+        if len(title) > self.max_title:
+            title = title[:self.max_title - 3] + "..."
+        body = "\n\n---\n\n".join(body for _, body in messages)
+        return title, body
+
+    def split(self, title, body):
+        """把一条通知拆成 [(标题, 正文)] 多条消息，默认不拆分"""
+        return [(title, body)]
+
+    def send(self, title, body):
+        raise NotImplementedError
+
+    def _post(self, url, **kwargs):
+        try:
+            response = get_client().post(url, timeout=self.timeout, **kwargs)
+        except Exception as e:
+            # 异常信息中带有请求地址（可能含密钥），只保留异常类型
+            raise NotifyError(f"请求失败: {type(e).__name__}")
+        if not 200 <= response.status_code < 300:
+            raise NotifyError(f"HTTP {response.status_code}")
+        return response
+
+
+class ServerChanChannel(Channel):
+    """Server酱微信推送"""
+
+    max_title = 32
+    max_body = 30000
+
+    def __init__(self, send_key, url=None, timeout=SEND_TIMEOUT):
+        super().__init__("serverchan", timeout)
+        self.url = url or f"https://sctapi.ftqq.com/{send_key}.send"
+
+    def send(self, title, body):
+        response = self._post(self.url, data={"title": title, "desp": body})
+        try:
+            result = json.loads(response.text)
+        except ValueError:
+            raise NotifyError("返回内容不是JSON")
+        if result.get("code") != 0:
+            raise NotifyError(result.get("message") or f"错误码 {result.get('code')}")
+
+
+class WeComChannel(Channel):
+    """企业微信群机器人（Markdown消息）"""
+
+    # 企业微信Markdown消息最长4096字节，按字符保守估计；更长的正文拆成多条消息发送
+    max_body = 1300
+
+    def __init__(self, webhook_url, timeout=SEND_TIMEOUT):
+        super().__init__(url_label("wecom", webhook_url), timeout, aliases=[f"wecom:{webhook_url}"])
+        self.url = webhook_url
+
+    def split(self, title, body):
+        if len(title) > self.max_title:
+            title = title[:self.max_title - 3] + "..."
+        # 留出标题和 (序号/总数) 的长度
+        parts = split_text(body, self.max_body - len(title) - 20)
+        if len(parts) == 1:
+            return [(title, body)]
+        return [(f"{title} ({index}/{len(parts)})", part) for index, part in enumerate(parts, 1)]
+
+    def send(self, title, body):
+        content = f"**{title}**\n\n{body}"
+        response = self._post(self.url, json={"msgtype": "markdown", "markdown": {"content": content}})
+        try:
+            result = json.loads(response.text)
+        except ValueError:
+            raise NotifyError("返回内容不是JSON")
+        if result.get("errcode") != 0:
+            raise NotifyError(result.get("errmsg") or f"错误码 {result.get('errcode')}")
+
+
+class WebhookChannel(Channel):
+    """通用Webhook：POST JSON {"title": 标题, "content": Markdown正文}，返回2xx即视为成功"""
+
+    def __init__(self, url, timeout=SEND_TIMEOUT):
+        super().__init__(url_label("webhook", url), timeout, aliases=[f"webhook:{url}"])
+        self.url = url
+
+    def send(self, title, body):
+        self._post(self.url, json={"title": title, "content": body})
+
+
+class NotificationDispatcher:
+    """持久化的异步通知队列"""
+
+    def __init__(self, path, channels, batch_window=DEFAULT_BATCH_WINDOW,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        import sqlite3
+
+        self.path = path
+        self.channels = {channel.name: channel for channel in channels}
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        # flush() 期间不再等待批次窗口
+        self.flushing = False
+        # 嵌套的 hold() 层数，大于0时新通知暂不发送
+        self.holding = 0
+        self.sending = False
+        self.stopped = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS notifications (
+                id INTEGER PRIMARY KEY,
+                channel TEXT NOT NULL,
+                batch_key TEXT,
+                title TEXT NOT NULL,
+                body TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT,
+                part INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS notifications_due ON notifications(status, next_attempt);
+        """)
+        # part：拆成多条消息发送的通知中已发送成功的条数，重试时从下一条继续；旧版本的队列没有这一列
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(notifications)")]
+        if "part" not in columns:
+            self.conn.execute("ALTER TABLE notifications ADD COLUMN part INTEGER NOT NULL DEFAULT 0")
+        for channel in channels:
+            for alias in channel.aliases:
+                self.conn.execute("UPDATE notifications SET channel = ? WHERE channel = ?", (channel.name, alias))
+        self.conn.commit()
+        unknown = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT channel FROM notifications WHERE status = 'pending'"
+        ) if row[0] not in self.channels]
+        if unknown:
+            # 旧版本的渠道名称中可能带有Webhook地址，只输出数量
+            print(f"有 {len(unknown)} 个未配置的渠道还有待发送的通知，暂不发送")
+        self.thread = threading.Thread(target=self._run, name="notify", daemon=True)
+        self.thread.start()
+
+    def enqueue(self, title, body, batch_key=None):
+        """把通知加入每个渠道的发送队列，立即返回"""
+        now = time.time()
+        with self.lock:
+            window = HOLD_MAX if self.holding else self.batch_window
+            self.conn.executemany(
+                "INSERT INTO notifications (channel, batch_key, title, body, created_at, next_attempt) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(name, batch_key, title, body, now, now + window) for name in self.channels],
+            )
+            self.conn.commit()
+        self.wakeup.set()
+
+    @contextlib.contextmanager
+    def hold(self):
+        """
+        with 块内加入的通知暂不发送，退出时立即发送所有尚未首次发送的通知（同一批次合并为一条消息），
+        不等待发送完成；用于连续生成多份日报，每份之间的间隔可能比批次窗口长
+        """
+        with self.lock:
+            self.holding += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.holding -= 1
+                if not self.holding:
+                    now = time.time()
+                    self.conn.execute(
+                        "UPDATE notifications SET next_attempt = ? "
+                        "WHERE status = 'pending' AND attempts = 0 AND next_attempt > ?",
+                        (now, now),
+                    )
+                    self.conn.commit()
+            self.wakeup.set()
+
+    def pending_count(self, due_only=False):
+        """待发送的通知数；due_only 时只统计不在退避等待中的通知"""
+        sql = "SELECT COUNT(*) FROM notifications WHERE status = 'pending' AND channel IN ({})".format(
+            ",".join("?" * len(self.channels)))
+        params = list(self.channels)
+        if due_only:
+            sql += " AND attempts = 0"
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def flush(self, timeout=60):
+        """立即发送队列中的通知（不等批次窗口），等待首次发送完成或超时，返回仍待发送的通知数"""
+        self.flushing = True
+        self.wakeup.set()
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline and (self.sending or self.pending_count(due_only=True)):
+                time.sleep(0.05)
+        finally:
+            self.flushing = False
+        return self.pending_count()
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+        self.thread.join(timeout=SEND_TIMEOUT)
+
+    def _due_rows(self, now):
+        """
+        到了发送时间的通知，以及与它们同一渠道、同一批次的其他待发送通知（一起合并发送）；
+        flush 期间首次发送的通知不等待批次窗口
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, channel, batch_key, title, body, attempts, part FROM notifications AS n "
+                "WHERE status = 'pending' AND (next_attempt <= ? OR (? AND attempts = 0) "
+                "OR (batch_key IS NOT NULL AND EXISTS ("
+                "SELECT 1 FROM notifications AS d WHERE d.status = 'pending' AND d.channel = n.channel "
+                "AND d.batch_key = n.batch_key AND d.next_attempt <= ?))) "
+                "ORDER BY id",
+                (now, self.flushing, now),
+            ).fetchall()
+
+    def _next_wait(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(next_attempt) FROM notifications WHERE status = 'pending' AND channel IN ({})".format(
+                    ",".join("?" * len(self.channels))),
+                list(self.channels),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0)
+
+    def _batches(self, rows):
+        """按 (渠道, 批次) 分组，支持合并的渠道在长度限制内合并为一条消息"""
+        groups = {}
+        for row in rows:
+            row_id, channel_name, batch_key, title, body, attempts, part = row
+            channel = self.channels.get(channel_name)
+            if channel is None:
+                continue
+            # 已部分发送的通知单独继续发送，合并其他通知会改变拆分结果
+            if not channel.batchable or batch_key is None or part:
+                groups[(channel_name, ("single", row_id))] = [row]
+            else:
+                groups.setdefault((channel_name, batch_key), []).append(row)
+        for (channel_name, _), group in groups.items():
+            channel = self.channels[channel_name]
+            batch, size = [], 0
+            for row in group:
+                length = len(row[4])
+                if batch and size + length > channel.max_body:
+                    yield channel, batch
+                    batch, size = [], 0
+                batch.append(row)
+                size += length
+            yield channel, batch
+
+    def _send_batch(self, channel, batch):
+        """发送一批（合并后的）通知；拆成多条消息时记录已发送的条数，重试时不重复发送"""
+        title, body = channel.merge([(row[3], row[4]) for row in batch])
+        ids = [row[0] for row in batch]
+        parts = channel.split(title, body)
+        # 只有单独发送的通知会带有已发送条数（见 _batches）
+        sent = batch[0][6] if len(batch) == 1 else 0
+        for part_title, part_body in parts[sent:]:
+            try:
+                channel.send(part_title, part_body)
+            except Exception as e:
+                self._record_failure(channel, batch, e, sent, (title, body))
+                return
+            sent += 1
+        with self.lock:
+            self.conn.execute(
+                f"DELETE FROM notifications WHERE id IN ({','.join('?' * len(ids))})", ids)
+            self.conn.commit()
+        print(f"通知已发送（{channel.name}）: {title}")
+
+    def _record_failure(self, channel, batch, error, sent=0, merged=None):
+        """
+        记录发送失败并安排重试；sent 为已发送成功的消息条数。
+        合并发送的一批通知已发出一部分时，把这批通知替换为一条合并后的通知（merged），重试时从下一条消息继续
+        """
+        now = time.time()
+        attempts = max(row[5] for row in batch) + 1
+        if attempts >= self.max_attempts:
+            status, next_attempt = "failed", now
+            print(f"通知发送失败且不再重试（{channel.name}）: {error}")
+        else:
+            # 同一批次使用相同的重试时间，重试时仍然合并发送
+            delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+            delay *= random.uniform(1, 1.25)
+            status, next_attempt = "pending", now + delay
+            print(f"通知发送失败（{channel.name}），{delay:.0f} 秒后重试: {error}")
+        with self.lock:
+            if sent and len(batch) > 1:
+                ids = [row[0] for row in batch]
+                self.conn.execute(
+                    f"DELETE FROM notifications WHERE id IN ({','.join('?' * len(ids))})", ids)
+                # 不再属于任何批次，不与之后的通知合并
+                self.conn.execute(
+                    "INSERT INTO notifications (channel, batch_key, title, body, created_at, attempts, "
+                    "next_attempt, status, last_error, part) VALUES (?, NULL, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (channel.name, merged[0], merged[1], now, attempts, next_attempt, status, str(error), sent),
+                )
+            else:
+                self.conn.executemany(
+                    "UPDATE notifications SET status = ?, attempts = ?, next_attempt = ?, last_error = ?, "
+                    "part = ? WHERE id = ?",
+                    [(status, attempts, next_attempt, str(error), sent, row[0]) for row in batch],
+                )
+            self.conn.commit()
+
+    def _run(self):
+        while not self.stopped:
+            self.sending = True
+            try:
+                for channel, batch in self._batches(self._due_rows(time.time())):
+                    self._send_batch(channel, batch)
+            except Exception as e:
+                print(f"发送通知出错: {e}")
+            finally:
+                self.sending = False
+            if self.flushing:
+                # flush 期间只在没有新通知时才睡眠，避免错过刚加入的通知
+                self.wakeup.wait(0.05)
+            else:
+                self.wakeup.wait(self._next_wait())
+            self.wakeup.clear()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式日报流水线的通用部件：搜索结果边到达边经过各阶段，不必等所有关键词搜索完成。
+
+- EventStream：在后台线程中运行生产者（如 search_sources），把它回调产生的事件作为迭代器逐个产出；
+- RemainingBound：各 (来源, 关键词) 还可能返回的候选条数上限；
+- TopKTracker：有界的临时排名，只保存下界最高和上界最高的K个值，
+  判断哪些候选无论之后还会到达什么结果，都一定会进入最终的前K名。
+
+候选的最终得分在全部结果到达之前并不确定（如关键词标签的相关度加分要在全部候选上计算），
+因此每个候选记录得分范围 [下界, 上界]：候选 x 的下界之上（含相等）最多还有 K-1 个其他候选的上界，
+再加上尚未到达的候选条数上限仍小于 K 时，x 一定会进入前K名。
+还有整页结果未到达时这个条件很难满足，provisional() 给出当前下界最高的候选，供调用方按预算提前处理。
+"""
+
+import heapq
+import queue
+import threading
+
+_DONE = object()
+
+
+class EventStream:
+    """
+    在后台线程中运行 producer(emit)，producer 每次调用 emit(*event) 时产出一个事件元组。
+    迭代结束后 result 为 producer 的返回值；producer 抛出的异常在迭代结束时重新抛出。
+    """
+
+    def __init__(self, producer):
+        self.result = None
+        self._error = None
+        self._events = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(producer,), daemon=True)
+        self._thread.start()
+
+    def _run(self, producer):
+        try:
+            self.result = producer(self._emit)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._events.put(_DONE)
+
+    def _emit(self, *event):
+        self._events.put(event)
+
+    def __iter__(self):
+        while True:
+            event = self._events.get()
+            if event is _DONE:
+                break
+            yield event
+        if self._error is not None:
+            raise self._error
+
+
+class RemainingBound:
+    """各 (来源, 关键词) 还可能返回的候选条数上限；还没有收到过结果的为未知（None）"""
+
+    def __init__(self, sources, keywords):
+        self.bounds = {(source, keyword): None for source in sources for keyword in keywords}
+        self.finished = set()
+
+    def update(self, source, keyword, remaining):
+        """记录一次结果；keyword 为 None 表示该来源已结束（完成、出错或超时），之后的结果忽略"""
+        if source in self.finished:
+            return
+        if keyword is None:
+            self.finished.add(source)
+            for key in self.bounds:
+                if key[0] == source:
+                    self.bounds[key] = 0
+        elif (source, keyword) in self.bounds:
+            self.bounds[(source, keyword)] = remaining
+
+    def total(self):
+        """尚未到达的候选条数上限，有未知的 (来源, 关键词) 时返回 None"""
+        if any(bound is None for bound in self.bounds.values()):
+            return None
+        return sum(self.bounds.values())
+
+
+class TopKTracker:
+    """
+    有界的临时前K名：两个大小为K的小顶堆分别保存下界最高的候选和最高的K个上界。
+    同一候选多次出现（如不同关键词搜到同一篇文章）时得分范围取并集，堆中旧的条目只会使判断更保守。
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.bounds = {}   # 候选 -> (下界, 上界)
+        self.lower = []    # (下界, -序号, 候选)，下界相同时先到的优先
+        self.upper = []
+        self.certain = set()
+        self.count = 0
+
+    def update(self, key, low, high):
+        """记录候选 key 的得分范围，返回范围是否有变化"""
+        old = self.bounds.get(key)
+        if old is not None:
+            low, high = min(low, old[0]), max(high, old[1])
+            if (low, high) == old:
+                return False
+        self.bounds[key] = (low, high)
+        self.count += 1
+        entry = (low, -self.count, key)
+        if len(self.lower) < self.k:
+            heapq.heappush(self.lower, entry)
+        elif entry > self.lower[0]:
+            heapq.heapreplace(self.lower, entry)
+        if len(self.upper) < self.k:
+            heapq.heappush(self.upper, high)
+        elif high > self.upper[0]:
+            heapq.heapreplace(self.upper, high)
+        return True
+
+    def provisional(self, n=None):
+        """当前下界最高的 n 个（默认K个）候选，从高到低"""
+        keys = []
+        for _, _, key in sorted(self.lower, reverse=True):
+            if key not in keys:
+                keys.append(key)
+        keys.sort(key=lambda key: -self.bounds[key][0])
+        return keys[:n or self.k]
+
+    def settle(self, remaining):
+        """
+        remaining 为尚未到达的候选条数上限（None 表示未知），
+        返回新确定一定会进入前K名的候选列表
+        """
+        if remaining is None or remaining >= self.k:
+            return []
+        full = len(self.upper) >= self.k
+        settled = []
+        for _, _, key in sorted(self.lower, reverse=True):
+            if key in self.certain:
+                continue
+            low = self.bounds[key][0]
+            if full and self.upper[0] >= low:
+                # 至少K个候选的得分可能不低于它
+                continue
+            # 上界堆中不低于 low 的值包含候选自己的上界
+            competitors = sum(1 for high in self.upper if high >= low) - 1
+            if competitors + remaining < self.k:
+                self.certain.add(key)
+                settled.append(key)
+        return settled
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""按主机划分的令牌桶限速器，用于替代固定的 time.sleep 礼貌等待"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+# 每个主机默认的请求速率（次/秒）与突发容量
+DEFAULT_RATE = 0.25
+DEFAULT_BURST = 1
+
+
+class TokenBucket:
+    """线程安全的令牌桶，rate 为每秒补充的令牌数，burst 为桶容量"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = max(float(burst), 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的秒数（可能为0）"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 允许令牌为负数，按先来后到排队，等待时间由欠下的令牌数决定
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """阻塞直到获得一个令牌"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def set_rate(self, rate):
+        """调整补充速率，已积累的令牌保留"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+
+class HostRateLimiter:
+    """为每个主机维护独立的令牌桶，未单独配置的主机使用默认速率"""
+
+    def __init__(self, default_rate=DEFAULT_RATE, default_burst=DEFAULT_BURST, host_rates=None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        # host -> (rate, burst)
+        self.host_rates = dict(host_rates or {})
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def configure(self, host, rate, burst=None):
+        """设置某个主机的请求速率"""
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        with self.lock:
+            self.host_rates[host] = (rate, burst if burst is not None else self.default_burst)
+            bucket = self.buckets.get(host)
+        if bucket is not None:
+            bucket.set_rate(rate)
+
+    def set_default_rate(self, rate):
+        """修改默认速率，同时更新未单独配置的主机的令牌桶"""
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        with self.lock:
+            self.default_rate = rate
+            buckets = [b for h, b in self.buckets.items() if h not in self.host_rates]
+        for bucket in buckets:
+            bucket.set_rate(rate)
+
+    def bucket_for(self, host):
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                rate, burst = self.host_rates.get(host, (self.default_rate, self.default_burst))
+                bucket = TokenBucket(rate, burst)
+                self.buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url_or_host):
+        """在访问某个URL（或主机）前调用，阻塞到该主机有可用配额"""
+        host = urlsplit(url_or_host).netloc if "//" in url_or_host else url_or_host
+        return self.bucket_for(host).acquire()
+
+
+class SharedHostRateLimiter:
+    """
+    多进程共享的按主机令牌桶：桶的状态保存在SQLite中，所有使用同一数据库文件的进程
+    （分布式爬取的协调进程和工作进程）合起来不超过每个主机的速率。接口与 HostRateLimiter 相同。
+    各进程应使用相同的速率配置；跨机器共享时依赖各机器的时钟同步。
+    """
+
+    def __init__(self, path, default_rate=DEFAULT_RATE, default_burst=DEFAULT_BURST, host_rates=None):
+        import sqlite3
+
+        if default_rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.default_rate = float(default_rate)
+        self.default_burst = default_burst
+        self.host_rates = dict(host_rates or {})
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS host_buckets (
+                host TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+        """)
+
+    def configure(self, host, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        with self.lock:
+            self.host_rates[host] = (rate, burst if burst is not None else self.default_burst)
+
+    def set_default_rate(self, rate):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        with self.lock:
+            self.default_rate = float(rate)
+
+    def reserve(self, host):
+        """在共享的桶中预约一个令牌，返回需要等待的秒数（可能为0）"""
+        with self.lock:
+            rate, burst = self.host_rates.get(host, (self.default_rate, self.default_burst))
+            capacity = max(float(burst), 1.0)
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self.conn.execute(
+                    "SELECT tokens, updated FROM host_buckets WHERE host = ?", (host,)
+                ).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + max(now - row[1], 0) * rate)
+                tokens -= 1
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO host_buckets (host, tokens, updated) VALUES (?, ?, ?)",
+                    (host, tokens, now),
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return 0.0 if tokens >= 0 else -tokens / rate
+
+    def acquire(self, url_or_host):
+        """在访问某个URL（或主机）前调用，阻塞到该主机在所有进程中都有可用配额"""
+        host = urlsplit(url_or_host).netloc if "//" in url_or_host else url_or_host
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+日报渲染：排好序的新闻条目只序列化一次，得到与格式无关的记录（ReportRecord），
+再一次遍历记录同时写出所有格式：
+
+- csv：日期、标题、内容摘要、信息来源、URL、热度、关键词（与往期日报的格式相同）；
+- jsonl：每行一条JSON记录；
+- md：Markdown，也用作微信推送的正文；
+- html：不依赖外部资源的静态页面。
+
+每种格式先写入同目录下的临时文件（带写缓冲），全部写完后再逐个替换为正式文件，
+常驻进程在写日报时出错或被终止也不会在日报目录中留下写了一半的文件。
+"""
+
+import contextlib
+import csv
+import html
+import io
+import json
+import os
+
+# 每个输出文件的写缓冲大小（字节）
+WRITE_BUFFER = 64 * 1024
+# Markdown 中摘要的最大长度（字符）
+MARKDOWN_SUMMARY_CHARS = 100
+
+CSV_HEADER = ['日期', '标题', '内容摘要', '信息来源', 'URL', '热度', '关键词']
+
+# 换行替换为空格、去掉回车，保证每条记录在CSV和Markdown中都只占一行
+_LINE_BREAKS = str.maketrans({"\n": " ", "\r": None})
+
+
+def _clean(text):
+    return text.translate(_LINE_BREAKS) if text else ""
+
+
+class ReportRecord:
+    """日报中的一条新闻，各字段已清理好，所有格式共用"""
+
+    __slots__ = ("rank", "date", "title", "summary", "source", "url", "heat", "tags")
+
+    def __init__(self, rank, date, title, summary, source, url, heat, tags):
+        self.rank = rank
+        self.date = date
+        self.title = title
+        self.summary = summary
+        self.source = source
+        self.url = url
+        self.heat = heat
+        self.tags = tags
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def build_records(news_items, date):
+    """把排好序的新闻条目（NewsItem）转换为日报记录"""
+    return [
+        ReportRecord(
+            rank=rank,
+            date=date,
+            title=_clean(item.title),
+            summary=_clean(item.summary),
+            source=_clean(item.source),
+            url=item.url,
+            heat=item.heat_score,
+            tags=list(item.tags or ()),
+        )
+        for rank, item in enumerate(news_items, 1)
+    ]
+
+
+class Renderer:
+    """一种输出格式：begin() 写文件头，write(record) 写一条记录，end() 写文件尾"""
+
+    def __init__(self, f, title, generated_at):
+        self.f = f
+        self.title = title
+        self.generated_at = generated_at
+
+    def begin(self):
+        pass
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+
+class CsvRenderer(Renderer):
+    def begin(self):
+        self.writer = csv.writer(self.f, quoting=csv.QUOTE_MINIMAL)
+        self.writer.writerow(CSV_HEADER)
+
+    def write(self, record):
+        self.writer.writerow([record.date, record.title, record.summary, record.source,
+                              record.url, record.heat, "、".join(record.tags)])
+
+
+class JsonLinesRenderer(Renderer):
+    def write(self, record):
+        self.f.write(json.dumps(record.to_dict(), ensure_ascii=False))
+        self.f.write("\n")
+
+
+class MarkdownRenderer(Renderer):
+    def begin(self):
+        self.f.write(f"# {self.title}\n\n## 今日热点新闻：\n\n")
+
+    def write(self, record):
+        summary = record.summary or "无摘要"
+        if len(summary) > MARKDOWN_SUMMARY_CHARS:
+            summary = summary[:MARKDOWN_SUMMARY_CHARS] + "..."
+        tags = f" | 关键词: {'、'.join(record.tags)}" if record.tags else ""
+        self.f.write(f"{record.rank}. [{record.title}]({record.url}) | 来源: {record.source} | "
+                     f"热度: {record.heat}{tags}\n   > {summary}\n\n")
+
+    def end(self):
+        self.f.write(f"\n\n---\n*日报生成时间: {self.generated_at}*")
+
+
+class HtmlRenderer(Renderer):
+    def begin(self):
+        title = html.escape(self.title)
+        self.f.write(
+            '<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{title}</title>\n"
+            "<style>body{max-width:48em;margin:2em auto;padding:0 1em;font-family:sans-serif;line-height:1.6}"
+            "li{margin-bottom:1em}.meta{color:#666;font-size:.9em}blockquote{margin:.3em 0;color:#333}</style>\n"
+            f"</head>\n<body>\n<h1>{title}</h1>\n<ol>\n"
+        )
+
+    def write(self, record):
+        tags = f" | 关键词: {html.escape('、'.join(record.tags))}" if record.tags else ""
+        self.f.write(
+            f'<li><a href="{html.escape(record.url)}">{html.escape(record.title)}</a>\n'
+            f'<div class="meta">来源: {html.escape(record.source)} | 热度: {record.heat}{tags}</div>\n'
+            f"<blockquote>{html.escape(record.summary or '无摘要')}</blockquote></li>\n"
+        )
+
+    def end(self):
+        self.f.write(f"</ol>\n<p class=\"meta\">日报生成时间: {html.escape(self.generated_at)}</p>\n</body>\n</html>\n")
+
+
+# 格式名（同时是文件扩展名） -> 渲染器
+RENDERERS = {
+    "csv": CsvRenderer,
+    "jsonl": JsonLinesRenderer,
+    "md": MarkdownRenderer,
+    "html": HtmlRenderer,
+}
+
+
+def _tmp_path(path):
+    # 多个进程可能同时写同一份日报，各自使用不同的临时文件；扩展名为 .tmp，不会被当作CSV日报读取
+    return f"{path}.{os.getpid()}.tmp"
+
+
+@contextlib.contextmanager
+def atomic_open(path, buffering=WRITE_BUFFER):
+    """写入同目录下的临时文件，正常退出时替换为 path，出错时删除临时文件"""
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8", buffering=buffering) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def write_report(records, base_path, formats, title, generated_at):
+    """
+    把日报记录写为 base_path + "." + 格式 的各个文件，返回 {格式: 路径}。
+    所有格式在同一次遍历中写出，全部写完后才替换正式文件；出错时不修改任何正式文件。
+    """
+    unknown = [name for name in formats if name not in RENDERERS]
+    if unknown:
+        raise ValueError(f"未知的日报格式: {', '.join(unknown)}（可用: {', '.join(RENDERERS)}）")
+    paths = {name: f"{base_path}.{name}" for name in formats}
+    with contextlib.ExitStack() as stack:
+        renderers = []
+        tmp_paths = []
+        try:
+            for name, path in paths.items():
+                tmp_path = _tmp_path(path)
+                f = stack.enter_context(open(tmp_path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER))
+                tmp_paths.append(tmp_path)
+                renderers.append(RENDERERS[name](f, title, generated_at))
+            for renderer in renderers:
+                renderer.begin()
+            for record in records:
+                for renderer in renderers:
+                    renderer.write(record)
+            for renderer in renderers:
+                renderer.end()
+            stack.close()
+            for tmp_path, path in zip(tmp_paths, paths.values()):
+                os.replace(tmp_path, path)
+        except BaseException:
+            stack.close()
+            for tmp_path in tmp_paths:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+            raise
+    return paths
+
+
+def render_markdown(records, title, generated_at):
+    """日报的Markdown正文（推送使用）"""
+    f = io.StringIO()
+    renderer = MarkdownRenderer(f, title, generated_at)
+    renderer.begin()
+    for record in records:
+        renderer.write(record)
+    renderer.end()
+    return f.getvalue()
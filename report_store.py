@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+日报历史库：所有主题、所有日期的日报条目保存在一个带索引的SQLite数据库中。
+
+按日期范围、主题、来源和关键词查询时不再需要逐个打开和解析往期CSV；
+已有的 daily_reports/*.csv 可通过 import_csv_reports 一次性导入。
+"""
+
+import csv
+import glob
+import os
+import re
+import threading
+import time
+
+# 日报CSV文件名：{日报名称}_{YYYY-MM-DD}.csv
+REPORT_FILENAME = re.compile(r"^(?P<topic>.+)_(?P<date>\d{4}-\d{2}-\d{2})\.csv$")
+
+COLUMNS = ("topic", "report_date", "rank", "title", "summary", "source", "url", "heat", "tags")
+
+# 关键词标签在库中和CSV中都用顿号连接
+TAG_SEPARATOR = "、"
+
+
+class ReportStore:
+    """线程安全的日报历史库"""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS report_items (
+                id INTEGER PRIMARY KEY,
+                topic TEXT NOT NULL,
+                report_date TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT,
+                source TEXT,
+                url TEXT,
+                heat REAL,
+                tags TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS report_items_topic_date
+                ON report_items(topic, report_date, rank);
+            CREATE INDEX IF NOT EXISTS report_items_date ON report_items(report_date);
+            CREATE INDEX IF NOT EXISTS report_items_source ON report_items(source, report_date);
+        """)
+        # 旧版本创建的库没有 tags 列
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(report_items)")}
+        if "tags" not in columns:
+            self.conn.execute("ALTER TABLE report_items ADD COLUMN tags TEXT")
+            self.conn.commit()
+
+    def save_report(self, topic, report_date, news_items):
+        """
+        保存一份日报，news_items 为 NewsItem 或含相同字段的字典，按排名排列。
+        同一主题同一天重复生成时，新日报替换旧日报（与CSV文件被覆盖一致）。
+        """
+        now = time.time()
+        rows = []
+        for rank, item in enumerate(news_items, 1):
+            if isinstance(item, dict):
+                fields = item
+            else:
+                fields = {name: getattr(item, name) for name in ("title", "summary", "source", "url")}
+                fields["heat"] = item.heat_score
+                fields["tags"] = getattr(item, "tags", None)
+            tags = fields.get("tags")
+            if tags is not None and not isinstance(tags, str):
+                tags = TAG_SEPARATOR.join(tags)
+            rows.append((
+                topic, report_date, rank, fields.get("title") or "", fields.get("summary"),
+                fields.get("source"), fields.get("url"), fields.get("heat"), tags or None, now,
+            ))
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM report_items WHERE topic = ? AND report_date = ?", (topic, report_date)
+            )
+            self.conn.executemany(
+                "INSERT INTO report_items "
+                "(topic, report_date, rank, title, summary, source, url, heat, tags, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def query(self, start=None, end=None, topic=None, source=None, keyword=None, limit=None):
+        """
+        查询日报条目，返回字典列表，按日期、主题、排名排列。
+        start/end 为 YYYY-MM-DD（含两端），source 精确匹配，keyword 匹配标题、摘要或关键词标签。
+        """
+        conditions, params = [], []
+        if start:
+            conditions.append("report_date >= ?")
+            params.append(start)
+        if end:
+            conditions.append("report_date <= ?")
+            params.append(end)
+        if topic:
+            conditions.append("topic = ?")
+            params.append(topic)
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if keyword:
+            conditions.append("(instr(title, ?) > 0 OR instr(summary, ?) > 0 OR instr(tags, ?) > 0)")
+            params.extend([keyword, keyword, keyword])
+        sql = f"SELECT {', '.join(COLUMNS)} FROM report_items"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY report_date, topic, rank"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def by_date_range(self, start, end, topic=None):
+        return self.query(start=start, end=end, topic=topic)
+
+    def by_source(self, source, start=None, end=None):
+        return self.query(start=start, end=end, source=source)
+
+    def by_keyword(self, keyword, start=None, end=None, topic=None):
+        return self.query(start=start, end=end, topic=topic, keyword=keyword)
+
+    def report_dates(self, topic=None):
+        """已保存日报的日期列表"""
+        sql = "SELECT DISTINCT report_date FROM report_items"
+        params = []
+        if topic:
+            sql += " WHERE topic = ?"
+            params.append(topic)
+        with self.lock:
+            return [row[0] for row in self.conn.execute(sql + " ORDER BY report_date", params)]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def read_csv_report(path):
+    """读取一份日报CSV，返回条目字典列表"""
+    with open(path, newline="", encoding="utf-8") as f:
+        items = []
+        for row in csv.DictReader(f):
+            try:
+                heat = float(row.get("热度") or 0)
+            except ValueError:
+                heat = None
+            items.append({
+                "title": row.get("标题"),
+                "summary": row.get("内容摘要"),
+                "source": row.get("信息来源"),
+                "url": row.get("URL"),
+                "heat": heat,
+                "tags": row.get("关键词") or None,
+            })
+        return items
+
+
+def import_csv_reports(store, directory):
+    """把目录下的日报CSV导入历史库，返回导入的日报数；文件名不符合日报命名规则的CSV被跳过"""
+    count = 0
+    for path in sorted(glob.glob(os.path.join(directory, "*.csv"))):
+        match = REPORT_FILENAME.match(os.path.basename(path))
+        if not match:
+            continue
+        try:
+            items = read_csv_report(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            print(f"读取日报 {path} 出错: {e}")
+            continue
+        store.save_report(match.group("topic"), match.group("date"), items)
+        count += 1
+    return count
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+常驻调度器：多个任务、每个任务多个每日运行时间。
+
+任务在线程池中运行，每个任务有超时时间，慢任务不会阻塞其他任务和调度循环；
+调度循环用 Event.wait 一直睡到下一个运行时间（或正在运行任务的超时时刻），不再每分钟轮询。
+每次运行结束后把对应的计划时间写入状态文件，重启后补跑停机期间错过的运行（同一任务多次错过只补跑一次）。
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# 默认并发运行的任务数
+DEFAULT_WORKERS = 2
+# 默认单个任务的超时时间（秒）
+DEFAULT_JOB_TIMEOUT = 60 * 60
+# 单次等待的最长时间（秒），防止系统时间被调整后睡过头
+MAX_WAIT = 15 * 60
+
+
+def parse_time_of_day(value):
+    """解析 HH:MM，返回 (时, 分)"""
+    try:
+        hour, minute = (int(part) for part in value.strip().split(":"))
+    except ValueError:
+        raise ValueError(f"无效的时间: {value}，应为 HH:MM")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"无效的时间: {value}，应为 HH:MM")
+    return hour, minute
+
+
+class Job:
+    """每天在固定时间运行的任务"""
+
+    def __init__(self, name, func, times=("08:00",), args=(), timeout=DEFAULT_JOB_TIMEOUT):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.times = sorted(parse_time_of_day(t) for t in times)
+        if not self.times:
+            raise ValueError(f"任务 {name} 没有设置运行时间")
+        self.timeout = timeout
+
+    def _slots(self, day):
+        return [datetime.combine(day, datetime.min.time()).replace(hour=h, minute=m) for h, m in self.times]
+
+    def next_run(self, after):
+        """after 之后（不含）的第一个计划运行时间"""
+        for days in range(2):
+            for slot in self._slots(after.date() + timedelta(days=days)):
+                if slot > after:
+                    return slot
+
+    def last_run_before(self, moment):
+        """moment 之前（含）的最后一个计划运行时间"""
+        for days in range(2):
+            for slot in reversed(self._slots(moment.date() - timedelta(days=days))):
+                if slot <= moment:
+                    return slot
+
+
+class SchedulerState:
+    """持久化每个任务最近一次运行对应的计划时间和结果"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"读取调度状态 {path} 出错，忽略: {e}")
+
+    def last_slot(self, name):
+        entry = self.data.get(name)
+        return datetime.fromisoformat(entry["slot"]) if entry else None
+
+    def record(self, name, slot, status):
+        with self.lock:
+            self.data[name] = {
+                "slot": slot.isoformat(),
+                "status": status,
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # 先写临时文件再替换，进程中途退出也不会留下损坏的状态文件
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class Scheduler:
+    """事件驱动的常驻调度器"""
+
+    def __init__(self, jobs, state_path, workers=DEFAULT_WORKERS):
+        names = [job.name for job in jobs]
+        if len(set(names)) != len(names):
+            raise ValueError("任务名称不能重复")
+        self.jobs = list(jobs)
+        self.state = SchedulerState(state_path)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.lock = threading.Lock()
+        # 任务名 -> (计划时间, future, 超时时刻)，同一任务同时只运行一个实例；
+        # 超时的任务线程仍在运行，超时时刻改为 None，直到真正结束才移除
+        self.running = {}
+        # 任务名 -> 已经提交过的最近一个计划时间
+        self.scheduled = {}
+
+    def set_jobs(self, jobs):
+        """
+        替换任务列表（例如主题配置重新加载后），正在运行的任务不受影响。
+        新任务和运行时间有变化的任务从现在开始计算下一次运行，不会因为新的时间早于现在而立即运行
+        """
+        names = [job.name for job in jobs]
+        if len(set(names)) != len(names):
+            raise ValueError("任务名称不能重复")
+        now = datetime.now()
+        old_times = {job.name: job.times for job in self.jobs}
+        scheduled = {}
+        for job in jobs:
+            if old_times.get(job.name) == job.times and job.name in self.scheduled:
+                scheduled[job.name] = self.scheduled[job.name]
+            else:
+                scheduled[job.name] = now
+        self.jobs = list(jobs)
+        self.scheduled = scheduled
+        for job in jobs:
+            if old_times.get(job.name) != job.times:
+                times = "、".join(f"{h:02d}:{m:02d}" for h, m in job.times)
+                print(f"任务 {job.name}: 每天 {times} 运行")
+        for name in old_times:
+            if name not in scheduled:
+                print(f"任务 {name} 已移除")
+        # 重新计算下一次运行时间
+        self.wakeup.set()
+
+    def catch_up(self, now=None):
+        """补跑停机期间错过的运行：上次运行之后又到过计划时间的任务立即运行一次"""
+        now = now or datetime.now()
+        for job in self.jobs:
+            last_slot = self.state.last_slot(job.name)
+            missed = job.last_run_before(now)
+            if last_slot is not None and missed > last_slot:
+                print(f"任务 {job.name} 错过了 {missed:%Y-%m-%d %H:%M} 的运行，立即补跑")
+                self.submit(job, missed)
+            else:
+                self.scheduled[job.name] = missed
+
+    def submit(self, job, slot):
+        self.scheduled[job.name] = slot
+        with self.lock:
+            if job.name in self.running:
+                print(f"任务 {job.name} 上一次运行尚未结束，跳过 {slot:%Y-%m-%d %H:%M} 的运行")
+                return
+            print(f"开始运行任务 {job.name}（计划时间 {slot:%Y-%m-%d %H:%M}）")
+            future = self.executor.submit(job.func, *job.args)
+            self.running[job.name] = (slot, future, time.monotonic() + job.timeout)
+        future.add_done_callback(lambda f: self._finished(job, slot, f))
+
+    def _finished(self, job, slot, future):
+        with self.lock:
+            entry = self.running.get(job.name)
+            if entry is None or entry[1] is not future:
+                return
+            del self.running[job.name]
+        if entry[2] is None:
+            # 已按超时记录过运行结果
+            print(f"超时的任务 {job.name}（计划时间 {slot:%Y-%m-%d %H:%M}）已结束")
+            self.wakeup.set()
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"任务 {job.name} 运行出错: {error}")
+        self.state.record(job.name, slot, "failed" if error else "ok")
+        self.wakeup.set()
+
+    def _check_timeouts(self):
+        """
+        记录超时的任务。线程无法被强制终止，任务会在后台运行到结束，在此之前仍视为正在运行，
+        下一个计划时间到达时跳过，不会与仍在运行的上一次同时运行
+        """
+        now = time.monotonic()
+        with self.lock:
+            expired = [(name, entry) for name, entry in self.running.items()
+                       if entry[2] is not None and entry[2] <= now]
+            for name, (slot, future, _) in expired:
+                self.running[name] = (slot, future, None)
+        for name, (slot, future, _) in expired:
+            # 任务可能已在主题配置重新加载时被移除
+            job = next((job for job in self.jobs if job.name == name), None)
+            timeout = job.timeout if job else "设定的超时"
+            print(f"任务 {name} 超过 {timeout} 秒未完成，记为超时（任务结束前不会再次运行）")
+            self.state.record(name, slot, "timeout")
+
+    def _next_due(self, now):
+        """返回 (任务, 计划时间)：各任务在已提交的计划时间之后最早的一次运行；没有任务时返回 (None, None)"""
+        if not self.jobs:
+            return None, None
+        candidates = []
+        for job in self.jobs:
+            after = self.scheduled.get(job.name) or now
+            slot = job.next_run(after)
+            if slot <= now:
+                # 错过了多次（例如系统休眠），只运行最近的一次
+                slot = job.last_run_before(now)
+            candidates.append((slot, job))
+        slot, job = min(candidates, key=lambda c: c[0])
+        return job, slot
+
+    def wait_seconds(self, now=None):
+        """距离下一个需要处理的时刻（计划运行或任务超时）的秒数"""
+        now = now or datetime.now()
+        _, slot = self._next_due(now)
+        # 没有任务（例如主题配置全部被删除）时空闲等待，任务列表更新时被唤醒
+        seconds = (slot - now).total_seconds() if slot is not None else MAX_WAIT
+        with self.lock:
+            deadlines = [entry[2] for entry in self.running.values() if entry[2] is not None]
+        if deadlines:
+            seconds = min(seconds, min(deadlines) - time.monotonic())
+        return min(max(seconds, 0), MAX_WAIT)
+
+    def run_forever(self):
+        """运行调度循环，直到调用 stop()"""
+        self.catch_up()
+        for job in self.jobs:
+            times = "、".join(f"{h:02d}:{m:02d}" for h, m in job.times)
+            print(f"任务 {job.name}: 每天 {times} 运行")
+        if not self.jobs:
+            print("当前没有需要调度的任务，等待任务列表更新")
+        while not self.stopped:
+            self.wakeup.wait(self.wait_seconds())
+            self.wakeup.clear()
+            if self.stopped:
+                break
+            self._check_timeouts()
+            now = datetime.now()
+            job, slot = self._next_due(now)
+            if job is not None and slot <= now:
+                self.submit(job, slot)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+已报道文章索引：记录往期日报中出现过的文章，增量爬取时跳过。
+
+每篇文章以规范化URL和规范化标题的哈希作为键、按主题（日报名称）分别保存在SQLite中，
+只跳过同一主题往期日报中的文章，出现在其他主题日报中的文章不受影响。
+往期日报CSV按文件修改时间增量导入，只有新增或改动过的日报才会重新读取；
+主题取自日报文件名（“{日报名称}_{日期}.csv”），文件名不符合日报命名规则的CSV被跳过。
+"""
+
+import csv
+import glob
+import hashlib
+import os
+import threading
+
+from dedup import canonical_article_url, normalize_title
+from report_store import REPORT_FILENAME
+
+
+def article_keys(url, title):
+    """文章的索引键：规范化URL和规范化标题的哈希，任一命中即视为已报道"""
+    keys = []
+    url_key = canonical_article_url(url)
+    if url_key:
+        keys.append("url:" + url_key)
+    title_key = normalize_title(title)
+    if title_key:
+        keys.append("title:" + hashlib.blake2b(title_key.encode("utf-8"), digest_size=16).hexdigest())
+    return keys
+
+
+class SeenIndex:
+    """线程安全的已报道文章索引"""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(seen)")]
+        if columns and "topic" not in columns:
+            # 旧版索引不区分主题：删除后从日报CSV重新导入
+            self.conn.executescript("DROP TABLE seen; DROP TABLE IF EXISTS imported_reports;")
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS seen (
+                topic TEXT NOT NULL,
+                key TEXT NOT NULL,
+                report_date TEXT NOT NULL,
+                PRIMARY KEY (topic, key)
+            );
+            CREATE TABLE IF NOT EXISTS imported_reports (
+                filename TEXT PRIMARY KEY,
+                mtime REAL NOT NULL
+            );
+        """)
+
+    def first_seen(self, url, title, topic):
+        """返回文章最早出现在哪天的该主题日报中，未出现过时返回 None"""
+        keys = article_keys(url, title)
+        if not keys:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT MIN(report_date) FROM seen WHERE topic = ? AND key IN ({','.join('?' * len(keys))})",
+                [topic, *keys],
+            ).fetchone()
+        return row[0]
+
+    def add(self, url, title, report_date, topic):
+        self.add_many([(url, title)], report_date, topic)
+
+    def add_many(self, articles, report_date, topic):
+        """记录一批 (url, 标题) 出现在 report_date 的该主题日报中，已有记录保留最早的日期"""
+        rows = [(topic, key, report_date) for url, title in articles for key in article_keys(url, title)]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO seen VALUES (?, ?, ?) "
+                "ON CONFLICT(topic, key) DO UPDATE SET report_date = MIN(report_date, excluded.report_date)",
+                rows,
+            )
+            self.conn.commit()
+
+    def import_reports(self, directory):
+        """导入目录下新增或修改过的日报CSV，返回导入的文件数"""
+        with self.lock:
+            imported = dict(self.conn.execute("SELECT filename, mtime FROM imported_reports"))
+        count = 0
+        for path in sorted(glob.glob(os.path.join(directory, "*.csv"))):
+            filename = os.path.basename(path)
+            match = REPORT_FILENAME.match(filename)
+            if not match:
+                continue
+            mtime = os.path.getmtime(path)
+            if imported.get(filename) == mtime:
+                continue
+            try:
+                with open(path, newline="", encoding="utf-8") as f:
+                    rows = list(csv.DictReader(f))
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                print(f"读取日报 {filename} 出错: {e}")
+                continue
+            by_date = {}
+            for row in rows:
+                date = row.get("日期")
+                if date:
+                    by_date.setdefault(date, []).append((row.get("URL"), row.get("标题")))
+            for date, articles in by_date.items():
+                self.add_many(articles, date, match.group("topic"))
+            with self.lock:
+                self.conn.execute("INSERT OR REPLACE INTO imported_reports VALUES (?, ?)", (filename, mtime))
+                self.conn.commit()
+            count += 1
+        return count
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
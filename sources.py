@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+新闻来源注册表。
+
+每个来源是一个插件函数 fetch(keywords) -> {关键词: 新闻列表}，通过 register_source 注册。
+search_sources 并发调用所有启用的来源，每个来源有独立的超时和熔断器，
+慢的或出错的来源不会拖住其他来源。
+
+注册时 streaming=True 的来源还接受 on_results 参数，每得到一批结果就调用
+on_results(关键词, 新闻列表, 该关键词还可能返回的条数上限)，供流式流水线边搜索边处理；
+这类来源超时时保留超时前已经返回的结果。
+
+注册时 cancellable=True 的来源还接受 cancel 参数（threading.Event）：超时后 search_sources 设置该事件，
+来源应在每次请求前检查，不再继续翻页和请求（线程无法被强制终止，超时的来源仍在后台运行到下一次检查）。
+
+timeout 可以是秒数，也可以是 timeout(keywords) -> 秒数，按本次搜索的关键词数估算（如受限速约束的来源）。
+"""
+
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# 默认每个来源的超时（秒）
+DEFAULT_SOURCE_TIMEOUT = 120
+# 连续失败多少次后熔断，以及熔断后多久允许重试（秒）
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 30 * 60
+
+
+class SourceError(Exception):
+    """来源整体不可用（例如所有请求都失败）"""
+
+
+class CircuitBreaker:
+    """简单的熔断器：连续失败达到阈值后打开，冷却时间过后允许一次试探调用"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """是否允许本次调用"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # 半开状态：放行一次，失败后重新计时
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+class Source:
+    """已注册的来源"""
+
+    def __init__(self, name, fetch, label=None, timeout=DEFAULT_SOURCE_TIMEOUT, enabled=True, streaming=False,
+                 cancellable=False):
+        self.name = name
+        self.fetch = fetch
+        self.label = label or name
+        self.timeout = timeout
+        self.enabled = enabled
+        self.streaming = streaming
+        self.cancellable = cancellable
+        self.breaker = CircuitBreaker()
+
+    def timeout_for(self, keywords):
+        """本次搜索的超时（秒）"""
+        return self.timeout(keywords) if callable(self.timeout) else self.timeout
+
+
+# 来源名称 -> Source，按注册顺序排列
+SOURCES = {}
+
+
+def register_source(name, label=None, timeout=DEFAULT_SOURCE_TIMEOUT, enabled=True, streaming=False,
+                    cancellable=False):
+    """注册来源插件的装饰器"""
+    def decorator(fetch):
+        SOURCES[name] = Source(name, fetch, label=label, timeout=timeout, enabled=enabled, streaming=streaming,
+                               cancellable=cancellable)
+        return fetch
+    return decorator
+
+
+def enabled_sources(names=None):
+    """返回要使用的来源：指定了名称时按名称选择，否则为所有启用的来源"""
+    if names:
+        unknown = [name for name in names if name not in SOURCES]
+        if unknown:
+            raise ValueError(f"未知的新闻来源: {', '.join(unknown)}")
+        return [SOURCES[name] for name in names]
+    return [source for source in SOURCES.values() if source.enabled]
+
+
+def set_enabled_sources(names):
+    """只启用指定的来源"""
+    enabled_sources(names)  # 检查名称是否都已注册
+    for name, source in SOURCES.items():
+        source.enabled = name in names
+
+
+def search_sources(keywords, names=None, on_results=None):
+    """
+    并发调用各来源搜索关键词，返回 {关键词: 新闻列表}，同一关键词下按来源注册顺序排列。
+    超时、出错或处于熔断状态的来源被跳过。
+
+    on_results 不为 None 时，每得到一批结果调用 on_results(来源名称, 关键词, 新闻列表, 还可能返回的条数上限)
+    （不支持流式的来源在完成后一次性回调）；每个来源结束（完成、出错、超时或被跳过）时
+    调用 on_results(来源名称, None, None, 0)。
+    """
+    results = {keyword: [] for keyword in keywords}
+    sources = []
+    for source in enabled_sources(names):
+        if source.breaker.allow():
+            sources.append(source)
+        elif on_results is not None:
+            on_results(source.name, None, None, 0)
+    if not sources:
+        print("没有可用的新闻来源")
+        return results
+
+    # 流式来源已经返回的结果，超时时使用；超时之后才到达的结果丢弃
+    partial = {source.name: {} for source in sources if source.streaming}
+    timed_out = set()
+    lock = threading.Lock()
+    # 来源名称 -> 取消事件，超时时设置
+    cancels = {source.name: threading.Event() for source in sources if source.cancellable}
+
+    def collect(name, keyword, news_items, remaining):
+        with lock:
+            if name in timed_out:
+                return
+            partial[name].setdefault(keyword, []).extend(news_items)
+        if on_results is not None:
+            on_results(name, keyword, news_items, remaining)
+
+    def fetch(source):
+        kwargs = {}
+        if source.streaming:
+            kwargs["on_results"] = functools.partial(collect, source.name)
+        if source.cancellable:
+            kwargs["cancel"] = cancels[source.name]
+        return source.fetch(keywords, **kwargs)
+
+    executor = ThreadPoolExecutor(max_workers=len(sources))
+    start = time.monotonic()
+    timeouts = {source.name: source.timeout_for(keywords) for source in sources}
+    futures = [(source, executor.submit(fetch, source)) for source in sources]
+    for source, future in futures:
+        remaining = max(start + timeouts[source.name] - time.monotonic(), 0)
+        error = source_results = None
+        try:
+            source_results = future.result(timeout=remaining)
+        except TimeoutError as e:
+            error = e
+            if source.cancellable:
+                # 让超时的来源停止继续请求
+                cancels[source.name].set()
+            if source.streaming:
+                with lock:
+                    timed_out.add(source.name)
+                    source_results = partial[source.name] or None
+            if source_results is not None:
+                # 超时前已有结果的流式来源不算失败，不计入熔断
+                print(f"{source.label}在 {timeouts[source.name]:g} 秒内未完成，"
+                      f"使用已返回的 {sum(map(len, source_results.values()))} 条结果")
+        except Exception as e:
+            error = e
+        if source_results is None:
+            if isinstance(error, TimeoutError):
+                print(f"{source.label}在 {timeouts[source.name]:g} 秒内未完成，跳过")
+            else:
+                print(f"{source.label}获取失败: {error}")
+            source.breaker.record_failure()
+            if source.breaker.is_open:
+                print(f"{source.label}连续失败 {source.breaker.failures} 次，暂停使用")
+            if on_results is not None:
+                on_results(source.name, None, None, 0)
+            continue
+        source.breaker.record_success()
+        for keyword in keywords:
+            results[keyword].extend(source_results.get(keyword, []))
+        if on_results is not None:
+            if not source.streaming:
+                for keyword in keywords:
+                    on_results(source.name, keyword, source_results.get(keyword, []), 0)
+            on_results(source.name, None, None, 0)
+    # 超时的来源在后台运行到下一次检查取消事件（不支持取消的来源运行到结束），不阻塞本次结果
+    executor.shutdown(wait=False)
+    return results
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量关键词提取：对全部候选新闻的标题和摘要一次性分词，在候选集合上计算TF-IDF，
+得到每条新闻的关键词标签，以及TF-IDF权重中落在主题关键词上的比例（主题相关度）。
+
+jieba 导入并加载词典约需1秒，每个进程只加载一次：候选较少时在当前进程中分词，
+较多时交给常驻的进程池（每个工作进程启动时预加载词典），避免逐条调用的启动开销。
+"""
+
+import math
+import os
+import re
+from collections import Counter
+
+# 候选条数达到该值时使用进程池分词
+PROCESS_THRESHOLD = 300
+# 每个工作进程一次处理的文本条数
+CHUNK_SIZE = 64
+# 每条新闻保留的关键词数
+DEFAULT_TOP_N = 5
+
+# 标签中去掉的常见虚词
+STOP_WORDS = frozenset("""
+一个 一些 一种 为了 什么 今天 他们 以及 但是 你们 可以 各种 因为 如何 如果 已经 我们 所以 或者 这个 这些 这样
+这种 通过 进行 那么 重要 问题 关于 没有 还是 最新 目前 相关 其中 之后 之前 不是 就是 而且 它们 她们 以下 一下
+""".split())
+
+_WORD = re.compile(r"\w")
+_DIGITS = re.compile(r"^[\d.%]+$")
+
+_jieba = None
+_user_words = set()
+_pool = None
+_pool_workers = 0
+
+
+def get_jieba():
+    """导入 jieba 并加载词典，每个进程只做一次"""
+    global _jieba
+    if _jieba is None:
+        import jieba
+
+        jieba.setLogLevel(60)
+        jieba.initialize()
+        _jieba = jieba
+    return _jieba
+
+
+def _add_words(words):
+    """把主题关键词加入词典，保证“大模型”“AI大模型”等被切成一个词"""
+    jieba = get_jieba()
+    for word in words:
+        if word not in _user_words:
+            jieba.add_word(word, freq=100000)
+            _user_words.add(word)
+
+
+def tokenize(text):
+    """分词并去掉单字、标点、数字和常见虚词，英文转为小写"""
+    tokens = []
+    for token in get_jieba().lcut(text or ""):
+        token = token.strip()
+        if len(token) < 2 or not _WORD.search(token) or _DIGITS.match(token) or token in STOP_WORDS:
+            continue
+        tokens.append(token.lower() if token.isascii() else token)
+    return tokens
+
+
+def _tokenize_chunk(args):
+    """工作进程中执行：args 为 (主题关键词, 文本列表)"""
+    words, texts = args
+    _add_words(words)
+    return [tokenize(text) for text in texts]
+
+
+def _load_dictionary(_=None):
+    """工作进程的初始化函数：预加载词典"""
+    get_jieba()
+
+
+def get_pool(workers=None):
+    """常驻的分词进程池，第一次使用时创建；使用 spawn 启动，避免在多线程进程中 fork"""
+    global _pool, _pool_workers
+    if _pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        _pool_workers = workers or max(min((os.cpu_count() or 2) - 1, 4), 1)
+        _pool = ProcessPoolExecutor(
+            max_workers=_pool_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_load_dictionary,
+        )
+    return _pool
+
+
+def warm_up(workers=None):
+    """提前启动进程池并加载词典（常驻模式启动时调用），之后的批量分词没有启动开销"""
+    pool = get_pool(workers)
+    list(pool.map(_load_dictionary, range(_pool_workers)))
+
+
+def tokenize_batch(texts, words=(), workers=None):
+    """批量分词，返回与 texts 对应的词列表"""
+    texts = list(texts)
+    words = tuple(words)
+    if len(texts) < PROCESS_THRESHOLD:
+        _add_words(words)
+        return [tokenize(text) for text in texts]
+    chunks = [(words, texts[i:i + CHUNK_SIZE]) for i in range(0, len(texts), CHUNK_SIZE)]
+    results = []
+    for tokens in get_pool(workers).map(_tokenize_chunk, chunks):
+        results.extend(tokens)
+    return results
+
+
+def tag_texts(texts, topic_keywords=(), top_n=DEFAULT_TOP_N, workers=None):
+    """
+    在这组文本上计算TF-IDF，返回 [(关键词标签列表, 主题相关度)]。
+    主题相关度为该文本TF-IDF权重中落在主题关键词上的比例（0~1）。
+    """
+    documents = tokenize_batch(texts, topic_keywords, workers)
+    topic_terms = {k.lower() if k.isascii() else k for k in topic_keywords}
+    document_frequency = Counter()
+    for tokens in documents:
+        document_frequency.update(set(tokens))
+    total = len(documents)
+
+    results = []
+    for tokens in documents:
+        if not tokens:
+            results.append(([], 0.0))
+            continue
+        weights = {
+            token: count / len(tokens) * (math.log((total + 1) / (document_frequency[token] + 1)) + 1)
+            for token, count in Counter(tokens).items()
+        }
+        tags = sorted(weights, key=lambda token: (-weights[token], tokens.index(token)))[:top_n]
+        relevance = sum(w for token, w in weights.items() if token in topic_terms) / sum(weights.values())
+        results.append((tags, relevance))
+    return results
+
+
+def extract_keywords(text, top_n=DEFAULT_TOP_N):
+    """从单条文本中提取关键词（jieba TextRank）"""
+    if not text:
+        return []
+    get_jieba()
+    import jieba.analyse
+    return jieba.analyse.textrank(text, topK=top_n)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""测试公用的夹具：本地桩HTTP服务器，以及隔离了数据目录和全局状态的 news_crawler"""
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class StubServer:
+    """
+    本地桩HTTP服务器：handler(request) 返回 (状态码, 响应头字典, 响应体)，
+    request 为 {"time", "method", "path", "query", "headers", "body"}，所有请求按到达顺序记录在 requests 中
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                parts = urlsplit(self.path)
+                request = {
+                    "time": time.monotonic(),
+                    "method": self.command,
+                    "path": parts.path,
+                    "query": {k: v[0] for k, v in parse_qs(parts.query).items()},
+                    "headers": dict(self.headers),
+                    "body": self.rfile.read(length) if length else b"",
+                }
+                with stub.lock:
+                    stub.requests.append(request)
+                status, headers, body = stub.handler(request)
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """stub_server(handler) 启动一个桩服务器，测试结束时关闭"""
+    servers = []
+
+    def start(handler):
+        server = StubServer(handler)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    """数据目录指向临时目录、不使用自适应节流、各种全局单例重新创建的 news_crawler 模块"""
+    import news_crawler
+    from rate_limit import HostRateLimiter
+
+    monkeypatch.setattr(news_crawler, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(news_crawler, "ADAPTIVE_THROTTLE", False)
+    monkeypatch.setattr(news_crawler, "RATE_LIMITER", HostRateLimiter(default_rate=1e6, default_burst=1e6))
+    for name in ("_throttle", "_throttle_session", "_seen_index", "_seen_imported_on", "_report_store", "_notifier"):
+        monkeypatch.setattr(news_crawler, name, None)
+    return news_crawler
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""列式候选存储：NumPy 和纯 Python 两种实现的整列加分和前K名选择与逐条计算一致"""
+
+import random
+
+import pytest
+
+import candidates
+from candidates import CandidateStore, top_k
+from news_crawler import NewsItem, add_heat
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(candidates, "_numpy", None)
+    else:
+        monkeypatch.setattr(candidates, "_numpy", False)
+    return request.param
+
+
+def make_items(heats):
+    return [NewsItem(f"标题{i}", f"https://a.example/{i}", "测试", "2025-03-03", heat_score=heat)
+            for i, heat in enumerate(heats)]
+
+
+def test_backend_is_selected(backend):
+    assert (candidates.get_numpy() is not None) == (backend == "numpy")
+
+
+def test_add_heat_matches_per_item(backend):
+    rng = random.Random(0)
+    heats = [rng.choice([rng.randint(0, 120), rng.uniform(0, 120)]) for _ in range(200)]
+    bonuses = [rng.choice([0, 5, 10, 12.5]) for _ in heats]
+    store = CandidateStore(make_items(heats))
+    store.add_heat(bonuses)
+    store.add_heat(3)
+    expected = [add_heat(add_heat(heat, bonus), 3) for heat, bonus in zip(heats, bonuses)]
+    assert list(store.heat_view()) == pytest.approx(expected)
+    # 整数热度还原为 int
+    assert [item.heat_score for item in store] == [candidates._heat_value(value) for value in expected]
+
+
+@pytest.mark.parametrize("count", [0, 3, 10, 100])
+def test_top_k_matches_stable_sort(backend, count):
+    rng = random.Random(count)
+    # 大量同分，检查同分时保持原有顺序
+    items = make_items([rng.randint(50, 60) for _ in range(count)])
+    expected = sorted(items, key=lambda item: -item.heat_score)[:10]
+    assert [item.title for item in top_k(CandidateStore(items), 10)] == [item.title for item in expected]
+    assert [item.title for item in top_k(items, 10)] == [item.title for item in expected]
+
+
+def test_heat_view_is_a_copy(backend):
+    store = CandidateStore(make_items([10, 20]))
+    view = store.heat_view()
+    # 持有返回值时仍可继续加入候选，修改返回值不影响存储
+    store.extend(make_items(range(100)))
+    view[0] = 99
+    assert len(view) == 2
+    assert store.heat[0] == 10
+    assert len(store.heat_view()) == 102
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""去重索引：URL和标题精确去重，SimHash 海明距离不超过阈值的近似重复合并，保留热度最高的一篇"""
+
+import random
+
+import pytest
+
+from dedup import SIMHASH_THRESHOLD, DedupIndex, canonical_article_url, hamming, simhash
+from news_crawler import NewsItem
+
+TITLE = "OpenAI发布新一代大模型"
+SUMMARY = ("推理能力大幅提升，开发者可通过接口免费试用。新模型在数学、编程和多语言理解等多项基准测试中取得领先成绩，"
+           "同时降低了调用成本，企业用户可以在云平台上直接部署。")
+
+
+def item(title, url, summary=None, heat=50):
+    return NewsItem(title, url, "测试", "2025-03-03", summary=summary, heat_score=heat)
+
+
+def variant(position):
+    """把摘要中的一个字替换掉的转载版本"""
+    return SUMMARY[:position] + "某" + SUMMARY[position + 1:]
+
+
+def test_near_duplicate_threshold():
+    # 转载时改了标题的措辞（链接和规范化标题都不同），只能靠 SimHash 识别
+    near = ("OpenAI推出新一代大模型", SUMMARY)
+    far = ("OpenAI发布了新一代大模型", variant(0))
+    fingerprint = simhash(TITLE + SUMMARY)
+    assert hamming(fingerprint, simhash("".join(near))) == SIMHASH_THRESHOLD
+    assert hamming(fingerprint, simhash("".join(far))) == 6
+
+    index = DedupIndex()
+    assert index.add(item(TITLE, "https://a.example/1", SUMMARY, heat=60))
+    # 距离等于阈值：合并，保留热度更高的一篇
+    assert not index.add(item(near[0], "https://b.example/1", near[1], heat=70))
+    # 距离超过阈值：视为不同的文章
+    assert index.add(item(far[0], "https://c.example/1", far[1], heat=40))
+    assert [news.url for news in index.items()] == ["https://b.example/1", "https://c.example/1"]
+    assert index.cluster_sizes == [2, 1]
+
+    # 放宽阈值后距离6的版本也合并
+    loose = DedupIndex(threshold=6, bands=8)
+    loose.add(item(TITLE, "https://a.example/1", SUMMARY))
+    assert not loose.add(item(far[0], "https://c.example/1", far[1]))
+
+
+def test_exact_duplicates_by_url_and_title():
+    index = DedupIndex()
+    index.add(item("GPT-5 发布", "https://weixin.sogou.com/link?url=abc&type=2&query=GPT&k=1&h=2", heat=50))
+    # 搜狗跳转链接只是搜索参数不同
+    assert not index.add(item("完全不同的标题", "https://weixin.sogou.com/link?url=abc&type=1&query=大模型", heat=40))
+    # 标题规范化后相同（全角、大小写、标点）
+    assert not index.add(item("ＧＰＴ－５ 发布！", "https://other.example/x", heat=80))
+    assert len(index) == 1
+    assert index.items()[0].heat_score == 80
+
+
+def test_canonical_wechat_url_keeps_article_params():
+    url = "https://mp.weixin.qq.com/s?__biz=MzA&mid=1&idx=2&sn=abc&chksm=x&scene=27#rd"
+    assert canonical_article_url(url) == canonical_article_url("https://mp.weixin.qq.com/s?sn=abc&idx=2&mid=1&__biz=MzA")
+
+
+def test_band_index_matches_brute_force():
+    rng = random.Random(0)
+    words = list("大模型发布推理能力提升开发者接口试用数学编程理解基准测试成绩成本企业部署芯片算力")
+    texts = ["".join(rng.choice(words) for _ in range(40)) for _ in range(30)]
+    # 每篇生成几个改动一两个字的版本
+    for text in list(texts):
+        for _ in range(3):
+            position = rng.randrange(len(text))
+            texts.append(text[:position] + rng.choice(words) + text[position + 1:])
+    index = DedupIndex()
+    kept = []
+    for i, text in enumerate(texts):
+        fingerprint = simhash(text)
+        expected_new = all(hamming(fingerprint, simhash(other)) > SIMHASH_THRESHOLD for other in kept)
+        assert index.add(item(text, f"https://a.example/{i}")) == expected_new
+        if expected_new:
+            kept.append(text)
+
+
+def test_bands_must_exceed_threshold():
+    with pytest.raises(ValueError):
+        DedupIndex(threshold=4, bands=4)
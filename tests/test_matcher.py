@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""发布时间解析：无法解析和不存在的日期返回 None，文章按默认热度保留"""
+
+from datetime import datetime
+
+import pytest
+
+import news_crawler
+from matcher import parse_pub_time
+
+NOW = datetime(2024, 3, 10, 12, 0)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3小时前", ("hours", 3)),
+    ("30分钟前", ("hours", 0.5)),
+    ("2天前", ("days", 2)),
+    ("刚刚", ("hours", 0)),
+    ("2024-03-08", ("days", 2)),
+    ("3月8日", ("days", 2)),
+    # 晚于今天的“M月D日”是去年的日期
+    ("12月31日", ("days", 70)),
+    ("2月29日", ("days", 10)),
+])
+def test_parses_valid_times(text, expected):
+    assert parse_pub_time(text, NOW) == expected
+
+
+@pytest.mark.parametrize("text", ["", None, "昨天", "2月30日", "13月1日", "2024-02-30", "2023-13-01"])
+def test_invalid_times_return_none(text):
+    assert parse_pub_time(text, NOW) is None
+
+
+def test_missing_leap_day_last_year_returns_none():
+    # 2024年2月28日看到的“2月29日”晚于今天，应为2023年的日期，而2023年没有2月29日
+    assert parse_pub_time("2月29日", datetime(2024, 2, 28)) is None
+
+
+def test_invalid_date_keeps_default_heat():
+    heat = news_crawler.calculate_news_heat("2月30日", "普通标题")
+    assert heat == news_crawler.BASE_HEAT
+    assert news_crawler.calculate_news_heat("2月30日", "大模型发布") == news_crawler.BASE_HEAT + news_crawler.TITLE_HEAT
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""推送队列：在本地桩服务器上检查批次合并、hold() 释放、失败退避重试和企业微信长消息拆分续发"""
+
+import json
+import time
+
+import pytest
+
+from notify import NotificationDispatcher, WeComChannel, WebhookChannel
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+class Endpoint:
+    """桩接口：按 statuses 依次返回状态码（用完后一直返回200），记录成功收到的JSON消息"""
+
+    def __init__(self, stub_server, statuses=(), wecom=False):
+        self.statuses = list(statuses)
+        self.wecom = wecom
+        self.received = []
+        self.server = stub_server(self.handle)
+
+    def handle(self, request):
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 200:
+            self.received.append(json.loads(request["body"]))
+        body = {"errcode": 0} if self.wecom else {}
+        return status, {"Content-Type": "application/json"}, json.dumps(body)
+
+    @property
+    def url(self):
+        return f"{self.server.url}/hook"
+
+
+@pytest.fixture
+def dispatcher(tmp_path):
+    created = []
+
+    def create(channels, **kwargs):
+        kwargs.setdefault("batch_window", 0.2)
+        kwargs.setdefault("backoff_base", 0.05)
+        created.append(NotificationDispatcher(str(tmp_path / "notify.sqlite3"), channels, **kwargs))
+        return created[-1]
+
+    yield create
+    for instance in created:
+        instance.stop()
+        instance.conn.close()
+
+
+def test_same_batch_is_merged(stub_server, dispatcher):
+    endpoint = Endpoint(stub_server)
+    notifier = dispatcher([WebhookChannel(endpoint.url)])
+    notifier.enqueue("日报A", "正文A", batch_key="2025-03-03")
+    notifier.enqueue("日报B", "正文B", batch_key="2025-03-03")
+    assert wait_until(lambda: endpoint.received)
+    time.sleep(0.3)
+    assert len(endpoint.received) == 1
+    assert endpoint.received[0]["title"] == "日报A / 日报B"
+    assert "正文A" in endpoint.received[0]["content"] and "正文B" in endpoint.received[0]["content"]
+    assert notifier.pending_count() == 0
+
+
+def test_hold_defers_until_release(stub_server, dispatcher):
+    endpoint = Endpoint(stub_server)
+    notifier = dispatcher([WebhookChannel(endpoint.url)], batch_window=0.05)
+    with notifier.hold():
+        notifier.enqueue("日报A", "正文A", batch_key="2025-03-03")
+        # 比批次窗口长得多，期间不应发送
+        time.sleep(0.5)
+        assert endpoint.received == []
+        notifier.enqueue("日报B", "正文B", batch_key="2025-03-03")
+    assert wait_until(lambda: endpoint.received, timeout=2)
+    time.sleep(0.2)
+    assert [message["title"] for message in endpoint.received] == ["日报A / 日报B"]
+
+
+def test_failures_back_off_exponentially(stub_server, dispatcher):
+    endpoint = Endpoint(stub_server, statuses=[503, 503])
+    notifier = dispatcher([WebhookChannel(endpoint.url)], batch_window=0, backoff_base=0.2)
+    notifier.enqueue("日报", "正文")
+    assert wait_until(lambda: endpoint.received, timeout=5)
+    times = [request["time"] for request in endpoint.server.requests]
+    assert len(times) == 3
+    first, second = times[1] - times[0], times[2] - times[1]
+    # 第1次失败后等待 0.2~0.25 秒，第2次失败后等待 0.4~0.5 秒
+    assert first >= 0.2
+    assert second >= 0.4 and second > first
+
+
+def test_gives_up_after_max_attempts(stub_server, dispatcher):
+    endpoint = Endpoint(stub_server, statuses=[503] * 10)
+    notifier = dispatcher([WebhookChannel(endpoint.url)], batch_window=0, max_attempts=2)
+    notifier.enqueue("日报", "正文")
+    assert wait_until(lambda: notifier.pending_count() == 0)
+    assert len(endpoint.server.requests) == 2
+    status, = notifier.conn.execute("SELECT status FROM notifications").fetchone()
+    assert status == "failed"
+
+
+def test_wecom_splits_long_body():
+    channel = WeComChannel("http://127.0.0.1/hook")
+    body = "\n\n".join(f"{i}. " + "新闻摘要" * 40 for i in range(20))
+    parts = channel.split("大模型日报 (2025-03-03)", body)
+    assert len(parts) > 1
+    assert [title for title, _ in parts][:2] == [f"大模型日报 (2025-03-03) (1/{len(parts)})",
+                                                  f"大模型日报 (2025-03-03) (2/{len(parts)})"]
+    assert all(len(f"**{title}**\n\n{text}") <= channel.max_body for title, text in parts)
+    # 只在段落之间拆分，内容不丢失
+    assert "\n\n".join(text for _, text in parts) == body
+
+
+def test_wecom_resumes_from_failed_part(stub_server, dispatcher):
+    endpoint = Endpoint(stub_server, statuses=[200, 500], wecom=True)
+    notifier = dispatcher([WeComChannel(endpoint.url)], batch_window=0)
+    body = "\n\n".join(f"{i}. " + "新闻摘要" * 40 for i in range(20))
+    notifier.enqueue("日报", body, batch_key="2025-03-03")
+    parts = len(WeComChannel(endpoint.url).split("日报", body))
+    assert parts >= 3
+    assert wait_until(lambda: notifier.pending_count() == 0 and len(endpoint.received) >= parts)
+    headings = [message["markdown"]["content"].split("\n", 1)[0] for message in endpoint.received]
+    # 第2条失败后从第2条继续，第1条不重复发送
+    assert headings == [f"**日报 ({i}/{parts})**" for i in range(1, parts + 1)]
+    assert len(endpoint.server.requests) == parts + 1
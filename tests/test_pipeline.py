@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""流式流水线：TopKTracker 提前确定入选的候选，无论之后到达什么结果，一定在最终的前K名中"""
+
+import random
+
+import pytest
+
+from pipeline import RemainingBound, TopKTracker
+
+K = 5
+
+
+def final_top_k(finals, certain):
+    """最终排名：得分从高到低，得分相同时已确定的候选排在后面（对确定最不利的顺序）"""
+    ranked = sorted(finals, key=lambda key: (-finals[key], key in certain))
+    return set(ranked[:K])
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_certain_candidates_always_make_final_top_k(seed):
+    rng = random.Random(seed)
+    keys = [f"k{i}" for i in range(rng.randint(1, 30))]
+    # 同一候选可能多次出现（不同关键词搜到同一篇文章），每次的得分范围不同
+    events = []
+    for _ in range(rng.randint(1, 60)):
+        low = rng.randint(0, 20)
+        events.append((rng.choice(keys), low, low + rng.randint(0, 5)))
+
+    tracker = TopKTracker(K)
+    # 候选 -> 确定入选时的得分下界
+    certain = {}
+    for index, (key, low, high) in enumerate(events):
+        tracker.update(key, low, high)
+        remaining = len(events) - index - 1
+        # 上界可以比实际剩余的条数多，也可以暂时未知
+        bound = rng.choice([remaining, remaining + rng.randint(0, 3), None])
+        for settled in tracker.settle(bound):
+            assert settled not in certain
+            certain[settled] = tracker.bounds[settled][0]
+    assert set(certain) == tracker.certain
+
+    # 最不利的最终得分：去重时保留热度最高的一篇，已确定的候选不低于确定时的下界；其余候选取出现过的最高上界
+    finals = dict(certain)
+    for key, low, high in events:
+        if key not in certain:
+            finals[key] = max(finals.get(key, high), high)
+    assert set(certain) <= final_top_k(finals, certain)
+
+
+def test_settles_top_candidates_when_everything_arrived():
+    tracker = TopKTracker(K)
+    for i in range(12):
+        tracker.update(f"k{i}", i, i)
+    assert tracker.settle(None) == []
+    assert tracker.settle(K) == []
+    # 第K名的得分等于上界堆中最低的上界，堆外可能有同分的候选，保守地不确定
+    assert set(tracker.settle(0)) == {f"k{i}" for i in range(8, 12)}
+    # 已确定的候选不会再次返回
+    assert tracker.settle(0) == []
+
+
+def test_ties_are_not_settled():
+    tracker = TopKTracker(2)
+    for key in "abc":
+        tracker.update(key, 10, 10)
+    assert tracker.settle(0) == []
+
+
+def test_remaining_bound():
+    bound = RemainingBound(["wechat", "baidu"], ["a", "b"])
+    bound.update("wechat", "a", 20)
+    bound.update("wechat", "b", 0)
+    bound.update("baidu", "a", 0)
+    assert bound.total() is None
+    bound.update("baidu", None, None)
+    assert bound.total() == 20
+    # 来源结束后再到达的结果不计入
+    bound.update("baidu", "b", 50)
+    assert bound.total() == 20
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""日报渲染：一次遍历写出所有格式；出错时正式文件保持不变，不留下临时文件"""
+
+import csv
+import json
+
+import pytest
+
+import report_render
+from news_crawler import NewsItem
+from report_render import CSV_HEADER, HtmlRenderer, atomic_open, build_records, render_markdown, write_report
+
+FORMATS = ["csv", "jsonl", "md", "html"]
+
+
+@pytest.fixture
+def records():
+    items = [
+        NewsItem("第一条\n标题", "https://a.example/1", "公众号A", "2025-03-03", summary="摘要\r\n第一行", heat_score=90,
+                 tags=["大模型", "推理"]),
+        NewsItem("<第二条>", "https://a.example/2?a=1&b=2", "公众号B", "2025-03-03", heat_score=70),
+    ]
+    return build_records(items, "2025-03-03")
+
+
+def test_writes_all_formats(tmp_path, records):
+    paths = write_report(records, str(tmp_path / "日报_2025-03-03"), FORMATS, "日报 (2025-03-03)", "2025-03-03 08:00:00")
+    assert sorted(paths) == sorted(FORMATS)
+    with open(paths["csv"], newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == CSV_HEADER
+    # 换行被清理，每条记录只占一行
+    assert rows[1] == ["2025-03-03", "第一条 标题", "摘要 第一行", "公众号A", "https://a.example/1", "90", "大模型、推理"]
+    lines = (tmp_path / "日报_2025-03-03.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["rank"] for line in lines] == [1, 2]
+    markdown = (tmp_path / "日报_2025-03-03.md").read_text(encoding="utf-8")
+    assert markdown == render_markdown(records, "日报 (2025-03-03)", "2025-03-03 08:00:00")
+    page = (tmp_path / "日报_2025-03-03.html").read_text(encoding="utf-8")
+    assert "&lt;第二条&gt;" in page and "a=1&amp;b=2" in page
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_failed_write_keeps_previous_report(tmp_path, records, monkeypatch):
+    base = str(tmp_path / "日报_2025-03-03")
+    write_report(records[:1], base, FORMATS, "旧日报", "2025-03-03 08:00:00")
+    before = {name: (tmp_path / f"日报_2025-03-03.{name}").read_bytes() for name in FORMATS}
+
+    class BrokenHtml(HtmlRenderer):
+        def write(self, record):
+            if record.rank == 2:
+                raise RuntimeError("磁盘已满")
+            super().write(record)
+
+    monkeypatch.setitem(report_render.RENDERERS, "html", BrokenHtml)
+    with pytest.raises(RuntimeError):
+        write_report(records, base, FORMATS, "新日报", "2025-03-03 20:00:00")
+    # 已经写完的格式也不替换：所有正式文件保持旧内容，临时文件被删除
+    assert {name: (tmp_path / f"日报_2025-03-03.{name}").read_bytes() for name in FORMATS} == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"日报_2025-03-03.{name}" for name in FORMATS)
+
+
+def test_atomic_open_rolls_back_on_error(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("旧内容", encoding="utf-8")
+    with pytest.raises(ValueError):
+        with atomic_open(str(path)) as f:
+            f.write("写了一半")
+            raise ValueError("出错")
+    assert path.read_text(encoding="utf-8") == "旧内容"
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+    with atomic_open(str(path)) as f:
+        f.write("新内容")
+    assert path.read_text(encoding="utf-8") == "新内容"
+
+
+def test_unknown_format_is_rejected(tmp_path, records):
+    with pytest.raises(ValueError, match="pdf"):
+        write_report(records, str(tmp_path / "日报"), ["csv", "pdf"], "日报", "2025-03-03 08:00:00")
+    assert list(tmp_path.iterdir()) == []
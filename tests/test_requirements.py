@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""依赖清单：requirements.txt 中的每个依赖都在 README 的安装说明中列出，已移除的依赖不再被导入"""
+
+import glob
+import os
+import re
+
+from conftest import ROOT
+
+REMOVED = ("schedule", "nltk")
+
+
+def requirements():
+    with open(os.path.join(ROOT, "requirements.txt"), encoding="utf-8") as f:
+        return [re.split(r"[=<>!~\[ ]", line.strip(), 1)[0] for line in f if line.strip() and not line.startswith("#")]
+
+
+def install_section():
+    with open(os.path.join(ROOT, "README.md"), encoding="utf-8") as f:
+        readme = f.read()
+    return readme[readme.index("## 安装依赖"):readme.index("## 使用方法")]
+
+
+def test_readme_lists_requirements():
+    section = install_section()
+    assert [name for name in requirements() if f"`{name}`" not in section] == []
+
+
+def test_removed_dependencies_are_not_imported():
+    assert not set(REMOVED) & set(requirements())
+    pattern = re.compile(rf"^\s*(import|from)\s+({'|'.join(REMOVED)})\b", re.M)
+    sources = glob.glob(os.path.join(ROOT, "*.py")) + glob.glob(os.path.join(ROOT, "benchmarks", "*.py"))
+    offenders = []
+    for path in sources:
+        with open(path, encoding="utf-8") as f:
+            if pattern.search(f.read()):
+                offenders.append(os.path.basename(path))
+    assert offenders == []
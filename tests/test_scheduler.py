@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""常驻调度器：超时的任务在线程结束前仍视为正在运行，不会与下一次运行重叠"""
+
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from scheduler import MAX_WAIT, Job, Scheduler
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def make_scheduler(tmp_path):
+    created = []
+
+    def create(jobs):
+        created.append(Scheduler(jobs, str(tmp_path / "state.json")))
+        return created[-1]
+
+    yield create
+    for scheduler in created:
+        scheduler.executor.shutdown(wait=True)
+
+
+def test_timed_out_job_blocks_next_run_until_finished(make_scheduler, tmp_path):
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(time.monotonic())
+        release.wait(5)
+
+    job = Job("slow", slow, times=("08:00",), timeout=0.05)
+    scheduler = make_scheduler([job])
+    scheduler.submit(job, datetime(2025, 3, 3, 8, 0))
+    time.sleep(0.1)
+    scheduler._check_timeouts()
+    state = json.loads((tmp_path / "state.json").read_text(encoding="utf-8"))
+    assert state["slow"]["status"] == "timeout"
+    # 超时的任务仍在运行（不再有超时时刻），下一次运行被跳过
+    assert scheduler.running["slow"][2] is None
+    scheduler.submit(job, datetime(2025, 3, 4, 8, 0))
+    assert len(calls) == 1
+
+    release.set()
+    assert wait_until(lambda: "slow" not in scheduler.running)
+    # 已记录为超时，结束时不覆盖
+    state = json.loads((tmp_path / "state.json").read_text(encoding="utf-8"))
+    assert state["slow"]["status"] == "timeout"
+    scheduler.submit(job, datetime(2025, 3, 5, 8, 0))
+    assert wait_until(lambda: len(calls) == 2)
+
+
+def test_finished_job_records_status(make_scheduler, tmp_path):
+    job = Job("quick", lambda: None, times=("08:00",))
+    scheduler = make_scheduler([job])
+    scheduler.submit(job, datetime(2025, 3, 3, 8, 0))
+    assert wait_until(lambda: "quick" not in scheduler.running)
+    state = json.loads((tmp_path / "state.json").read_text(encoding="utf-8"))
+    assert state["quick"] == {"slot": "2025-03-03T08:00:00", "status": "ok",
+                              "finished_at": state["quick"]["finished_at"]}
+
+
+def test_empty_job_list_idles(make_scheduler):
+    scheduler = make_scheduler([])
+    assert scheduler._next_due(datetime.now()) == (None, None)
+    assert scheduler.wait_seconds() == MAX_WAIT
+
+
+def test_duplicate_job_names_are_rejected(make_scheduler):
+    job = Job("a", lambda: None)
+    with pytest.raises(ValueError):
+        make_scheduler([job, Job("a", lambda: None)])
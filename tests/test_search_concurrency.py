@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""关键词并发搜索：本地桩服务器模拟搜狗微信，并发+按主机限速应比串行+固定休眠快，且不超过每主机速率"""
+
+import time
+
+import pytest
+
+from rate_limit import HostRateLimiter, TokenBucket
+
+RATE = 5.0
+LATENCY = 0.2
+KEYWORDS = [f"关键词{i}" for i in range(8)]
+
+RESULT_ITEM = """<li><h3><a href="/link?url={kw}-{i}">{kw} 相关文章 {i}</a></h3>
+<p class="txt-info">关于{kw}的摘要 {i}</p><a class="account">测试公众号</a><span class="s2">{i}小时前</span></li>"""
+
+
+def search_page(request):
+    time.sleep(LATENCY)
+    keyword = request["query"].get("query", "")
+    items = "".join(RESULT_ITEM.format(kw=keyword, i=i) for i in range(10))
+    return 200, {"Content-Type": "text/html; charset=utf-8"}, f'<ul class="news-list">{items}</ul>'
+
+
+@pytest.fixture
+def sogou(crawler, stub_server, monkeypatch):
+    server = stub_server(search_page)
+    monkeypatch.setattr(crawler, "SOGOU_SEARCH_URL", f"{server.url}/weixin")
+    return server
+
+
+def min_gap(requests):
+    times = sorted(request["time"] for request in requests)
+    return min(b - a for a, b in zip(times, times[1:]))
+
+
+def test_concurrent_search_is_faster_and_respects_host_rate(crawler, sogou, monkeypatch):
+    # 旧方式：逐个关键词搜索，每次之后按速率固定休眠（限速器不限制）
+    start = time.monotonic()
+    for keyword in KEYWORDS:
+        crawler.search_wechat_keyword(keyword)
+        time.sleep(1 / RATE)
+    serial = time.monotonic() - start
+    assert len(sogou.requests) == len(KEYWORDS)
+
+    sogou.requests.clear()
+    monkeypatch.setattr(crawler, "RATE_LIMITER", HostRateLimiter(default_rate=RATE, default_burst=1))
+    start = time.monotonic()
+    results = crawler.search_keywords(KEYWORDS, max_pages=1)
+    concurrent = time.monotonic() - start
+
+    assert [len(results[keyword]) for keyword in KEYWORDS] == [10] * len(KEYWORDS)
+    assert len(sogou.requests) == len(KEYWORDS)
+    assert concurrent < serial * 0.75
+    # 请求到达服务器的时间有少量调度抖动
+    assert min_gap(sogou.requests) >= 1 / RATE * 0.9
+
+
+def test_token_bucket_spacing():
+    bucket = TokenBucket(rate=20, burst=1)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[0] == 0
+    assert all(b - a == pytest.approx(1 / 20, abs=1e-3) for a, b in zip(waits, waits[1:]))
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_invalid_rates_are_rejected(rate):
+    limiter = HostRateLimiter()
+    with pytest.raises(ValueError):
+        limiter.set_default_rate(rate)
+    with pytest.raises(ValueError):
+        limiter.configure("example.com", rate)
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
+
+
+@pytest.mark.parametrize("option", ["--rate", "--workers", "--max-pages", "--pool-size"])
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_cli_rejects_non_positive_fetch_options(crawler, option, value, capsys):
+    with pytest.raises(SystemExit) as exc:
+        crawler.main(["--now", option, value])
+    assert exc.value.code == 2
+    assert f"{option} 必须大于 0" in capsys.readouterr().err
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""往期日报索引：按主题跳过已报道的文章，日报目录每天只扫描一次"""
+
+import csv
+import sqlite3
+
+import pytest
+
+from news_crawler import NewsItem
+from seen import SeenIndex
+
+
+def write_report(directory, name, date, articles):
+    with open(directory / f"{name}_{date}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["标题", "摘要", "来源", "URL", "日期", "热度"])
+        for url, title in articles:
+            writer.writerow([title, "", "测试", url, date, 60])
+
+
+@pytest.fixture
+def index(tmp_path):
+    instance = SeenIndex(str(tmp_path / "seen.sqlite3"))
+    yield instance
+    instance.close()
+
+
+def test_entries_are_per_topic(tmp_path, index):
+    write_report(tmp_path, "大模型日报", "2025-03-01", [("https://a.example/1", "旧文章")])
+    (tmp_path / "notes.csv").write_text("URL,标题,日期\nhttps://a.example/2,笔记,2025-03-01\n", encoding="utf-8")
+    assert index.import_reports(str(tmp_path)) == 1
+    assert index.first_seen("https://a.example/1", "", "大模型日报") == "2025-03-01"
+    # 同一篇文章没有出现在其他主题的日报中
+    assert index.first_seen("https://a.example/1", "旧文章", "凝血抗凝日报") is None
+    # 文件名不符合日报命名规则的CSV不导入
+    assert index.first_seen("https://a.example/2", "笔记", "notes") is None
+    # 未修改的日报不重复导入
+    assert index.import_reports(str(tmp_path)) == 0
+
+
+def test_old_index_is_rebuilt(tmp_path):
+    path = tmp_path / "seen.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE seen (key TEXT PRIMARY KEY, report_date TEXT NOT NULL);
+        CREATE TABLE imported_reports (filename TEXT PRIMARY KEY, mtime REAL NOT NULL);
+        INSERT INTO seen VALUES ('url:a.example/1', '2025-03-01');
+    """)
+    conn.close()
+    write_report(tmp_path, "大模型日报", "2025-03-01", [("https://a.example/1", "旧文章")])
+    index = SeenIndex(str(path))
+    assert index.import_reports(str(tmp_path)) == 1
+    assert index.first_seen("https://a.example/1", "旧文章", "大模型日报") == "2025-03-01"
+    index.close()
+
+
+def test_filter_seen_news_per_topic(crawler, tmp_path, monkeypatch):
+    topic = crawler.get_topic("1")
+    other = next(t for t in crawler.TOPICS.values() if t.report_name != topic.report_name)
+    write_report(tmp_path, topic.report_name, "2025-03-01", [("https://a.example/1", "旧文章")])
+    items = [NewsItem("旧文章", "https://a.example/1", "测试", "2025-03-02"),
+             NewsItem("新文章", "https://a.example/2", "测试", "2025-03-02")]
+    assert [item.title for item in crawler.filter_seen_news(items, "2025-03-02", topic)] == ["新文章"]
+    assert len(crawler.filter_seen_news(items, "2025-03-02", other)) == 2
+
+    # 同一天内不再扫描日报目录，第二天才导入新增的日报
+    scans = []
+    monkeypatch.setattr(crawler._seen_index, "import_reports", lambda directory: scans.append(directory))
+    crawler.filter_seen_news(items, "2025-03-02", topic)
+    crawler.get_seen_index("2025-03-02")
+    assert scans == []
+    crawler.get_seen_index("2025-03-03")
+    assert scans == [str(tmp_path)]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""新闻来源注册表：超时的来源收到取消事件后不再继续请求，已返回的结果保留"""
+
+import threading
+import time
+
+import pytest
+
+import sources
+from sources import Source, search_sources
+
+
+@pytest.fixture
+def only_source(monkeypatch):
+    """只注册给定的来源"""
+    def install(source):
+        monkeypatch.setattr(sources, "SOURCES", {source.name: source})
+        return source
+    return install
+
+
+def test_timed_out_source_is_cancelled(only_source):
+    pages = []
+    stopped = threading.Event()
+
+    def fetch(keywords, on_results=None, cancel=None):
+        while not cancel.is_set():
+            pages.append(time.monotonic())
+            on_results("a", ["item"], 10)
+            time.sleep(0.05)
+        stopped.set()
+        return {"a": ["item"] * len(pages)}
+
+    only_source(Source("slow", fetch, timeout=0.3, streaming=True, cancellable=True))
+    results = search_sources(["a"])
+    assert stopped.wait(1)
+    count = len(pages)
+    time.sleep(0.2)
+    assert len(pages) == count
+    # 超时前已返回的结果保留
+    assert 0 < len(results["a"]) <= count
+
+
+def test_non_cancellable_source_gets_no_cancel_argument(only_source):
+    only_source(Source("plain", lambda keywords: {keyword: [keyword] for keyword in keywords}))
+    assert search_sources(["a", "b"]) == {"a": ["a"], "b": ["b"]}
+
+
+PAGE_HOURS = {1: 20, 2: 10, 3: 1}
+RESULT_ITEM = """<li><h3><a href="/link?url={kw}-{page}-{i}">{kw} 文章 {page}-{i}</a></h3>
+<p class="txt-info">摘要 {page}-{i}</p><a class="account">测试公众号</a><span class="s2">{hours}小时前</span></li>"""
+
+
+def test_wechat_stops_paging_after_timeout(crawler, stub_server, monkeypatch):
+    def search_page(request):
+        time.sleep(0.3)
+        keyword = request["query"]["query"]
+        page = int(request["query"].get("page", 1))
+        # 越往后的页面文章越新，不取消时会一直翻到 MAX_PAGES
+        items = "".join(RESULT_ITEM.format(kw=keyword, page=page, i=i, hours=PAGE_HOURS[page]) for i in range(10))
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, f'<ul class="news-list">{items}</ul>'
+
+    server = stub_server(search_page)
+    monkeypatch.setattr(crawler, "SOGOU_SEARCH_URL", f"{server.url}/weixin")
+    monkeypatch.setattr(crawler, "MAX_PAGES", 3)
+    keywords = ["甲", "乙", "丙", "丁"]
+    monkeypatch.setattr(crawler.SOURCES["wechat"], "timeout", 0.45)
+    monkeypatch.setattr(sources, "SOURCES", {"wechat": crawler.SOURCES["wechat"]})
+
+    results = search_sources(keywords)
+    # 第1页在超时前返回，第2页正在进行；超时后不再请求第3页
+    time.sleep(1)
+    pages = [int(request["query"].get("page", 1)) for request in server.requests]
+    assert pages.count(1) == 4 and 2 in pages and 3 not in pages
+    assert all(len(results[keyword]) >= 10 for keyword in keywords)
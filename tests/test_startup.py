@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""启动耗时：导入 news_crawler 时不加载重量级依赖，--help 和常驻模式（含分词词典预加载）的启动在预算之内"""
+
+import json
+import subprocess
+import sys
+import time
+
+from conftest import ROOT
+
+NEWS_CRAWLER = f"{ROOT}/news_crawler.py"
+# 用到时才导入的模块
+LAZY_MODULES = ["requests", "lxml", "bs4", "jieba", "sqlite3"]
+# 启动预算（秒），留出较慢机器的余量
+HELP_BUDGET = 1.5
+SCHEDULE_BUDGET = 8.0
+
+
+def test_import_does_not_load_heavy_modules(tmp_path):
+    code = (
+        f"import sys, json; sys.path.insert(0, {ROOT!r}); import news_crawler; "
+        f"print(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=tmp_path, check=True)
+    assert json.loads(result.stdout.splitlines()[-1]) == []
+
+
+def test_help_startup(tmp_path):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, NEWS_CRAWLER, "--help"], capture_output=True, cwd=tmp_path, check=True)
+    assert time.perf_counter() - start < HELP_BUDGET
+
+
+def test_schedule_startup(tmp_path):
+    """真实的 --schedule 启动：预加载分词词典、创建调度器，直到打印出任务的运行时间（调度循环开始前）"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", NEWS_CRAWLER, "--schedule", "--at", "03:17"],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, cwd=tmp_path,
+    )
+    try:
+        output = []
+        for line in process.stdout:
+            output.append(line)
+            if "每天 03:17 运行" in line:
+                break
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait(10)
+    assert "每天 03:17 运行" in output[-1], "".join(output)
+    assert elapsed < SCHEDULE_BUDGET
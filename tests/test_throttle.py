@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""自适应节流：多个进程共用状态文件时合并保存，不丢失其他进程的减速；429 不在传输层重试"""
+
+import json
+import time
+
+from http_client import HttpClient
+from rate_limit import HostRateLimiter
+from throttle import ThrottleController
+
+URL = "https://weixin.sogou.com/weixin?query=a"
+HOST = "weixin.sogou.com"
+
+
+def controller(path):
+    return ThrottleController(str(path), HostRateLimiter(default_rate=1.0), ["UA1", "UA2"])
+
+
+def test_save_keeps_other_process_backoff(tmp_path, capsys):
+    path = tmp_path / "throttle_state.json"
+    first, second = controller(path), controller(path)
+    first.host_throttle(HOST)
+    second.host_throttle(HOST)
+
+    time.sleep(0.01)
+    second.on_block(URL, "captcha", time.monotonic())
+    assert second.host_throttle(HOST).rate == 0.5
+    # 第一个进程没有被拦截，稍后保存时不覆盖第二个进程的减速，并在本进程中采用
+    first.record_results("关键词", 0)
+    first.save()
+    state = json.loads(path.read_text(encoding="utf-8"))
+    assert state["hosts"][HOST]["rate"] == 0.5
+    assert state["hosts"][HOST]["blocks"] == 1
+    assert state["keywords"]["关键词"]["empty_runs"] == 1
+    assert first.host_throttle(HOST).rate == 0.5
+    assert first.rate_limiter.bucket_for(HOST).rate == 0.5
+    assert "在其他进程中被拦截" in capsys.readouterr().out
+
+    # 再次保存时双方的状态都保留，拦截次数不重复累加
+    second.save()
+    state = json.loads(path.read_text(encoding="utf-8"))
+    assert state["hosts"][HOST]["blocks"] == 1
+    assert state["keywords"]["关键词"]["empty_runs"] == 1
+
+
+def test_own_earlier_save_is_not_adopted(tmp_path):
+    path = tmp_path / "throttle_state.json"
+    throttle = controller(path)
+    host = throttle.host_throttle(HOST)
+    throttle.on_block(URL, "captcha", time.monotonic())
+    # 本进程之后恢复了速率，不会被自己上次保存的较低速率拉回去
+    host.rate = 0.8
+    throttle.save()
+    assert json.loads(path.read_text(encoding="utf-8"))["hosts"][HOST]["rate"] == 0.8
+
+
+def test_429_is_not_retried(stub_server):
+    statuses = {"/limited": [429] * 5, "/flaky": [503, 200]}
+
+    def handle(request):
+        codes = statuses[request["path"]]
+        return (codes.pop(0) if codes else 200), {"Content-Type": "text/plain"}, "ok"
+
+    server = stub_server(handle)
+    client = HttpClient(retries=3, backoff_factor=0.01)
+    # 429 直接返回给调用方，自适应节流第一次被拦截就能减速
+    assert client.session.get(f"{server.url}/limited").status_code == 429
+    assert [request["path"] for request in server.requests] == ["/limited"]
+    # 5xx 仍然重试
+    assert client.session.get(f"{server.url}/flaky").status_code == 200
+    assert [request["path"] for request in server.requests].count("/flaky") == 2
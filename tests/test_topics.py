@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""主题配置：来源加分名单的全局默认值和按主题覆盖；无效配置被拒绝，出错的文件不影响其他主题"""
+
+import json
+import os
+import time
+
+import pytest
+
+from topics import DEFAULT_WEIGHTS, TopicError, TopicRegistry, compile_plan
+
+
+def test_account_lists_default_to_global():
+    plan = compile_plan({"id": "1", "name": "大模型", "keywords": ["大模型"]})
+    # 未配置名单的主题与之前一样给医学公众号加分
+    assert plan.account_score("丁香医生") == DEFAULT_WEIGHTS["important_account"]
+    assert plan.account_score("某某健康") == DEFAULT_WEIGHTS["account_hint"]
+    assert plan.account_score("科技日报") == 0
+
+
+def test_topic_overrides_account_lists():
+    plan = compile_plan({
+        "id": "1", "name": "大模型", "keywords": ["大模型"],
+        "important_accounts": ["机器之心"], "account_hints": [],
+        "weights": {"important_account": 5},
+    })
+    assert plan.account_score("机器之心") == 5
+    assert plan.account_score("丁香医生") == 0
+    assert plan.account_score("某某健康") == 0
+    assert plan.account_score("") == 0
+
+
+def write(directory, name, config):
+    path = directory / name
+    path.write_text(config if isinstance(config, str) else json.dumps(config, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("config, message", [
+    ([], "应为一个对象"),
+    ({"id": "1", "keywords": ["a"]}, "缺少 id 或 name"),
+    ({"id": "1", "name": "主题", "keywords": []}, "keywords"),
+    ({"id": "1", "name": "主题", "keywords": ["a", ""]}, "keywords"),
+    ({"id": "1", "name": "主题", "keywords": ["a"], "sources": ["unknown"]}, "未知的新闻来源"),
+    ({"id": "1", "name": "主题", "keywords": ["a"], "important_accounts": "丁香医生"}, "important_accounts"),
+    ({"id": "1", "name": "主题", "keywords": ["a"], "schedule": [1200]}, "不是字符串"),
+    ({"id": "1", "name": "主题", "keywords": ["a"], "schedule": ["25:00"]}, "schedule 无效"),
+    ({"id": "1", "name": "主题", "keywords": ["a"], "weights": {"popularity": 1}}, "weights 无效"),
+    ({"id": "1", "name": "主题", "keywords": ["a"], "weights": {"account_hint": "10"}}, "weights 无效"),
+])
+def test_invalid_config_is_rejected(config, message):
+    with pytest.raises(TopicError, match=message):
+        compile_plan(config, source_names={"wechat", "baidu"})
+
+
+def test_plan_is_immutable():
+    plan = compile_plan({"name": "主题", "keywords": ["a"]}, path="topics/7.json")
+    # id 默认为文件名，report_name 默认为“{name}日报”
+    assert (plan.id, plan.report_name) == ("7", "主题日报")
+    with pytest.raises(AttributeError):
+        plan.keywords = ("b",)
+    with pytest.raises(TypeError):
+        plan.weights["important_account"] = 0
+
+
+def test_invalid_file_keeps_previous_plan(tmp_path, capsys):
+    path = write(tmp_path, "1.json", {"id": "1", "name": "大模型", "keywords": ["大模型"]})
+    write(tmp_path, "2.json", {"id": "2", "name": "凝血", "keywords": ["凝血"]})
+    registry = TopicRegistry(str(tmp_path))
+    assert registry.reload() == {"1", "2"}
+    old_plan = registry.plans["1"]
+
+    # JSON 语法错误：只打印错误，该主题保留原来的计划，其他主题照常
+    write(tmp_path, "1.json", '{"id": "1", "name": "大模型", "keywords": [')
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert registry.reload() == set()
+    assert registry.plans["1"] is old_plan
+    assert "加载主题配置" in capsys.readouterr().out
+
+    # 修正后重新编译；新加入的文件第一次就无效时不加载
+    write(tmp_path, "1.json", {"id": "1", "name": "大模型", "keywords": ["大模型", "LLM"]})
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+    write(tmp_path, "3.json", {"id": "3", "keywords": ["x"]})
+    assert registry.reload() == {"1"}
+    assert registry.plans["1"].keywords == ("大模型", "LLM")
+    assert set(registry.plans) == {"1", "2"}
+
+
+def test_unchanged_files_are_not_recompiled(tmp_path):
+    write(tmp_path, "1.json", {"id": "1", "name": "大模型", "keywords": ["大模型"]})
+    registry = TopicRegistry(str(tmp_path))
+    registry.reload()
+    plans = registry.plans
+    assert registry.reload() == set()
+    assert registry.plans is plans
+    (tmp_path / "1.json").unlink()
+    assert registry.reload() == {"1"}
+    assert registry.plans == {}
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+分布式任务队列：租约到期重新领取、达到最多尝试次数后标记为失败、多个连接不会领到同一个任务；
+协调进程放弃后剩余任务被取消；按轮次翻页与单进程的请求和结果一致
+"""
+
+import threading
+import time
+
+import pytest
+
+from work_queue import CANCELLED, DONE, FAILED, PENDING, RUNNING, TaskQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    instance = TaskQueue(str(tmp_path / "queue.sqlite3"))
+    yield instance
+    instance.close()
+
+
+def test_put_ignores_duplicate_keys(queue):
+    assert queue.put("run", "search", "a", {"keyword": "a"})
+    assert not queue.put("run", "search", "a", {"keyword": "其他"})
+    # 不同运行中的同名任务互不影响
+    assert queue.put("other", "search", "a", {"keyword": "a"})
+    task = queue.claim("w1", ["search"])
+    assert (task["run_id"], task["payload"], task["attempts"]) == ("run", {"keyword": "a"}, 1)
+    assert queue.claim("w1", ["summary"]) is None
+
+
+def test_expired_lease_is_reclaimed_then_failed(tmp_path):
+    queue = TaskQueue(str(tmp_path / "queue.sqlite3"), lease=0.05, max_attempts=2)
+    queue.put("run", "search", "a", {})
+    assert queue.claim("w1")["attempts"] == 1
+    # 租约未到期时其他工作进程领不到
+    assert queue.claim("w2") is None
+    time.sleep(0.1)
+    # 第一个工作进程崩溃，租约到期后重新领取
+    assert queue.claim("w2")["attempts"] == 2
+    assert queue.progress("run") == {RUNNING: 1}
+    time.sleep(0.1)
+    # 达到最多尝试次数后不再领取，标记为失败
+    assert queue.claim("w3") is None
+    assert queue.progress("run") == {FAILED: 1}
+    assert queue.unfinished("run") == 0
+    error, = queue.conn.execute("SELECT error FROM tasks").fetchone()
+    assert "租约到期" in error
+    queue.close()
+
+
+def test_fail_retries_until_max_attempts(tmp_path):
+    queue = TaskQueue(str(tmp_path / "queue.sqlite3"), max_attempts=2)
+    queue.put("run", "search", "a", {})
+    queue.fail(queue.claim("w1")["id"], "超时")
+    assert queue.progress("run") == {PENDING: 1}
+    queue.fail(queue.claim("w1")["id"], "超时")
+    assert queue.progress("run") == {FAILED: 1}
+    assert queue.claim("w1") is None
+    queue.close()
+
+
+def test_concurrent_claims_are_exclusive(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    setup = TaskQueue(path)
+    for i in range(200):
+        setup.put("run", "search", str(i), {"i": i})
+    claimed = []
+    lock = threading.Lock()
+
+    def work(name):
+        # 每个线程一个连接，相当于不同的工作进程
+        queue = TaskQueue(path)
+        while True:
+            task = queue.claim(name)
+            if task is None:
+                break
+            with lock:
+                claimed.append(task["key"])
+            queue.complete(task["id"], task["payload"]["i"])
+        queue.close()
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed, key=int) == [str(i) for i in range(200)]
+    assert setup.results("run", "search") == {str(i): i for i in range(200)}
+    setup.close()
+
+
+def test_purge_removes_old_tasks(queue):
+    queue.put("old", "search", "a", {})
+    time.sleep(0.01)
+    cutoff = time.time()
+    queue.put("new", "search", "a", {})
+    assert queue.purge(cutoff) == 1
+    assert queue.progress("old") == {}
+    assert queue.progress("new") == {PENDING: 1}
+
+
+def test_cancel_marks_remaining_tasks(queue):
+    for key in "abc":
+        queue.put("run", "search", key, {"keyword": key})
+    queue.put("other", "search", "a", {"keyword": "a"})
+    first = queue.claim("w1")
+    queue.complete(first["id"], ["done"])
+    second = queue.claim("w1")
+    assert queue.cancel("run") == 2
+    # 取消的任务不再被领取，处理中的任务完成或失败后也不覆盖取消状态
+    assert queue.claim("w2")["run_id"] == "other"
+    queue.complete(second["id"], ["late"])
+    queue.fail(second["id"], "late")
+    assert queue.progress("run") == {DONE: 1, CANCELLED: 2}
+    assert queue.results("run", "search") == {"a": ["done"]}
+    assert queue.unfinished("run") == 0
+
+
+def test_cancel_by_kind(queue):
+    queue.put("run", "search", "a", {})
+    queue.put("run", "summary", "u", {})
+    assert queue.cancel("run", "summary") == 1
+    assert queue.progress("run") == {"pending": 1, CANCELLED: 1}
+
+
+def test_wait_for_tasks_cancels_on_timeout(crawler, queue, monkeypatch):
+    monkeypatch.setattr(crawler, "COORDINATOR_WORKS", False)
+    queue.put("run", "search", "a", {"keyword": "a"})
+    start = time.monotonic()
+    assert crawler.wait_for_tasks(queue, "run", "search", 0.1) is False
+    assert time.monotonic() - start < 1
+    assert queue.progress("run") == {CANCELLED: 1}
+    assert queue.claim("worker") is None
+
+
+PAGE_HOURS = {1: 20, 2: 10, 3: 1}
+RESULT_ITEM = """<li><h3><a href="/link?url={kw}-{page}-{i}">{kw} 文章 {page}-{i}</a></h3>
+<p class="txt-info">摘要 {page}-{i}</p><a class="account">测试公众号</a><span class="s2">{hours}小时前</span></li>"""
+
+
+def test_queue_paging_matches_single_process(crawler, queue, stub_server, monkeypatch):
+    def search_page(request):
+        keyword = request["query"]["query"]
+        page = int(request["query"].get("page", 1))
+        # 关键词“甲”越往后的页面文章越新，值得继续翻页；其他关键词第1页最新
+        hours = PAGE_HOURS[page] if keyword == "甲" else PAGE_HOURS[4 - page]
+        items = "".join(RESULT_ITEM.format(kw=keyword, page=page, i=i, hours=hours) for i in range(10))
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, f'<ul class="news-list">{items}</ul>'
+
+    server = stub_server(search_page)
+    monkeypatch.setattr(crawler, "SOGOU_SEARCH_URL", f"{server.url}/weixin")
+    monkeypatch.setattr(crawler, "MAX_PAGES", 3)
+    monkeypatch.setattr(crawler, "COORDINATOR_WORKS", True)
+    keywords = ["甲", "乙", "丙"]
+
+    single = crawler.search_keywords(keywords)
+    single_requests = sorted((r["query"]["query"], r["query"].get("page", "1")) for r in server.requests)
+    server.requests.clear()
+
+    paged = crawler.page_wechat_via_queue(queue, "run", [("", keywords)], time.monotonic() + 30)
+    queue_requests = sorted((r["query"]["query"], r["query"].get("page", "1")) for r in server.requests)
+    # 协调进程用共享的翻页门槛决定是否继续，不会每个关键词都翻到最大页数
+    assert queue_requests == single_requests
+    assert len(queue_requests) < len(keywords) * 3
+    assert {keyword: [item.title for item in items] for keyword, items in paged[""].items()} == {
+        keyword: [item.title for item in items] for keyword, items in single.items()
+    }
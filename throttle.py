@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+反爬自适应节流：识别验证码页和跳转到 antispider 的拦截，按主机用AIMD调整请求速率和并发数。
+
+- 每次正常响应累计成功次数，每 INCREASE_EVERY 次把速率加 INCREASE_STEP、并发数加1（加性增）；
+- 被拦截时速率和并发数减半（乘性减），并让该主机暂停一段时间，同时丢弃该主机的Cookie、
+  换一个User-Agent，重新建立会话。一次拦截只减速一次：减速之前已经发出的请求再被拦截时忽略，
+  暂停结束后的请求仍被拦截（期间没有成功过）说明封禁尚未解除，只把暂停时间加倍，不再继续减速；
+- 学到的速率、并发数、Cookie和User-Agent保存在状态文件中，下次运行从上次的速率开始，而不是固定的保守值；
+  多个工作进程共用一个状态文件，保存时在文件锁中与其他进程写入的状态合并，其他进程的减速不会被覆盖；
+- 连续多次运行都没有结果的关键词暂停搜索几天，本次运行中多次被拦截的关键词不再重试。
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# AIMD 参数
+INCREASE_EVERY = 5
+INCREASE_STEP = 0.05
+DECREASE_FACTOR = 0.5
+MIN_RATE = 0.05
+DEFAULT_MAX_RATE = 2.0
+DEFAULT_MAX_CONCURRENCY = 4
+# 被拦截后暂停的时间（秒）：BLOCK_COOLDOWN * 2^(连续拦截次数-1)，最多 MAX_COOLDOWN
+BLOCK_COOLDOWN = 10
+MAX_COOLDOWN = 120
+# 关键词连续这么多次运行都没有结果时，暂停搜索 DEAD_KEYWORD_DAYS 天
+DEAD_AFTER_EMPTY_RUNS = 3
+DEAD_KEYWORD_DAYS = 3
+
+# 拦截页面的特征：跳转到 /antispider/，或页面中有验证码表单
+BLOCK_URL = re.compile(r"/antispider/|/captcha", re.I)
+# （正常结果页的脚本中也可能出现 antispider 字样，页面内容只匹配验证码表单和提示语）
+BLOCK_MARKERS = ("seccodeForm", "seccodeImage", "用户您好，我们的系统检测到您网络中存在异常访问请求")
+BLOCK_STATUS = (403, 429)
+
+
+def detect_block(response):
+    """响应是否是反爬拦截，是时返回原因，否则返回 None"""
+    if response.status_code in BLOCK_STATUS:
+        return f"status {response.status_code}"
+    urls = [r.headers.get("Location", "") for r in getattr(response, "history", ())] + [response.url or ""]
+    if any(BLOCK_URL.search(url) for url in urls):
+        return "antispider"
+    # 只检查页面开头，正常的结果页不会包含这些特征
+    head = response.text[:20000] if response.status_code == 200 else ""
+    for marker in BLOCK_MARKERS:
+        if marker in head:
+            return "captcha"
+    return None
+
+
+class HostThrottle:
+    """单个主机的AIMD状态和并发限制"""
+
+    def __init__(self, host, rate, concurrency, max_rate, max_concurrency):
+        self.host = host
+        self.rate = rate
+        self.concurrency = concurrency
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.successes = 0
+        self.consecutive_blocks = 0
+        self.blocks = 0
+        self.last_block = float("-inf")
+        self.paused_until = 0.0
+        self.active = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """等待暂停结束并占用一个并发名额"""
+        with self.condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.active < self.concurrency:
+                    self.active += 1
+                    return
+                self.condition.wait(pause if pause > 0 else None)
+
+    def wait_paused(self):
+        """等待暂停结束：占用名额后排队等待速率配额期间，主机可能因其他请求被拦截而暂停"""
+        with self.condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0:
+                    return
+                self.condition.wait(pause)
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        with self.condition:
+            self.consecutive_blocks = 0
+            self.successes += 1
+            if self.successes % INCREASE_EVERY:
+                return False
+            self.rate = min(self.rate + INCREASE_STEP, self.max_rate)
+            self.concurrency = min(self.concurrency + 1, self.max_concurrency)
+            self.condition.notify_all()
+            return True
+
+    def on_block(self, started):
+        """
+        记录在 started（time.monotonic()）发出的请求被拦截：乘性减并暂停，返回暂停的秒数；
+        请求在上次拦截之前发出时已经处理过，返回 None
+        """
+        with self.condition:
+            if started < self.last_block:
+                return None
+            self.blocks += 1
+            if not self.consecutive_blocks:
+                self.rate = max(self.rate * DECREASE_FACTOR, MIN_RATE)
+                self.concurrency = max(self.concurrency // 2, 1)
+            self.consecutive_blocks += 1
+            self.successes = 0
+            cooldown = min(BLOCK_COOLDOWN * 2 ** (self.consecutive_blocks - 1), MAX_COOLDOWN)
+            now = time.monotonic()
+            self.last_block = now
+            self.paused_until = max(self.paused_until, now + cooldown)
+            return cooldown
+
+
+class ThrottleController:
+    """
+    按主机的自适应节流器。rate_limiter 为 HostRateLimiter（或共享的限速器），
+    速率变化时通过 rate_limiter.configure(host, rate) 生效；并发数由 slot() 限制。
+    """
+
+    def __init__(self, path, rate_limiter, user_agents, max_rate=DEFAULT_MAX_RATE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.path = path
+        self.rate_limiter = rate_limiter
+        self.user_agents = list(user_agents)
+        # 通过 --rate 设置了更高的速率时，上限随之提高
+        self.max_rate = max(max_rate, rate_limiter.default_rate)
+        self.max_concurrency = max_concurrency
+        self.lock = threading.Lock()
+        self.hosts = {}
+        # 本次运行中放弃的关键词
+        self.given_up = set()
+        # 本次运行中修改过的关键词状态，保存时覆盖其他进程写入的值
+        self.changed_keywords = set()
+        self.state = self._read_state()
+        # 上次读取或保存状态文件的时间，之后其他进程写入的主机状态在保存时合并
+        self.synced_at = time.time()
+
+    def _read_state(self):
+        state = {"hosts": {}, "cookies": [], "user_agents": {}, "keywords": {}}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"读取节流状态 {self.path} 出错，忽略: {e}")
+        return state
+
+    def host_throttle(self, host):
+        with self.lock:
+            throttle = self.hosts.get(host)
+            if throttle is None:
+                saved = self.state["hosts"].get(host, {})
+                throttle = HostThrottle(
+                    host,
+                    rate=min(saved.get("rate", self.rate_limiter.default_rate), self.max_rate),
+                    concurrency=min(saved.get("concurrency", self.max_concurrency), self.max_concurrency),
+                    max_rate=self.max_rate,
+                    max_concurrency=self.max_concurrency,
+                )
+                self.rate_limiter.configure(host, throttle.rate)
+                self.hosts[host] = throttle
+            return throttle
+
+    @staticmethod
+    def _host(url):
+        # 与 HostRateLimiter 一致，按 netloc（含端口）区分主机
+        return urlsplit(url).netloc or url
+
+    def slot(self, url):
+        """限制并发并等待暂停结束：with controller.slot(url) as host_throttle: ...，返回 HostThrottle"""
+        return _Slot(self.host_throttle(self._host(url)))
+
+    def user_agent(self, url):
+        """该主机当前会话使用的User-Agent，同一会话中保持不变，与Cookie对应"""
+        host = self._host(url)
+        with self.lock:
+            agent = self.state["user_agents"].get(host)
+            if agent is None:
+                agent = self.state["user_agents"][host] = random.choice(self.user_agents)
+            return agent
+
+    def on_success(self, url):
+        throttle = self.host_throttle(self._host(url))
+        if throttle.on_success():
+            self.rate_limiter.configure(throttle.host, throttle.rate)
+
+    def on_block(self, url, reason, started, session=None):
+        """
+        记录一次拦截（started 为请求发出时的 time.monotonic()）：降低速率和并发、暂停该主机、
+        丢弃Cookie并更换User-Agent。同一次拦截中已经在途的其他请求不重复处理
+        """
+        host = self._host(url)
+        throttle = self.host_throttle(host)
+        cooldown = throttle.on_block(started)
+        if cooldown is None:
+            return
+        self.rate_limiter.configure(host, throttle.rate)
+        print(f"{host} 返回反爬拦截（{reason}），速率降为 {throttle.rate:.2f} 次/秒、"
+              f"并发 {throttle.concurrency}，暂停 {cooldown} 秒")
+        with self.lock:
+            agents = [a for a in self.user_agents if a != self.state["user_agents"].get(host)] or self.user_agents
+            self.state["user_agents"][host] = random.choice(agents)
+        if session is not None:
+            domain = _cookie_domain(host)
+            for cookie in list(session.cookies):
+                if cookie.domain.lstrip(".").endswith(domain):
+                    session.cookies.clear(cookie.domain, cookie.path, cookie.name)
+        self.save(session)
+
+    def is_dead(self, keyword):
+        """关键词是否被暂停搜索（长期无结果）或在本次运行中已放弃"""
+        with self.lock:
+            if keyword in self.given_up:
+                return True
+            entry = self.state["keywords"].get(keyword)
+            return bool(entry) and entry.get("skip_until", 0) > time.time()
+
+    def give_up(self, keyword):
+        """本次运行中不再重试该关键词"""
+        with self.lock:
+            self.given_up.add(keyword)
+
+    def record_results(self, keyword, count):
+        """记录关键词第一页的结果数，连续多次运行没有结果时暂停搜索"""
+        with self.lock:
+            self.changed_keywords.add(keyword)
+            if count:
+                self.state["keywords"].pop(keyword, None)
+                return
+            entry = self.state["keywords"].setdefault(keyword, {"empty_runs": 0})
+            entry["empty_runs"] += 1
+            if entry["empty_runs"] >= DEAD_AFTER_EMPTY_RUNS:
+                entry["skip_until"] = time.time() + DEAD_KEYWORD_DAYS * 86400
+                entry["empty_runs"] = 0
+                print(f"关键词 '{keyword}' 连续 {DEAD_AFTER_EMPTY_RUNS} 次没有结果，{DEAD_KEYWORD_DAYS} 天内不再搜索")
+
+    def load_cookies(self, session):
+        """把上次保存的Cookie加入会话"""
+        from requests.cookies import create_cookie
+
+        for fields in self.state.get("cookies", []):
+            if fields.get("expires") and fields["expires"] < time.time():
+                continue
+            session.cookies.set_cookie(create_cookie(**fields))
+
+    def save(self, session=None):
+        """
+        保存各主机的速率、并发数、会话Cookie和关键词状态（先写临时文件再替换）。
+        在文件锁中重新读取状态文件合并：其他进程在上次同步之后写入的主机速率和并发数更低时采用较低的值
+        （同时用于本进程），拦截次数累加，本进程没有用到的主机、Cookie和关键词保留
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock, _file_lock(f"{self.path}.lock"):
+            disk = self._read_state()
+            now = time.time()
+            for host, throttle in self.hosts.items():
+                saved = disk["hosts"].get(host, {})
+                if saved.get("updated", 0) > self.synced_at:
+                    self._adopt(throttle, saved)
+                disk["hosts"][host] = {
+                    "rate": round(throttle.rate, 4),
+                    "concurrency": throttle.concurrency,
+                    "blocks": saved.get("blocks", 0) + throttle.blocks,
+                    "updated": now,
+                }
+                throttle.blocks = 0
+            for host in self.hosts:
+                if host in self.state["user_agents"]:
+                    disk["user_agents"][host] = self.state["user_agents"][host]
+            for keyword in self.changed_keywords:
+                if keyword in self.state["keywords"]:
+                    disk["keywords"][keyword] = self.state["keywords"][keyword]
+                else:
+                    disk["keywords"].pop(keyword, None)
+            self.changed_keywords.clear()
+            if session is not None:
+                domains = {_cookie_domain(host) for host in self.hosts}
+
+                def ours(domain):
+                    return any(domain.lstrip(".").endswith(d) for d in domains)
+
+                disk["cookies"] = [c for c in disk["cookies"] if not ours(c["domain"])] + [
+                    {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+                     "expires": c.expires, "secure": c.secure}
+                    for c in session.cookies
+                    if ours(c.domain)
+                ]
+            self.state = disk
+            self.synced_at = now
+            # 多个工作进程可能同时保存，各自使用不同的临时文件
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.state, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"保存节流状态出错: {e}")
+
+    def _adopt(self, throttle, saved):
+        """采用其他进程保存的更低的速率和并发数"""
+        with throttle.condition:
+            rate = min(throttle.rate, saved.get("rate", throttle.rate))
+            concurrency = min(throttle.concurrency, saved.get("concurrency", throttle.concurrency))
+            if (rate, concurrency) == (throttle.rate, throttle.concurrency):
+                return
+            throttle.rate, throttle.concurrency = rate, concurrency
+        self.rate_limiter.configure(throttle.host, rate)
+        print(f"{throttle.host} 在其他进程中被拦截，速率降为 {rate:.2f} 次/秒、并发 {concurrency}")
+
+
+@contextmanager
+def _file_lock(path):
+    """进程间的排他文件锁（Unix 用 fcntl.flock，Windows 用 msvcrt.locking）"""
+    with open(path, "a+b") as f:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+
+            f.seek(0)
+            # LK_LOCK 最多重试10秒，之后抛出 OSError
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class _Slot:
+    def __init__(self, throttle):
+        self.throttle = throttle
+
+    def __enter__(self):
+        self.throttle.acquire()
+        return self.throttle
+
+    def __exit__(self, *exc):
+        self.throttle.release()
+
+
+def _cookie_domain(host):
+    """主机对应的Cookie域（取最后两级，weixin.sogou.com -> sogou.com）"""
+    return ".".join(host.rsplit(":", 1)[0].split(".")[-2:])
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+主题配置：每个主题是配置目录下的一个 JSON（或安装了 PyYAML 时的 YAML）文件，
+加载时编译成不可修改的 TopicPlan（关键词匹配器、来源、运行时间、评分权重）。
+
+TopicRegistry 记录每个文件的修改时间和大小，reload() 只重新编译变化了的文件；
+某个文件有错误时打印错误并保留该主题原来的计划，不影响其他主题。
+
+配置示例（topics/2.json）:
+{
+    "id": "2",
+    "name": "凝血抗凝",
+    "report_name": "凝血抗凝日报",
+    "keywords": ["凝血", "抗凝", "血栓"],
+    "sources": ["wechat", "baidu"],
+    "schedule": ["08:00", "20:00"],
+    "important_accounts": ["丁香医生", "医学界"],
+    "account_hints": ["医", "健康"],
+    "weights": {"important_account": 20, "account_hint": 10, "relevance_bonus": 10}
+}
+只有 name 和 keywords 是必填的；id 默认为文件名，report_name 默认为“{name}日报”。
+没有配置 important_accounts / account_hints 的主题使用全局默认名单（DEFAULT_IMPORTANT_ACCOUNTS /
+DEFAULT_ACCOUNT_HINTS，与之前所有主题共用的名单相同），配置为空列表时不加分。
+YAML 中的时间要加引号（schedule: ["20:00"]），不加引号的 20:00 会被 YAML 1.1 读成六十进制整数 1200。
+"""
+
+import glob
+import json
+import os
+from types import MappingProxyType
+
+from matcher import get_keyword_matcher
+from scheduler import parse_time_of_day
+
+CONFIG_PATTERNS = ("*.json", "*.yaml", "*.yml")
+
+# 评分权重的默认值
+DEFAULT_WEIGHTS = {
+    "important_account": 20,  # 来源是知名公众号（精确匹配）
+    "account_hint": 10,       # 来源名称中含有提示词
+    "relevance_bonus": 10,    # 关键词标签的主题相关度加分上限
+}
+
+# 来源加分的全局默认名单，主题配置中的 important_accounts / account_hints 覆盖
+DEFAULT_IMPORTANT_ACCOUNTS = (
+    "中国医学论坛报", "医脉通", "丁香医生", "医学界", "中华医学杂志",
+    "NEJM医学前沿", "柳叶刀", "血栓与止血", "中华血液学杂志", "中国循环杂志",
+)
+DEFAULT_ACCOUNT_HINTS = ("医", "健康", "血液", "心脏")
+
+
+class TopicError(ValueError):
+    """主题配置无效"""
+
+
+class TopicPlan:
+    """编译好的主题，创建后不可修改，可在多个线程间共享"""
+
+    __slots__ = (
+        "id", "name", "report_name", "keywords", "sources", "schedule",
+        "important_accounts", "title_matcher", "account_hint_matcher", "weights", "path",
+    )
+
+    def __init__(self, id, name, keywords, report_name=None, sources=None, schedule=(),
+                 important_accounts=(), account_hints=(), weights=None, path=None):
+        values = {
+            "id": str(id),
+            "name": name,
+            "report_name": report_name or f"{name}日报",
+            "keywords": tuple(keywords),
+            "sources": tuple(sources) if sources else None,
+            "schedule": tuple(schedule),
+            "important_accounts": frozenset(important_accounts),
+            "title_matcher": get_keyword_matcher(tuple(keywords)),
+            "account_hint_matcher": get_keyword_matcher(tuple(account_hints)) if account_hints else None,
+            "weights": MappingProxyType({**DEFAULT_WEIGHTS, **(weights or {})}),
+            "path": path,
+        }
+        for field, value in values.items():
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TopicPlan 不可修改，请修改配置文件后重新加载")
+
+    def account_score(self, account):
+        """来源（公众号）加分"""
+        if not account:
+            return 0
+        if account in self.important_accounts:
+            return self.weights["important_account"]
+        if self.account_hint_matcher is not None and self.account_hint_matcher.search(account):
+            return self.weights["account_hint"]
+        return 0
+
+    def __repr__(self):
+        return f"TopicPlan({self.id!r}, {self.name!r}, {len(self.keywords)} 个关键词)"
+
+
+def load_config_file(path):
+    """读取一个配置文件，返回字典"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError:
+            raise TopicError(f"读取 {path} 需要安装 PyYAML")
+        try:
+            return yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise TopicError(f"YAML 语法错误: {e}")
+
+
+def compile_plan(config, path=None, source_names=None):
+    """
+    检查配置并编译为 TopicPlan；source_names 为已注册的来源名称，
+    提供时检查配置中的来源是否存在。配置无效时抛出 TopicError。
+    """
+    if not isinstance(config, dict):
+        raise TopicError("主题配置应为一个对象")
+    default_id = os.path.splitext(os.path.basename(path))[0] if path else None
+    topic_id = config.get("id", default_id)
+    name = config.get("name")
+    keywords = config.get("keywords")
+    if not topic_id or not name:
+        raise TopicError("主题配置缺少 id 或 name")
+    if not _is_string_list(keywords) or not keywords:
+        raise TopicError(f"主题 {name} 的 keywords 应为非空的字符串列表")
+    for field in ("sources", "important_accounts", "account_hints"):
+        if config.get(field) is not None and not _is_string_list(config[field]):
+            raise TopicError(f"主题 {name} 的 {field} 应为字符串列表")
+    sources = config.get("sources")
+    if sources and source_names is not None:
+        unknown = [s for s in sources if s not in source_names]
+        if unknown:
+            raise TopicError(f"主题 {name} 中有未知的新闻来源: {', '.join(unknown)}")
+    schedule = config.get("schedule") or []
+    if not isinstance(schedule, list):
+        raise TopicError(f"主题 {name} 的 schedule 应为 HH:MM 字符串的列表")
+    for value in schedule:
+        if not isinstance(value, str):
+            raise TopicError(f"主题 {name} 的 schedule 中的 {value!r} 不是字符串，"
+                             f"YAML 中的时间要加引号，如 \"20:00\"（不加引号会被读成整数）")
+    try:
+        for value in schedule:
+            parse_time_of_day(value)
+    except ValueError as e:
+        raise TopicError(f"主题 {name} 的 schedule 无效: {e}")
+    weights = config.get("weights") or {}
+    unknown = [key for key in weights if key not in DEFAULT_WEIGHTS]
+    if unknown or not all(isinstance(v, (int, float)) for v in weights.values()):
+        raise TopicError(f"主题 {name} 的 weights 无效，可选项为 {', '.join(DEFAULT_WEIGHTS)}")
+    return TopicPlan(
+        topic_id, name, keywords,
+        report_name=config.get("report_name"),
+        sources=sources,
+        schedule=schedule,
+        important_accounts=_or_default(config.get("important_accounts"), DEFAULT_IMPORTANT_ACCOUNTS),
+        account_hints=_or_default(config.get("account_hints"), DEFAULT_ACCOUNT_HINTS),
+        weights=weights,
+        path=path,
+    )
+
+
+def _or_default(value, default):
+    """未配置时使用默认值，配置为空列表时保持为空"""
+    return default if value is None else value
+
+
+def _is_string_list(value):
+    return isinstance(value, list) and all(isinstance(v, str) and v for v in value)
+
+
+class TopicRegistry:
+    """从配置目录加载主题，按文件修改时间增量重新加载"""
+
+    def __init__(self, directory, source_names=None):
+        self.directory = directory
+        self.source_names = source_names
+        # 文件路径 -> ((修改时间, 大小), TopicPlan 或 None)
+        self.files = {}
+        self.plans = {}
+
+    def _config_files(self):
+        paths = []
+        for pattern in CONFIG_PATTERNS:
+            paths.extend(glob.glob(os.path.join(self.directory, pattern)))
+        return sorted(paths)
+
+    def reload(self):
+        """重新扫描配置目录，只编译新增或修改过的文件，返回变化了的主题编号集合"""
+        seen = set()
+        changed_files = {}
+        for path in self._config_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            previous = self.files.get(path)
+            if previous is not None and previous[0] == signature:
+                continue
+            try:
+                plan = compile_plan(load_config_file(path), path, self.source_names)
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                # 语法错误（json.JSONDecodeError 是 ValueError 的子类，YAML 错误转换为 TopicError）、
+                # 配置无效或字段类型不对；只影响这一个文件
+                print(f"加载主题配置 {path} 出错，保留原来的配置: {e}")
+                plan = previous[1] if previous else None
+            changed_files[path] = (signature, plan)
+
+        removed = [path for path in self.files if path not in seen]
+        if not changed_files and not removed:
+            return set()
+
+        files = {path: entry for path, entry in self.files.items() if path in seen}
+        files.update(changed_files)
+        plans = {}
+        for path, (_, plan) in sorted(files.items()):
+            if plan is None:
+                continue
+            if plan.id in plans:
+                print(f"主题编号 {plan.id} 重复（{plans[plan.id].path} 和 {path}），忽略后者")
+                continue
+            plans[plan.id] = plan
+        changed = {
+            topic_id for topic_id in set(plans) | set(self.plans)
+            if plans.get(topic_id) is not self.plans.get(topic_id)
+        }
+        self.files = files
+        # 每次替换为新的字典，正在使用旧字典的线程不受影响
+        self.plans = plans
+        return changed
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分布式爬取的任务队列：协调进程把主题展开为关键词搜索和文章摘要任务放入队列，
+多个工作进程（可在不同机器上，共享同一个队列文件）领取任务并回写结果。
+
+队列保存在SQLite中，领取任务时在 BEGIN IMMEDIATE 事务中完成“查找+标记”，多进程不会领到同一个任务。
+每个任务领取后有租约，工作进程崩溃或超时未完成时租约到期，任务重新变为可领取；
+失败的任务（包括租约到期的任务）重试到 max_attempts 次后标记为失败，反复导致工作进程崩溃的任务不会无限重试。
+协调进程放弃等待时把本次运行剩余的任务标记为已取消，工作进程不再领取，处理中的任务完成后也不覆盖取消状态。
+接口只有 put/claim/complete/fail/cancel/results/progress，换成Redis等其他存储时实现相同的方法即可。
+"""
+
+import json
+import os
+import threading
+import time
+
+# 任务租约（秒）：超过这个时间仍未完成的任务可被其他工作进程重新领取
+DEFAULT_LEASE = 300
+# 任务最多尝试次数
+DEFAULT_MAX_ATTEMPTS = 3
+# 等待写锁的时间（秒）
+BUSY_TIMEOUT = 30
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskQueue:
+    """基于SQLite的任务队列，同一数据库文件可被多个进程同时使用"""
+
+    def __init__(self, path, lease=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        import sqlite3
+
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 自动提交模式，事务用 BEGIN IMMEDIATE 显式开启
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS tasks_key ON tasks(run_id, kind, key);
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status, id);
+        """)
+
+    def put(self, run_id, kind, key, payload):
+        """加入一个任务；同一次运行中 (kind, key) 相同的任务只保留一个，返回是否新加入"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO tasks (run_id, kind, key, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, kind, key, json.dumps(payload, ensure_ascii=False), PENDING, now, now),
+            )
+            return cursor.rowcount > 0
+
+    def claim(self, worker, kinds=None):
+        """
+        领取一个任务（待处理的，或租约已过期的），返回任务字典
+        {id, run_id, kind, key, payload, attempts}，没有任务时返回 None；
+        租约已过期且已达到最多尝试次数的任务标记为失败，不再领取
+        """
+        now = time.time()
+        sql = (
+            "SELECT id, run_id, kind, key, payload, attempts FROM tasks "
+            "WHERE (status = ? OR (status = ? AND lease_until < ?))"
+        )
+        params = [PENDING, RUNNING, now]
+        if kinds:
+            sql += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(kinds)
+        sql += " ORDER BY id LIMIT 1"
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "UPDATE tasks SET status = ?, error = ?, lease_until = NULL, updated_at = ? "
+                    "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                    (FAILED, "租约到期（工作进程可能已崩溃）", now, RUNNING, now, self.max_attempts),
+                )
+                row = self.conn.execute(sql, params).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE tasks SET status = ?, worker = ?, attempts = attempts + 1, "
+                        "lease_until = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, worker, now + self.lease, now, row[0]),
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        task_id, run_id, kind, key, payload, attempts = row
+        return {
+            "id": task_id, "run_id": run_id, "kind": kind, "key": key,
+            "payload": json.loads(payload), "attempts": attempts + 1,
+        }
+
+    def complete(self, task_id, result):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status != ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), task_id, CANCELLED),
+            )
+
+    def fail(self, task_id, error):
+        """记录失败：未达到最多尝试次数时重新变为待处理，否则标记为失败"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "error = ?, lease_until = NULL, updated_at = ? WHERE id = ? AND status != ?",
+                (self.max_attempts, FAILED, PENDING, str(error), time.time(), task_id, CANCELLED),
+            )
+
+    def cancel(self, run_id, kind=None):
+        """把本次运行中（kind 不为空时只限该类）待处理和处理中的任务标记为已取消，返回取消的条数"""
+        sql = "UPDATE tasks SET status = ?, lease_until = NULL, updated_at = ? WHERE run_id = ? AND status IN (?, ?)"
+        params = [CANCELLED, time.time(), run_id, PENDING, RUNNING]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self.lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def results(self, run_id, kind):
+        """已完成任务的结果 {key: result}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, result FROM tasks WHERE run_id = ? AND kind = ? AND status = ?",
+                (run_id, kind, DONE),
+            ).fetchall()
+        return {key: json.loads(result) for key, result in rows}
+
+    def progress(self, run_id, kind=None):
+        """各状态的任务数 {status: count}"""
+        sql = "SELECT status, COUNT(*) FROM tasks WHERE run_id = ?"
+        params = [run_id]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self.lock:
+            return dict(self.conn.execute(sql + " GROUP BY status", params).fetchall())
+
+    def unfinished(self, run_id, kind=None):
+        """待处理和处理中的任务数"""
+        counts = self.progress(run_id, kind)
+        return counts.get(PENDING, 0) + counts.get(RUNNING, 0)
+
+    def purge(self, before):
+        """删除 before（时间戳）之前创建的任务，返回删除的条数"""
+        with self.lock:
+            return self.conn.execute("DELETE FROM tasks WHERE created_at < ?", (before,)).rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()